@@ -0,0 +1,315 @@
+"""تجمیع‌های ماندگار (materialized) داشبورد که با هر نوشتن به صورت افزایشی به‌روز می‌شوند
+
+برای هر شیت تعداد ردیف‌ها، شمارنده‌های شرطی (مثلاً شکاف بحرانی) و جمع و تعداد مقادیر ستون‌های عددی
+به صورت کلی و به تفکیک ستون‌های گروه (واحد، وضعیت، نوع شکاف، ...) نگه داشته می‌شود؛ خواندن آن‌ها
+مستقل از اندازه سازمان است. هر تجمیع با نسخه شیت (sheet_version) ذخیره می‌شود و اگر شیت بیرون از
+مسیر ردیابی‌شده (ورود انبوه، فرایند دیگر، ادغام ژورنال) تغییر کند، یک بار از روی شیت بازسازی می‌شود.
+"""
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from talent_analytics import CRITICAL_GAP_SIZE, PLAN_ACTIVE, PLAN_COMPLETED
+from talent_storage import SHEET_KEYS, group_changes
+
+# groups: ستون‌های تفکیک؛ values: ستون‌های عددی (جمع و میانگین)؛ at_least: شمارنده‌های «مقدار ≥ آستانه»
+AGGREGATE_SPECS = {
+    'Employees': {'groups': ['Unit', 'CareerStage'], 'values': ['MotivationScore'], 'at_least': {}},
+    'Gaps': {'groups': ['Unit', 'Status', 'GapType'], 'values': ['GapSize', 'CostEstimate'],
+             'at_least': {'critical': ('GapSize', CRITICAL_GAP_SIZE)}},
+    'Development_Plans': {'groups': ['Status', 'PlanType'], 'values': ['Cost', 'Progress'], 'at_least': {}},
+}
+
+
+def _number(value) -> float:
+    """مقدار عددی یک خانه (متن عددی فرم‌ها هم پذیرفته می‌شود)؛ NaN برای خالی یا غیرعددی"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return np.nan
+    return number
+
+
+def _group_value(value):
+    return None if value is None or (not isinstance(value, str) and pd.isna(value)) else value
+
+
+class SheetAggregates:
+    """تجمیع یک شیت؛ بردار هر ردیف: [تعداد، شمارنده‌های شرطی، (جمع، تعداد مقدار) هر ستون عددی]"""
+
+    def __init__(self, sheet_name, version):
+        spec = AGGREGATE_SPECS[sheet_name]
+        self.sheet_name = sheet_name
+        self.version = version
+        self.key_column = SHEET_KEYS[sheet_name]
+        self.groups: List[str] = spec['groups']
+        self.values: List[str] = spec['values']
+        self.flags = spec['at_least']
+        self.width = 1 + len(self.flags) + 2 * len(self.values)
+        self.totals = np.zeros(self.width)
+        self.by_group: Dict[str, Dict[object, np.ndarray]] = {column: {} for column in self.groups}
+        # مقادیر خام هر ردیف برای کم کردن سهم قبلی آن در به‌روزرسانی‌ها
+        self._index = pd.Index([])
+        self._group_rows: Dict[str, np.ndarray] = {}
+        self._value_rows: Dict[str, np.ndarray] = {}
+        self._inserted: Dict[object, dict] = {}
+
+    @property
+    def columns(self) -> List[str]:
+        return [self.key_column] + self.groups + self.values
+
+    def _vector(self, values: Dict[str, float]) -> np.ndarray:
+        vector = np.zeros(self.width)
+        vector[0] = 1
+        for i, (column, threshold) in enumerate(self.flags.values(), start=1):
+            vector[i] = values[column] >= threshold
+        offset = 1 + len(self.flags)
+        for i, column in enumerate(self.values):
+            if not np.isnan(values[column]):
+                vector[offset + 2 * i] = values[column]
+                vector[offset + 2 * i + 1] = 1
+        return vector
+
+    def load(self, df):
+        """ساخت کامل از روی شیت در یک گذر برداری"""
+        n = len(df)
+        numbers = {column: (pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan, copy=True)
+                            if column in df.columns else np.full(n, np.nan)) for column in self.values}
+        matrix = np.zeros((n, self.width))
+        matrix[:, 0] = 1
+        for i, (column, threshold) in enumerate(self.flags.values(), start=1):
+            matrix[:, i] = numbers[column] >= threshold
+        offset = 1 + len(self.flags)
+        for i, column in enumerate(self.values):
+            present = ~np.isnan(numbers[column])
+            matrix[:, offset + 2 * i] = np.where(present, numbers[column], 0)
+            matrix[:, offset + 2 * i + 1] = present
+        self.totals = matrix.sum(axis=0)
+        for column in self.groups:
+            if column not in df.columns:
+                self._group_rows[column] = np.full(n, None, dtype=object)
+                continue
+            sums = pd.DataFrame(matrix).groupby(df[column].to_numpy(), sort=False).sum()
+            self.by_group[column] = {value: row for value, row in zip(sums.index, sums.to_numpy())}
+            self._group_rows[column] = df[column].to_numpy(dtype=object, copy=True)
+        self._value_rows = numbers
+        keys = df[self.key_column] if self.key_column in df.columns else pd.Series([None] * n)
+        self._index = pd.Index(keys.to_numpy(dtype=object))
+        return self
+
+    def _add(self, row: dict, sign):
+        vector = sign * self._vector({column: row[column] for column in self.values})
+        self.totals += vector
+        for column in self.groups:
+            value = row[column]
+            if value is None:
+                continue
+            bucket = self.by_group[column]
+            bucket[value] = bucket.get(value, np.zeros(self.width)) + vector
+
+    def _row(self, key) -> Optional[dict]:
+        """مقادیر فعلی ردیف با کلید داده‌شده؛ None اگر نباشد، False اگر کلید یکتا نباشد"""
+        if key in self._inserted:
+            return self._inserted[key]
+        try:
+            position = self._index.get_loc(key)
+        except KeyError:
+            return None
+        if not isinstance(position, (int, np.integer)):
+            return False
+        row = {column: _group_value(self._group_rows[column][position]) for column in self.groups}
+        row.update({column: self._value_rows[column][position] for column in self.values})
+        row['_position'] = position
+        return row
+
+    def _store(self, key, row):
+        position = row.pop('_position', None)
+        if position is None:
+            self._inserted[key] = row
+            return
+        for column in self.groups:
+            self._group_rows[column][position] = row[column]
+        for column in self.values:
+            self._value_rows[column][position] = row[column]
+
+    def _normalize(self, values: dict, base: Optional[dict] = None) -> dict:
+        row = dict(base) if base else {column: None for column in self.groups}
+        if not base:
+            row.update({column: np.nan for column in self.values})
+        for column, value in values.items():
+            if column in self.groups:
+                row[column] = _group_value(value)
+            elif column in self.values:
+                row[column] = _number(value)
+        return row
+
+    def apply(self, changes, upsert=True) -> bool:
+        """اعمال تغییرات ردیفی با همان معنای apply_changes (با upsert درج کلید تکراری = به‌روزرسانی)؛
+        False یعنی تغییر قابل ردیابی نیست و تجمیع باید بازسازی شود"""
+        for change in changes:
+            if change['op'] == 'insert':
+                updates = [(row.get(self.key_column), row) for row in change['rows']]
+            elif change['op'] == 'update':
+                if change['key'] != self.key_column or self.key_column in change['values']:
+                    return False
+                updates = [(change['id'], change['values'])]
+            else:
+                return False
+            for key, values in updates:
+                old = self._row(key) if key is not None else None
+                if old is False or (old is not None and change['op'] == 'insert' and not upsert):
+                    return False
+                if old is None:
+                    if change['op'] == 'update':
+                        # به‌روزرسانی ردیف ناموجود اثری ندارد
+                        continue
+                    new = self._normalize(values)
+                else:
+                    self._add(old, -1)
+                    new = self._normalize(values, old)
+                self._add(new, 1)
+                if key is not None:
+                    self._store(key, new)
+        return True
+
+    # --- خواندن ----------------------------------------------------------
+
+    def _describe(self, vector) -> dict:
+        result = {'count': int(vector[0])}
+        for i, name in enumerate(self.flags, start=1):
+            result[name] = int(vector[i])
+        offset = 1 + len(self.flags)
+        for i, column in enumerate(self.values):
+            total, present = vector[offset + 2 * i], vector[offset + 2 * i + 1]
+            result[f"{column}_sum"] = total
+            result[f"{column}_mean"] = total / present if present else np.nan
+        return result
+
+    def summary(self) -> dict:
+        return self._describe(self.totals)
+
+    def breakdown(self, column) -> pd.DataFrame:
+        rows = {value: self._describe(vector) for value, vector in self.by_group.get(column, {}).items()
+                if vector[0] > 0}
+        return pd.DataFrame.from_dict(rows, orient='index')
+
+
+class MaterializedStore:
+    """ساختارهای مشتق (تجمیع، ایندکس، ...) از شیت‌های یک موتور ذخیره‌سازی که با نوشتن‌ها به‌روز می‌مانند
+
+    زیرکلاس‌ها sheets (شیت‌های پشتیبانی‌شده) و entry_class را تعیین می‌کنند؛ entry_class(sheet_name, version)
+    باید columns، load(df) و apply(changes, upsert) داشته باشد (apply با False یعنی بازسازی لازم است).
+    """
+
+    sheets = ()
+    entry_class = None
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.rebuilds = 0
+        self._lock = threading.RLock()
+        # نوشتن و به‌روزرسانی ساختار مشتق به ترتیب انجام می‌شوند تا نسخه پس از نوشتن متعلق به همین تغییر باشد
+        self._write_lock = threading.Lock()
+        self._entries: Dict[str, object] = {}
+
+    def get(self, sheet_name):
+        """ساختار هم‌نسخه با شیت؛ در صورت تغییر بیرونی یک بار بازسازی می‌شود"""
+        version = self.backend.sheet_version(sheet_name)
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            if entry is not None and entry.version == version and version is not None:
+                return entry
+        entry = self.entry_class(sheet_name, version)
+        df = self.backend.load_sheet(sheet_name, columns=entry.columns)
+        entry.load(df)
+        with self._lock:
+            self.rebuilds += 1
+            if version is not None:
+                self._entries[sheet_name] = entry
+        return entry
+
+    def write(self, changes, write):
+        """اجرای write (که changes را ثبت می‌کند) و اعمال همان تغییرات روی ساختارها"""
+        grouped = {sheet_name: sheet_changes for sheet_name, sheet_changes in group_changes(changes).items()
+                   if sheet_name in self.sheets}
+        with self._write_lock:
+            before = {sheet_name: self.backend.sheet_version(sheet_name) for sheet_name in grouped}
+            result = write()
+            with self._lock:
+                for sheet_name, sheet_changes in grouped.items():
+                    entry = self._entries.pop(sheet_name, None)
+                    if entry is None or entry.version != before[sheet_name]:
+                        continue
+                    if not entry.apply(sheet_changes, self.backend.upsert):
+                        continue
+                    entry.version = self.backend.sheet_version(sheet_name)
+                    self._entries[sheet_name] = entry
+        return result
+
+    def replace(self, frames: Dict[str, pd.DataFrame], write):
+        """اجرای write (جایگزینی کامل شیت‌ها) و ساخت ساختار همان شیت‌ها از روی داده‌های در حافظه"""
+        with self._write_lock:
+            result = write()
+            with self._lock:
+                for sheet_name, df in frames.items():
+                    if sheet_name not in self.sheets:
+                        continue
+                    self._entries.pop(sheet_name, None)
+                    version = self.backend.sheet_version(sheet_name)
+                    if version is not None:
+                        entry = self.entry_class(sheet_name, version)
+                        entry.load(df)
+                        self._entries[sheet_name] = entry
+        return result
+
+    @classmethod
+    def for_backend(cls, backend):
+        """نمونه مشترک این نوع ساختار برای یک موتور ذخیره‌سازی در کل پروسه
+        (نمونه موتورها در create_backend یکتا هستند)"""
+        with _STORES_LOCK:
+            store = _STORES.get((cls, id(backend)))
+            if store is None or store.backend is not backend:
+                store = _STORES[(cls, id(backend))] = cls(backend)
+            return store
+
+
+_STORES: Dict[tuple, MaterializedStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+class AggregateStore(MaterializedStore):
+    """تجمیع‌های شیت‌های یک موتور ذخیره‌سازی"""
+
+    sheets = AGGREGATE_SPECS
+    entry_class = SheetAggregates
+
+    def summary(self, sheet_name) -> dict:
+        with self._lock:
+            return self.get(sheet_name).summary()
+
+    def breakdown(self, sheet_name, column) -> pd.DataFrame:
+        with self._lock:
+            return self.get(sheet_name).breakdown(column)
+
+
+def aggregate_store(backend) -> AggregateStore:
+    """تجمیع‌های مشترک یک موتور ذخیره‌سازی در کل پروسه"""
+    return AggregateStore.for_backend(backend)
+
+
+def dashboard_metrics(store: AggregateStore) -> dict:
+    """کارت‌های بالای داشبورد از روی تجمیع‌ها (همان خروجی talent_analytics.dashboard_metrics)"""
+    employees = store.summary('Employees')
+    gaps = store.summary('Gaps')
+    plan_status = store.breakdown('Development_Plans', 'Status')
+    plan_counts = plan_status['count'] if not plan_status.empty else pd.Series(dtype='int64')
+    return {
+        'employees': employees['count'],
+        'gaps': gaps['count'],
+        'critical_gaps': gaps['critical'],
+        'active_plans': int(plan_counts.get(PLAN_ACTIVE, 0)),
+        'completed_plans': int(plan_counts.get(PLAN_COMPLETED, 0)),
+        'avg_motivation': employees['MotivationScore_mean'] if employees['count'] else 0,
+    }
@@ -0,0 +1,308 @@
+"""محاسبات تحلیلی صفحه‌های سیستم مدیریت استعداد، جدا از نمایش Streamlit
+
+همه توابع DataFrame می‌گیرند و DataFrame، Series یا dict برمی‌گردانند؛ ورودی‌ها تغییر نمی‌کنند.
+صفحه‌ها، کارهای دسته‌ای و بنچمارک‌ها از همین توابع استفاده می‌کنند و نتیجه با RESULT_CACHE
+به ازای نسخه شیت‌های ورودی نگه داشته می‌شود.
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable
+
+import numpy as np
+import pandas as pd
+
+LEVELS = ['کم', 'متوسط', 'زیاد']
+IMPACT_SCORES = {'کم': 1, 'متوسط': 2, 'زیاد': 3}
+URGENCY_MULTIPLIERS = {'کم': 1, 'متوسط': 1.5, 'زیاد': 2}
+CRITICAL_GAP_SIZE = 2
+
+PLAN_ACTIVE = 'در جریان'
+PLAN_COMPLETED = 'تکمیل شده'
+PLAN_SCHEDULED = 'برنامه‌ریزی شده'
+GAP_SOLVED = 'حل شده'
+
+
+class ResultCache:
+    """کش LRU نتایج تحلیلی؛ کلید شامل نسخه شیت‌های ورودی است پس تغییر داده آن را باطل می‌کند"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, object]' = OrderedDict()
+
+    def get_or_compute(self, key, compute: Callable[[], object]):
+        """نتیجه از کش؛ نتیجه‌ها فقط‌خواندنی هستند و بین نشست‌ها مشترک‌اند"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        result = compute()
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+RESULT_CACHE = ResultCache()
+
+
+def _has(df, *columns) -> bool:
+    return not df.empty and all(column in df.columns for column in columns)
+
+
+def _scores(series, mapping) -> pd.Series:
+    """نگاشت سطح‌های متنی (کم/متوسط/زیاد) به عدد؛ مقدار ناشناخته NaN می‌شود"""
+    return series.map(mapping).astype(float)
+
+
+# --- جدول واقعیت شکاف‌ها ------------------------------------------------------
+
+# ستون‌های کارمند و آخرین برنامه توسعه که به هر شکاف افزوده می‌شوند (ستون‌های برنامه با نام جدید)
+EMPLOYEE_FACT_COLUMNS = ['FullName', 'JobTitle', 'Unit', 'ManagerID', 'CareerStage']
+PLAN_FACT_COLUMNS = {
+    'PlanID': 'PlanID', 'PlanName': 'PlanName', 'PlanType': 'PlanType', 'Status': 'PlanStatus',
+    'Progress': 'Progress', 'Cost': 'PlanCost', 'StartDate': 'PlanStartDate', 'EndDate': 'PlanEndDate',
+}
+
+
+def gap_facts(gaps, employees, plans) -> pd.DataFrame:
+    """جدول واقعیت شکاف‌ها: هر شکاف یک ردیف با اطلاعات کارمند، واحد او و آخرین برنامه توسعه
+
+    واحد شکاف واحد فعلی کارمند است (اگر کارمند پیدا نشود واحد ثبت‌شده در خود شکاف می‌ماند).
+    آخرین برنامه: برنامه با دیرترین تاریخ شروع (در تساوی، آخرین ردیف)؛ PlanCount تعداد برنامه‌های شکاف است.
+    """
+    facts = gaps.copy(deep=False)
+    if _has(gaps, 'EmployeeID') and _has(employees, 'EmployeeID'):
+        columns = [column for column in EMPLOYEE_FACT_COLUMNS if column in employees.columns]
+        # یک جست‌وجوی کلید برای همه ستون‌ها (به جای map جداگانه برای هر ستون)
+        aligned = _aligned(employees.drop_duplicates('EmployeeID', keep='last'), 'EmployeeID', columns, facts)
+        for column in columns:
+            values = aligned[column]
+            if column == 'Unit' and 'Unit' in gaps.columns:
+                values = values.astype(object).where(values.notna(), gaps['Unit'].astype(object)).astype('category')
+            facts[column] = values
+    if _has(gaps, 'GapID') and _has(plans, 'GapID'):
+        ordered = plans.sort_values('StartDate', kind='stable', na_position='first') if 'StartDate' in plans.columns \
+            else plans
+        columns = [column for column in PLAN_FACT_COLUMNS if column in plans.columns]
+        aligned = _aligned(ordered.drop_duplicates('GapID', keep='last'), 'GapID', columns, facts)
+        for column in columns:
+            facts[PLAN_FACT_COLUMNS[column]] = aligned[column]
+        counts = plans['GapID'].value_counts()
+        facts['PlanCount'] = counts.reindex(facts['GapID'].to_numpy(), fill_value=0).to_numpy(dtype='int64')
+    return facts
+
+
+def _aligned(table, key, columns, facts) -> pd.DataFrame:
+    """ستون‌های table (با کلید یکتا) هم‌تراز با ردیف‌های facts بر اساس ستون key"""
+    return table.set_index(key)[columns].reindex(facts[key].to_numpy()).set_axis(facts.index)
+
+
+# ورودی gap_facts برای CompleteTalentSystem.analytics؛ خود GAP_FACTS هم می‌تواند ورودی تحلیل‌های دیگر باشد
+GAP_FACT_SOURCES = [
+    ('Gaps', None),
+    ('Employees', ['EmployeeID'] + EMPLOYEE_FACT_COLUMNS),
+    ('Development_Plans', ['GapID'] + list(PLAN_FACT_COLUMNS)),
+]
+GAP_FACTS = (gap_facts, GAP_FACT_SOURCES)
+
+
+def distribution(df, column) -> pd.Series:
+    """تعداد هر مقدار یک ستون (برای نمودارهای توزیع)"""
+    if not _has(df, column):
+        return pd.Series(dtype='int64')
+    return df[column].value_counts()
+
+
+def group_total(df, by, column, how='sum') -> pd.Series:
+    """جمع یا میانگین یک ستون به تفکیک ستون دیگر"""
+    if not _has(df, by, column):
+        return pd.Series(dtype='float64')
+    return df.groupby(by, observed=True)[column].agg(how)
+
+
+def page_rows(df, page, page_size, sort_by=None, ascending=True) -> pd.DataFrame:
+    """ردیف‌های صفحه page (از ۱) پس از مرتب‌سازی روی sort_by؛ فقط ترتیب همان ستون محاسبه و
+    ردیف‌های همان صفحه از جدول برداشته می‌شوند (مقدارهای خالی همیشه در انتها)"""
+    start = max(page - 1, 0) * page_size
+    if not sort_by or sort_by not in df.columns:
+        return df.iloc[start:start + page_size]
+    order = df[sort_by].reset_index(drop=True).sort_values(ascending=ascending, kind='stable', na_position='last')
+    return df.iloc[order.index[start:start + page_size]]
+
+
+# --- داشبورد ---------------------------------------------------------------
+
+def dashboard_metrics(employees, gaps, plans) -> Dict[str, float]:
+    """کارت‌های کلیدی داشبورد با محاسبه کامل از روی شیت‌ها
+
+    صفحه‌ها این کارت‌ها را از talent_aggregates.dashboard_metrics می‌خوانند؛ این نسخه مرجعی است که تجمیع‌های
+    افزایشی در آزمون‌ها و بنچمارک با آن مقایسه می‌شوند.
+    """
+    return {
+        'employees': len(employees),
+        'gaps': len(gaps),
+        'critical_gaps': int((gaps['GapSize'] >= CRITICAL_GAP_SIZE).sum()) if _has(gaps, 'GapSize') else 0,
+        'active_plans': int((plans['Status'] == PLAN_ACTIVE).sum()) if _has(plans, 'Status') else 0,
+        'completed_plans': int((plans['Status'] == PLAN_COMPLETED).sum()) if _has(plans, 'Status') else 0,
+        'avg_motivation': (employees['MotivationScore'].mean()
+                           if _has(employees, 'MotivationScore') else 0),
+    }
+
+
+def career_stage_motivation(employees) -> pd.DataFrame:
+    """میانگین انگیزه و تعداد کارکنان هر مرحله شغلی"""
+    if not _has(employees, 'CareerStage', 'MotivationScore', 'EmployeeID'):
+        return pd.DataFrame(columns=['CareerStage', 'MotivationScore', 'EmployeeID'])
+    return employees.groupby('CareerStage', observed=True).agg({
+        'MotivationScore': 'mean',
+        'EmployeeID': 'count'
+    }).reset_index()
+
+
+# --- شکاف‌های بحرانی ---------------------------------------------------------
+
+def gap_priority(gaps) -> pd.Series:
+    """امتیاز اولویت شکاف: اندازه × ضریب فوریت × (تأثیر بر تیم + تأثیر بر سازمان)؛ مقدار ناشناخته صفر حساب می‌شود"""
+    score = pd.Series(1.0, index=gaps.index)
+    if 'GapSize' in gaps.columns:
+        score *= gaps['GapSize'].astype(float).fillna(0)
+    if 'Urgency' in gaps.columns:
+        score *= _scores(gaps['Urgency'], URGENCY_MULTIPLIERS).fillna(1)
+    impact = pd.Series(0.0, index=gaps.index)
+    for column in ('ImpactOnTeam', 'ImpactOnOrg'):
+        if column in gaps.columns:
+            impact += _scores(gaps[column], IMPACT_SCORES).fillna(0)
+    return score * impact
+
+
+def critical_gaps(facts, threshold=CRITICAL_GAP_SIZE) -> pd.DataFrame:
+    """شکاف‌های با اندازه حداقل threshold از جدول واقعیت (همراه با کارمند و آخرین برنامه توسعه)،
+    به ترتیب نزولی امتیاز اولویت (ستون Priority)"""
+    if not _has(facts, 'GapSize'):
+        return facts.iloc[:0]
+    critical = facts[(facts['GapSize'] >= threshold).fillna(False).astype(bool)]
+    critical = critical.assign(Priority=gap_priority(critical))
+    return critical.sort_values('Priority', ascending=False, kind='stable')
+
+
+def critical_gap_summary(critical) -> Dict[str, float]:
+    """خلاصه آماری شکاف‌های بحرانی"""
+    return {
+        'total_cost': critical['CostEstimate'].sum() if 'CostEstimate' in critical.columns else 0,
+        'avg_gap_size': critical['GapSize'].mean() if 'GapSize' in critical.columns else 0,
+        'high_urgency': int((critical['Urgency'] == 'زیاد').sum()) if 'Urgency' in critical.columns else 0,
+        'high_impact': int((critical['ImpactOnOrg'] == 'زیاد').sum()) if 'ImpactOnOrg' in critical.columns else 0,
+    }
+
+
+# --- برنامه‌های توسعه ---------------------------------------------------------
+
+def plan_overview(plans, facts) -> pd.DataFrame:
+    """برنامه‌های توسعه همراه با شکاف و کارمند مرتبط (از جدول واقعیت شکاف‌ها)"""
+    gap_columns = [column for column in ['GapID', 'EmployeeID', 'GapName', 'GapSize', 'FullName', 'Unit']
+                   if column in facts.columns]
+    if 'GapID' not in plans.columns or 'GapID' not in gap_columns:
+        return plans
+    return plans.merge(facts[gap_columns], on='GapID', how='left')
+
+
+def plan_totals(plans) -> Dict[str, float]:
+    """مجموع هزینه، میانگین پیشرفت و مجموع ساعت‌های برنامه‌ها"""
+    return {
+        'total_cost': plans['Cost'].sum() if 'Cost' in plans.columns else 0,
+        'avg_progress': plans['Progress'].mean() if 'Progress' in plans.columns else 0,
+        'total_hours': plans['EstimatedHours'].sum() if 'EstimatedHours' in plans.columns else 0,
+    }
+
+
+def effectiveness_summary(plans) -> Dict[str, float]:
+    """تعداد برنامه‌ها، برنامه‌های تکمیل‌شده، نرخ تکمیل و سرمایه‌گذاری کل"""
+    total = len(plans)
+    completed = int((plans['Status'] == PLAN_COMPLETED).sum()) if 'Status' in plans.columns else 0
+    return {
+        'total_plans': total,
+        'completed_plans': completed,
+        'completion_rate': completed / total * 100 if total > 0 else 0,
+        'total_investment': plans['Cost'].sum() if 'Cost' in plans.columns else 0,
+    }
+
+
+def completed_plan_roi(plans, gaps) -> pd.DataFrame:
+    """ROI ساده برنامه‌های تکمیل‌شده: مجموع امتیاز تأثیر بر تیم و سازمان به ازای هر میلیون ریال"""
+    if not _has(plans, 'Status', 'GapID') or not _has(gaps, 'GapID'):
+        return pd.DataFrame()
+    completed = plans[plans['Status'] == PLAN_COMPLETED]
+    if completed.empty:
+        return pd.DataFrame()
+    gap_columns = [column for column in ['GapID', 'GapSize', 'ImpactOnTeam', 'ImpactOnOrg'] if column in gaps.columns]
+    result = completed.merge(gaps[gap_columns], on='GapID', how='left')
+    result['TeamImpactScore'] = _scores(result['ImpactOnTeam'], IMPACT_SCORES)
+    result['OrgImpactScore'] = _scores(result['ImpactOnOrg'], IMPACT_SCORES)
+    result['TotalImpact'] = result['TeamImpactScore'] + result['OrgImpactScore']
+    if 'Cost' in result.columns:
+        result['ROI'] = ((result['TotalImpact'] * 1000000) / result['Cost']).replace([np.inf, -np.inf], 0)
+    return result
+
+
+def roi_scores(plans, gaps) -> pd.DataFrame:
+    """امتیاز ROI پیشرفته همه برنامه‌ها (اندازه شکاف × تأثیرها × ضریب فوریت به ازای هزینه)، نزولی"""
+    if 'GapID' not in plans.columns or not _has(gaps, 'GapID'):
+        return pd.DataFrame()
+    gap_columns = [column for column in ['GapID', 'GapSize', 'ImpactOnTeam', 'ImpactOnOrg', 'Urgency']
+                   if column in gaps.columns]
+    result = plans.merge(gaps[gap_columns], on='GapID', how='left')
+    if not {'Cost', 'GapSize', 'ImpactOnTeam', 'ImpactOnOrg', 'Urgency'} <= set(result.columns):
+        return result
+    result['ROI_Score'] = (
+        result['GapSize'].astype(float) *
+        _scores(result['ImpactOnTeam'], IMPACT_SCORES) *
+        _scores(result['ImpactOnOrg'], IMPACT_SCORES) *
+        _scores(result['Urgency'], URGENCY_MULTIPLIERS) *
+        1000000 / result['Cost']
+    ).replace([np.inf, -np.inf], 0)
+    return result.sort_values('ROI_Score', ascending=False)
+
+
+def monthly_costs(plans) -> pd.Series:
+    """مجموع هزینه برنامه‌ها به تفکیک ماه شروع (برچسب YYYY-MM)"""
+    if not _has(plans, 'StartDate', 'Cost'):
+        return pd.Series(dtype='float64')
+    start_dates = pd.to_datetime(plans['StartDate'], errors='coerce')
+    costs = plans['Cost'].groupby(start_dates.dt.to_period('M')).sum()
+    costs.index = costs.index.astype(str)
+    return costs
+
+
+def planned_cost_forecast(plans) -> Dict[str, float]:
+    """هزینه و تعداد برنامه‌هایی که هنوز شروع نشده‌اند"""
+    if not _has(plans, 'Status'):
+        return {'total_cost': 0, 'count': 0, 'avg_cost': 0}
+    planned = plans[plans['Status'] == PLAN_SCHEDULED]
+    total = planned['Cost'].sum() if not planned.empty and 'Cost' in planned.columns else 0
+    return {
+        'total_cost': total,
+        'count': len(planned),
+        'avg_cost': total / len(planned) if len(planned) > 0 else 0,
+    }
+
+
+# --- گزارش‌های جامع -----------------------------------------------------------
+
+def cost_effectiveness(plans) -> pd.DataFrame:
+    """مجموع هزینه و میانگین پیشرفت هر نوع برنامه"""
+    if not _has(plans, 'PlanType', 'Cost', 'Progress'):
+        return pd.DataFrame(columns=['PlanType', 'Cost', 'Progress'])
+    return plans.groupby('PlanType', observed=True).agg({
+        'Cost': 'sum',
+        'Progress': 'mean'
+    }).reset_index()
@@ -0,0 +1,430 @@
+"""بنچمارک لایه ذخیره‌سازی سیستم مدیریت استعداد
+
+اجرا:
+    python talent_bench.py storage --rows 100000
+    python talent_bench.py stress --sessions 8
+    python talent_bench.py pages --size 1k --size 10k
+    python talent_bench.py pages --save-baseline
+    python talent_bench.py analytics --size 100k
+"""
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from streamlit import logger as streamlit_logger
+
+from talent_storage import (DEFAULT_PATHS, STORAGE_BACKENDS, WORKBOOK_CACHE, JournaledBackend, VersionConflict,
+                            create_backend)
+import talent_analytics as analytics
+from talent_aggregates import SheetAggregates
+from talent_cube import gap_cube
+from talent_filters import EMPLOYEE_FILTERS, PLAN_FILTERS, filter_index
+from talent_hierarchy import ReportingChain, org_rollup
+from talent_matching import course_matcher
+from talent_recommend import recommend_courses
+from talent_search import SheetSearchIndex
+from talent_synth import ORG_SIZES, generate_org, seed_backend
+
+# صفحه‌هایی که آماده‌سازی داده آن‌ها اندازه‌گیری می‌شود: نام کوتاه -> تابع صفحه در talent_management
+PAGES = {
+    'dashboard': 'show_comprehensive_dashboard',
+    'critical_gaps': 'show_critical_gaps',
+    'development_plans': 'show_development_plans',
+    'effectiveness': 'effectiveness_report',
+    'financial': 'financial_analysis',
+    'reports': 'show_comprehensive_reports',
+}
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_pages_baseline.csv')
+BASELINE_KEY = ['backend', 'size', 'page']
+
+
+def sample_gaps(rows, seed=0) -> pd.DataFrame:
+    """شیت شکاف‌های ساختگی با ستون‌های واقعی سیستم"""
+    rng = np.random.default_rng(seed)
+    required = rng.integers(2, 6, rows)
+    current = rng.integers(1, 6, rows).clip(max=required)
+    return pd.DataFrame({
+        'GapID': [f"GAP-{i:06d}" for i in range(1, rows + 1)],
+        'EmployeeID': [f"EMP-{i:06d}" for i in rng.integers(1, max(rows // 3, 2), rows)],
+        'JobCode': rng.choice(['J-DEV-SR', 'J-DEV-JR', 'J-NET-AD'], rows),
+        'Unit': rng.choice(['UNIT01', 'UNIT02', 'UNIT03'], rows),
+        'GapType': rng.choice(['مهارتی', 'رفتاری', 'فرهنگی', 'انگیزشی'], rows),
+        'GapName': rng.choice(['طراحی معماری', 'ارائه مؤثر', 'امنیت شبکه'], rows),
+        'Description': 'شرح شکاف برای آزمون کارایی',
+        'RequiredLevel': required,
+        'CurrentLevel': current,
+        'GapSize': required - current,
+        'Urgency': rng.choice(['کم', 'متوسط', 'زیاد'], rows),
+        'ImpactOnTeam': rng.choice(['کم', 'متوسط', 'زیاد'], rows),
+        'ImpactOnOrg': rng.choice(['کم', 'متوسط', 'زیاد'], rows),
+        'CostEstimate': rng.integers(1, 100, rows) * 100000,
+        'RootCause': rng.choice(['عدم آموزش', 'عدم تجربه'], rows),
+        'Dependencies': '',
+        'Owner': 'MGR-201',
+        'SuccessMetric': 'نمره آزمون به ۴ برسد',
+        'Status': rng.choice(['جدید', 'در دست اقدام', 'حل شده'], rows),
+    })
+
+
+def _median_seconds(func, repeats) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def benchmark_storage(rows=100_000, repeats=5, backends=None, journal=False) -> pd.DataFrame:
+    """میانه زمان ذخیره، بارگذاری (کامل و سه‌ستونی) و افزودن یک ردیف برای هر موتور ذخیره‌سازی
+
+    با journal=True افزودن و به‌روزرسانی از مسیر ژورنال (بدون ادغام در حین اندازه‌گیری) انجام می‌شود.
+    """
+    gaps_df = sample_gaps(rows)
+    new_gap = gaps_df.iloc[0].to_dict()
+    results = []
+    for name in backends or list(STORAGE_BACKENDS):
+        directory = tempfile.mkdtemp(prefix='tms-bench-')
+        try:
+            backend = STORAGE_BACKENDS[name](os.path.join(directory, DEFAULT_PATHS[name]))
+            if journal:
+                backend = JournaledBackend(backend, compact_threshold=float('inf'), compact_interval=3600)
+            backend.initialize({'Gaps': gaps_df.iloc[:0], 'Employees': pd.DataFrame(columns=['EmployeeID'])})
+            save = _median_seconds(lambda: backend.save_sheet(gaps_df, 'Gaps'), repeats)
+
+            def cold_load():
+                backend.clear_cache()
+                backend.load_sheet('Gaps')
+
+            def cold_projected_load():
+                backend.clear_cache()
+                backend.load_sheet('Gaps', columns=['GapSize', 'Status', 'Urgency'])
+
+            load_cold = _median_seconds(cold_load, repeats)
+            load_projected = _median_seconds(cold_projected_load, repeats)
+            load_warm = _median_seconds(lambda: backend.load_sheet('Gaps'), repeats)
+            append = _median_seconds(lambda: backend.append_rows('Gaps', [new_gap]), repeats)
+            update = _median_seconds(
+                lambda: backend.update_rows('Gaps', 'GapID', 'GAP-000001', {'Status': 'حل شده'}), repeats)
+            results.append({
+                'backend': name + ('+journal' if journal else ''), 'rows': rows,
+                'save_s': save, 'load_cold_s': load_cold, 'load_3_columns_s': load_projected,
+                'load_warm_s': load_warm, 'append_one_s': append, 'update_one_s': update,
+            })
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    return pd.DataFrame(results)
+
+
+def _make_backend(name, directory, journal):
+    backend = STORAGE_BACKENDS[name](os.path.join(directory, DEFAULT_PATHS[name]))
+    if journal:
+        backend = JournaledBackend(backend, compact_threshold=50, compact_interval=1.0)
+    return backend
+
+
+def _increment(backend, sheet_name, key_column, key, column, stats):
+    """افزایش یک شمارنده با کنترل نسخه ردیف؛ در صورت تداخل با مقدار تازه دوباره تلاش می‌شود"""
+    while True:
+        df = backend.load_sheet(sheet_name, columns=[key_column, column])
+        current = int(df.loc[df[key_column] == key, column].iloc[0])
+        try:
+            backend.update_rows(sheet_name, key_column, key, {column: current + 1}, expected={column: current})
+            return
+        except VersionConflict:
+            stats['conflicts'] += 1
+
+
+def stress_test(sessions=8, operations=40, backends=None, journal=False) -> pd.DataFrame:
+    """چند نشست همزمان که ردیف اضافه می‌کنند، شمارنده ردیف خود و یک ردیف مشترک را با کنترل نسخه
+    افزایش می‌دهند و یک شیت دیگر را به صورت کامل ویرایش می‌کنند؛ در پایان تعداد نوشتن‌های گم‌شده شمرده می‌شود
+    """
+    results = []
+    for name in backends or list(STORAGE_BACKENDS):
+        directory = tempfile.mkdtemp(prefix='tms-stress-')
+        try:
+            backend = _make_backend(name, directory, journal)
+            plans = pd.DataFrame({'PlanID': ['PLAN-SHARED'] + [f"PLAN-{i:03d}" for i in range(sessions)],
+                                  'Progress': 0})
+            sheets = {'Gaps': sample_gaps(10), 'Development_Plans': plans,
+                      'KPI': pd.DataFrame({'KPIID': ['KPI-001'], 'ActualValue': [0]})}
+            backend.initialize(sheets)
+            for sheet_name, df in sheets.items():
+                backend.save_sheet(df, sheet_name)
+            stats = {'conflicts': 0, 'errors': []}
+            expected = {'appends': 0, 'own': 0, 'shared': 0, 'sheet': 0}
+            counts_lock = threading.Lock()
+
+            def bump_kpi(df):
+                df = df.copy()
+                df['ActualValue'] = df['ActualValue'] + 1
+                return df
+
+            def session(index):
+                try:
+                    for op in range(operations):
+                        kind = op % 4
+                        if kind == 0:
+                            backend.append_rows('Gaps', [{'GapID': f"GAP-S{index}-{op}", 'Status': 'جدید'}])
+                            key = 'appends'
+                        elif kind == 1:
+                            _increment(backend, 'Development_Plans', 'PlanID', f"PLAN-{index:03d}", 'Progress', stats)
+                            key = 'own'
+                        elif kind == 2:
+                            _increment(backend, 'Development_Plans', 'PlanID', 'PLAN-SHARED', 'Progress', stats)
+                            key = 'shared'
+                        else:
+                            backend.modify_sheet('KPI', bump_kpi, retries=1000)
+                            key = 'sheet'
+                        with counts_lock:
+                            expected[key] += 1
+                except Exception as e:
+                    stats['errors'].append(repr(e))
+
+            threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            if journal:
+                backend.compact()
+                backend = backend.base
+            # خواندن دوباره از روی دیسک
+            backend.clear_cache()
+            gaps = backend.load_sheet('Gaps')
+            plans = backend.load_sheet('Development_Plans').set_index('PlanID')['Progress']
+            kpi = backend.load_sheet('KPI')['ActualValue'].iloc[0]
+            own_total = int(plans.drop('PLAN-SHARED').sum())
+            lost = ((expected['appends'] - gaps['GapID'].astype(str).str.startswith('GAP-S').sum())
+                    + (expected['own'] - own_total)
+                    + (expected['shared'] - int(plans['PLAN-SHARED']))
+                    + (expected['sheet'] - int(kpi)))
+            total = sum(expected.values())
+            results.append({
+                'backend': name + ('+journal' if journal else ''), 'sessions': sessions,
+                'writes': total, 'seconds': elapsed, 'writes_per_s': total / elapsed if elapsed else float('nan'),
+                'conflicts_retried': stats['conflicts'], 'lost_writes': int(lost), 'errors': len(stats['errors']),
+            })
+            for error in stats['errors'][:3]:
+                print(f"{name}: {error}")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    return pd.DataFrame(results)
+
+
+def _load_app(directory, backend_name, journal):
+    """ماژول برنامه با موتور ذخیره‌سازی در پوشه موقت (بدون ساخت فایل داده در مسیر جاری)
+
+    صفحه‌ها بدون سرور Streamlit (حالت bare) اجرا می‌شوند؛ ویجت‌ها مقدار پیش‌فرض خود را برمی‌گردانند.
+    """
+    config = {'backend': backend_name, 'path': os.path.join(directory, DEFAULT_PATHS[backend_name]),
+              'journal': journal}
+    os.environ['TMS_STORAGE_BACKEND'] = backend_name
+    os.environ['TMS_STORAGE_PATH'] = config['path']
+    # هشدارهای اجرای بدون سرور در هر فراخوانی ویجت تکرار می‌شوند
+    os.environ.setdefault('STREAMLIT_LOGGER_LEVEL', 'error')
+    streamlit_logger.set_log_level(logging.ERROR)
+    import talent_management as app
+    streamlit_logger.set_log_level(logging.ERROR)
+    app.tms.storage = create_backend(config)
+    return app
+
+
+def _run_page(app, func_name, cold):
+    """یک اجرای صفحه؛ زمان و تعداد پارس فایل اکسل را برمی‌گرداند (اجرای سرد کش نتایج تحلیلی را هم خالی می‌کند)"""
+    if cold:
+        app.tms.storage.clear_cache()
+        analytics.RESULT_CACHE.clear()
+    parses = WORKBOOK_CACHE.parse_count
+    start = time.perf_counter()
+    getattr(app, func_name)()
+    return time.perf_counter() - start, WORKBOOK_CACHE.parse_count - parses
+
+
+def benchmark_pages(sizes=('1k', '10k'), backend_name='excel', repeats=3, pages=None, seed=0,
+                    journal=False) -> pd.DataFrame:
+    """زمان اجرای سرد (پس از پاک کردن کش) و میانه اجراهای گرم، اوج حافظه و تعداد پارس فایل هر صفحه
+    روی سازمان‌های ساختگی talent_synth با اندازه‌های داده‌شده
+
+    اوج حافظه با tracemalloc در یک اجرای گرم اندازه‌گیری می‌شود (حافظه کاری خود صفحه)؛ هزینه پارس
+    در cold_s و parses دیده می‌شود و ردیابی آن با tracemalloc چند برابر کند است.
+    """
+    directory = tempfile.mkdtemp(prefix='tms-pages-')
+    results = []
+    try:
+        app = _load_app(directory, backend_name, journal)
+        for size in sizes:
+            seed_backend(app.tms.storage, generate_org(ORG_SIZES[size], seed=seed))
+            for page in pages or list(PAGES):
+                func_name = PAGES[page]
+                cold_seconds, parses = _run_page(app, func_name, cold=True)
+                warm = [_run_page(app, func_name, cold=False)[0] for _ in range(repeats)]
+                tracemalloc.start()
+                try:
+                    _run_page(app, func_name, cold=False)
+                    peak = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+                results.append({
+                    'backend': backend_name + ('+journal' if journal else ''), 'size': size, 'page': page,
+                    'cold_s': round(cold_seconds, 4),
+                    'warm_s': round(statistics.median(warm), 4),
+                    'peak_mb': round(peak / 1e6, 1),
+                    'parses': parses,
+                })
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return pd.DataFrame(results)
+
+
+def benchmark_analytics(sizes=('10k', '100k'), repeats=3, seed=0) -> pd.DataFrame:
+    """میانه زمان توابع talent_analytics و ساختارهای مشتق صفحه‌ها (مکعب، ایندکس‌ها، تجمیع‌ها)
+    روی شیت‌های ساختگی در حافظه (بدون Streamlit و موتور ذخیره‌سازی)"""
+    results = []
+    for size in sizes:
+        sheets = generate_org(ORG_SIZES[size], seed=seed)
+        employees, gaps, plans = sheets['Employees'], sheets['Gaps'], sheets['Development_Plans']
+        facts = analytics.gap_facts(gaps, employees, plans)
+        overview = analytics.plan_overview(plans, facts)
+        cube = gap_cube(facts)
+        index = filter_index(employees, EMPLOYEE_FILTERS)
+        unit, stage = index.options('Unit')[-1], index.options('CareerStage')[0]
+        plan_index = filter_index(overview, PLAN_FILTERS)
+        aggregate_inputs = {'Employees': employees, 'Gaps': gaps, 'Development_Plans': plans}
+        aggregates = {name: SheetAggregates(name, None).load(df) for name, df in aggregate_inputs.items()}
+        search = SheetSearchIndex('Employees', None).load(employees)
+        courses, competencies = sheets['Training_Courses'], sheets['Competencies']
+        matcher = course_matcher(courses, competencies)
+        gap_names = gaps['GapName'].iloc[:1000].tolist()
+        rollup_inputs = (sheets['Organization'], facts, employees, sheets['KPI'], plans)
+        rollup = org_rollup(*rollup_inputs)
+        org_codes = rollup.hierarchy.codes
+        chain = ReportingChain(employees)
+        managers = chain.managers
+        calls = {
+            'dashboard_metrics': lambda: analytics.dashboard_metrics(employees, gaps, plans),
+            'aggregates_load': lambda: [SheetAggregates(name, None).load(df) for name, df in aggregate_inputs.items()],
+            'aggregates_read': lambda: ([entry.summary() for entry in aggregates.values()],
+                                        aggregates['Development_Plans'].breakdown('Status')),
+            'gap_facts': lambda: analytics.gap_facts(gaps, employees, plans),
+            'critical_gaps': lambda: analytics.critical_gaps(facts),
+            'plan_overview': lambda: analytics.plan_overview(plans, facts),
+            'plan_filter_select': lambda: plan_index.select({'Status': analytics.PLAN_ACTIVE}),
+            'completed_plan_roi': lambda: analytics.completed_plan_roi(plans, gaps),
+            'roi_scores': lambda: analytics.roi_scores(plans, gaps),
+            'monthly_costs': lambda: analytics.monthly_costs(plans),
+            'gap_cube': lambda: gap_cube(facts),
+            'gap_cube_slices': lambda: (cube.slice(['Unit']), cube.crosstab('Unit', 'GapType'),
+                                        cube.crosstab('Urgency', 'ImpactOnTeam')),
+            'filter_index': lambda: filter_index(employees, EMPLOYEE_FILTERS),
+            'filter_select': lambda: index.select({'Unit': unit, 'CareerStage': stage}),
+            'search_index': lambda: SheetSearchIndex('Employees', None).load(employees),
+            'search_query': lambda: (search.search('کارمند ۱۲'), search.search('مهندس')),
+            'course_matcher': lambda: course_matcher(courses, competencies),
+            'course_suggest_1k': lambda: [matcher.suggest(name) for name in gap_names],
+            'recommend_courses': lambda: recommend_courses(gaps, employees, matcher),
+            'org_rollup': lambda: org_rollup(*rollup_inputs),
+            'org_totals_all_units': lambda: [rollup.totals(code) for code in org_codes],
+            'reporting_chain': lambda: ReportingChain(employees),
+            'team_members_all_managers': lambda: [chain.subordinates(code) for code in managers],
+        }
+        for name, call in calls.items():
+            results.append({'size': size, 'function': name, 'seconds': round(_median_seconds(call, repeats), 4)})
+    return pd.DataFrame(results)
+
+
+def compare_baseline(results, baseline_path=BASELINE_PATH, tolerance=1.5) -> pd.DataFrame:
+    """نسبت هر معیار به خط مبنا؛ regression یعنی کندتر، پرمصرف‌تر یا پارس بیشتر از حد مجاز"""
+    if not os.path.exists(baseline_path):
+        return results.assign(regression=False)
+    baseline = pd.read_csv(baseline_path)
+    merged = results.merge(baseline, on=BASELINE_KEY, how='left', suffixes=('', '_base'))
+    regression = pd.Series(False, index=merged.index)
+    for metric in ['cold_s', 'warm_s', 'peak_mb']:
+        merged[f"{metric}_ratio"] = (merged[metric] / merged[f"{metric}_base"]).round(2)
+        # اختلاف‌های بسیار کوچک (چند ده میلی‌ثانیه یا کمتر از یک مگابایت) نویز اندازه‌گیری است
+        min_delta = 0.05 if metric.endswith('_s') else 1.0
+        regression |= ((merged[f"{metric}_ratio"] > tolerance)
+                       & (merged[metric] - merged[f"{metric}_base"] > min_delta))
+    regression |= merged['parses'] > merged['parses_base']
+    merged['regression'] = regression
+    return merged[BASELINE_KEY + ['cold_s', 'cold_s_ratio', 'warm_s', 'warm_s_ratio', 'peak_mb', 'peak_mb_ratio',
+                                  'parses', 'parses_base', 'regression']]
+
+
+def save_baseline(results, baseline_path=BASELINE_PATH):
+    """به‌روزرسانی ردیف‌های اندازه‌گیری‌شده در فایل خط مبنا (ردیف‌های دیگر حفظ می‌شوند)"""
+    if os.path.exists(baseline_path):
+        baseline = pd.read_csv(baseline_path).set_index(BASELINE_KEY)
+        baseline = pd.concat([baseline.drop(results.set_index(BASELINE_KEY).index, errors='ignore'),
+                              results.set_index(BASELINE_KEY)])
+        results = baseline.reset_index()
+    order = {size: i for i, size in enumerate(ORG_SIZES)}
+    page_order = {page: i for i, page in enumerate(PAGES)}
+    results = results.sort_values(['backend', 'size', 'page'],
+                                  key=lambda column: column.map(order if column.name == 'size' else page_order)
+                                  if column.name != 'backend' else column)
+    results.to_csv(baseline_path, index=False, lineterminator='\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="بنچمارک سیستم مدیریت استعداد")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    storage_parser = subparsers.add_parser('storage', help="زمان ذخیره و بارگذاری موتورهای ذخیره‌سازی")
+    storage_parser.add_argument('--rows', type=int, default=100_000)
+    storage_parser.add_argument('--repeats', type=int, default=5)
+    storage_parser.add_argument('--backend', action='append', choices=list(STORAGE_BACKENDS))
+    storage_parser.add_argument('--journal', action='store_true', help="افزودن و به‌روزرسانی از طریق ژورنال")
+    stress_parser = subparsers.add_parser('stress', help="آزمون همزمانی چند نشست و شمارش نوشتن‌های گم‌شده")
+    stress_parser.add_argument('--sessions', type=int, default=8)
+    stress_parser.add_argument('--operations', type=int, default=40)
+    stress_parser.add_argument('--backend', action='append', choices=list(STORAGE_BACKENDS))
+    stress_parser.add_argument('--journal', action='store_true', help="نوشتن از طریق ژورنال")
+    pages_parser = subparsers.add_parser('pages', help="آماده‌سازی داده صفحه‌ها روی سازمان‌های ساختگی")
+    pages_parser.add_argument('--size', action='append', choices=list(ORG_SIZES))
+    pages_parser.add_argument('--page', action='append', choices=list(PAGES))
+    pages_parser.add_argument('--backend', choices=list(STORAGE_BACKENDS), default='excel')
+    pages_parser.add_argument('--journal', action='store_true')
+    pages_parser.add_argument('--repeats', type=int, default=3)
+    pages_parser.add_argument('--baseline', default=BASELINE_PATH, help="فایل CSV خط مبنا")
+    pages_parser.add_argument('--save-baseline', action='store_true', help="ذخیره نتایج به عنوان خط مبنا")
+    pages_parser.add_argument('--tolerance', type=float, default=1.5, help="نسبت مجاز نسبت به خط مبنا")
+    analytics_parser = subparsers.add_parser('analytics', help="زمان توابع تحلیلی بدون Streamlit")
+    analytics_parser.add_argument('--size', action='append', choices=list(ORG_SIZES))
+    analytics_parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == 'analytics':
+        print(benchmark_analytics(args.size or ['10k', '100k'], args.repeats).to_string(index=False))
+    elif args.command == 'pages':
+        results = benchmark_pages(args.size or ['1k', '10k'], args.backend, args.repeats, args.page,
+                                  journal=args.journal)
+        if args.save_baseline:
+            save_baseline(results, args.baseline)
+            print(results.to_string(index=False))
+            return
+        report = compare_baseline(results, args.baseline, args.tolerance)
+        print(report.to_string(index=False))
+        if report['regression'].any():
+            sys.exit(1)
+    elif args.command == 'storage':
+        print(benchmark_storage(args.rows, args.repeats, args.backend, args.journal).to_string(index=False))
+    elif args.command == 'stress':
+        print(stress_test(args.sessions, args.operations, args.backend, args.journal).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""مکعب تحلیلی (OLAP) شکاف‌ها: واحد × نوع شکاف × فوریت × تأثیر بر تیم × وضعیت
+
+مکعب در یک گذر برداری ساخته می‌شود: هر بعد به کد عددی تبدیل و ترکیب کدها با np.unique به خانه‌های مکعب
+نگاشت می‌شود؛ تعداد، جمع هزینه برآوردی و جمع/تعداد اندازه شکاف هر خانه با np.bincount به دست می‌آید.
+برش‌ها، جدول‌های متقاطع و drill-down از روی همین خانه‌ها (نه ردیف‌های شکاف) محاسبه می‌شوند. مکعب از جدول
+واقعیت شکاف‌ها (GAP_FACTS) و از طریق CompleteTalentSystem.analytics ساخته می‌شود و تا تغییر شیت‌های منبع
+در RESULT_CACHE می‌ماند.
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from talent_analytics import LEVELS
+
+CUBE_DIMENSIONS = ['Unit', 'GapType', 'Urgency', 'ImpactOnTeam', 'Status']
+DIMENSION_TITLES = {
+    'Unit': 'واحد', 'GapType': 'نوع شکاف', 'Urgency': 'فوریت', 'ImpactOnTeam': 'تأثیر بر تیم', 'Status': 'وضعیت',
+}
+# سطح‌های ثابت (ترتیب و خانه‌های خالی ماتریس)؛ مقدار خارج از این سطح‌ها در آن بعد نامعلوم حساب می‌شود
+FIXED_MEMBERS = {'Urgency': LEVELS, 'ImpactOnTeam': LEVELS}
+
+
+class GapCube:
+    """خانه‌های غیرخالی مکعب: کد هر بعد (‎-1 = نامعلوم) و جمع سنجه‌ها"""
+
+    def __init__(self, members: Dict[str, list], cells: pd.DataFrame):
+        self.members = members
+        self.cells = cells
+
+    def _filter(self, where: Optional[dict]) -> pd.DataFrame:
+        cells = self.cells
+        for dimension, value in (where or {}).items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            codes = [self.members[dimension].index(v) for v in values if v in self.members[dimension]]
+            cells = cells[cells[dimension].isin(codes)]
+        return cells
+
+    @staticmethod
+    def _measures(sums: pd.DataFrame) -> pd.DataFrame:
+        result = pd.DataFrame({'count': sums['count'].astype('int64'), 'cost': sums['cost']}, index=sums.index)
+        result['gap_size'] = (sums['size_sum'] / sums['size_count']).where(sums['size_count'] > 0)
+        return result
+
+    def slice(self, by: List[str], where: Optional[dict] = None) -> pd.DataFrame:
+        """سنجه‌ها به تفکیک ابعاد by (خانه‌های نامعلوم آن ابعاد کنار گذاشته می‌شوند)، محدود به where"""
+        cells = self._filter(where)
+        for dimension in by:
+            cells = cells[cells[dimension] >= 0]
+        if not by:
+            return self._measures(cells[['count', 'cost', 'size_sum', 'size_count']].sum().to_frame().T)
+        sums = cells.groupby(by, sort=True)[['count', 'cost', 'size_sum', 'size_count']].sum()
+        result = self._measures(sums)
+        labels = [np.asarray(self.members[dimension], dtype=object)[sums.index.get_level_values(dimension)]
+                  for dimension in by]
+        result.index = (pd.Index(labels[0], name=by[0]) if len(by) == 1
+                        else pd.MultiIndex.from_arrays(labels, names=by))
+        return result
+
+    def total(self, where: Optional[dict] = None) -> dict:
+        """سنجه‌های کل (یا زیرمجموعه where) به صورت dict"""
+        result = self.slice([], where).iloc[0].to_dict()
+        result['count'] = int(result['count'])
+        return result
+
+    def crosstab(self, rows, columns, measure='count', where: Optional[dict] = None) -> pd.DataFrame:
+        """جدول متقاطع دو بعد؛ برای ابعاد با سطح ثابت همه سطح‌ها (با صفر) آورده می‌شوند"""
+        table = self.slice([rows, columns], where)[measure].unstack(columns, fill_value=0)
+        if rows in FIXED_MEMBERS:
+            table = table.reindex(FIXED_MEMBERS[rows], fill_value=0)
+        if columns in FIXED_MEMBERS:
+            table = table.reindex(columns=FIXED_MEMBERS[columns], fill_value=0)
+        return table.fillna(0)
+
+    def members_of(self, dimension, where: Optional[dict] = None) -> list:
+        """مقدارهای موجود یک بعد در زیرمجموعه where (برای گزینه‌های drill-down)"""
+        cells = self._filter(where)
+        codes = np.unique(cells.loc[cells[dimension] >= 0, dimension])
+        return [self.members[dimension][code] for code in codes]
+
+    def drill(self, path: dict) -> Optional[pd.DataFrame]:
+        """یک سطح پایین‌تر از مسیر path (مقدار انتخاب‌شده ابعاد به ترتیب CUBE_DIMENSIONS)"""
+        remaining = [dimension for dimension in CUBE_DIMENSIONS if dimension not in path]
+        if not remaining:
+            return None
+        return self.slice([remaining[0]], where=path)
+
+
+def _codes(series: Optional[pd.Series], dimension, n):
+    """کد عددی و فهرست مقدارهای یک بعد"""
+    if series is None:
+        return np.full(n, -1, dtype=np.int64), list(FIXED_MEMBERS.get(dimension, []))
+    categorical = pd.Categorical(series, categories=FIXED_MEMBERS.get(dimension))
+    return categorical.codes.astype(np.int64), list(categorical.categories)
+
+
+def _numbers(facts, column) -> np.ndarray:
+    if column not in facts.columns:
+        return np.full(len(facts), np.nan)
+    return pd.to_numeric(facts[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+
+def gap_cube(facts) -> GapCube:
+    """ساخت مکعب شکاف‌ها در یک گذر از جدول واقعیت شکاف‌ها (واحد هر شکاف واحد کارمند آن است)"""
+    n = len(facts)
+    members, codes = {}, {}
+    for dimension in CUBE_DIMENSIONS:
+        codes[dimension], members[dimension] = _codes(facts[dimension] if dimension in facts.columns else None,
+                                                      dimension, n)
+    # کد ترکیبی خانه با مبنای مختلط (هر بعد یک رقم؛ ‎-1 به صفر منتقل می‌شود)
+    cell_key = np.zeros(n, dtype=np.int64)
+    for dimension in CUBE_DIMENSIONS:
+        cell_key = cell_key * (len(members[dimension]) + 1) + codes[dimension] + 1
+    keys, first, inverse = np.unique(cell_key, return_index=True, return_inverse=True)
+    size = len(keys)
+    cost = _numbers(facts, 'CostEstimate')
+    gap_size = _numbers(facts, 'GapSize')
+    cells = pd.DataFrame({dimension: codes[dimension][first] for dimension in CUBE_DIMENSIONS})
+    cells['count'] = np.bincount(inverse, minlength=size)
+    cells['cost'] = np.bincount(inverse, weights=np.nan_to_num(cost), minlength=size)
+    cells['size_sum'] = np.bincount(inverse, weights=np.nan_to_num(gap_size), minlength=size)
+    cells['size_count'] = np.bincount(inverse, weights=~np.isnan(gap_size), minlength=size)
+    return GapCube(members, cells)
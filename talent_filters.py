@@ -0,0 +1,78 @@
+"""ایندکس فیلتر فهرست‌ها: برای هر مقدار ستون‌های دسته‌ای، شماره ردیف‌ها به صورت آرایه مرتب
+
+هر ترکیب فیلتر از کوتاه‌ترین فهرست ردیف شروع می‌شود و فیلترهای دیگر فقط روی همان ردیف‌ها با کد عددی
+ستون بررسی می‌شوند؛ گزینه‌های selectbox هم از مقدارهای ایندکس خوانده می‌شوند (بدون unique در هر اجرا).
+ایندکس از طریق CompleteTalentSystem.analytics ساخته می‌شود و تا تغییر شیت‌های منبع در کش می‌ماند.
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+EMPLOYEE_FILTERS = ('Unit', 'CareerStage', 'EducationLevel', 'SuccessionPool')
+GAP_FILTERS = ('GapType', 'Urgency', 'Status')
+PLAN_FILTERS = ('Status', 'PlanType', 'Unit', 'Provider')
+
+ALL = 'همه'
+
+
+class FilterIndex:
+    """فهرست ردیف‌های هر مقدار (posting list) و کد مقدار هر ردیف برای ستون‌های فیلتر یک جدول"""
+
+    def __init__(self, frame: pd.DataFrame, columns):
+        self.frame = frame
+        self.columns = [column for column in columns if column in frame.columns]
+        self._codes: Dict[str, np.ndarray] = {}
+        self._lookup: Dict[str, dict] = {}
+        self._postings: Dict[str, List[np.ndarray]] = {}
+        for column in self.columns:
+            categorical = pd.Categorical(frame[column])
+            codes = categorical.codes.astype(np.int32)
+            counts = np.bincount(codes[codes >= 0], minlength=len(categorical.categories))
+            # مرتب‌سازی پایدار کدها: ردیف‌های هر مقدار پشت سر هم و به ترتیب اصلی (‎-1 ها در ابتدا)
+            order = np.argsort(codes, kind='stable').astype(np.int32)
+            postings = np.split(order[len(codes) - counts.sum():], np.cumsum(counts)[:-1])
+            self._codes[column] = codes
+            self._postings[column] = postings
+            self._lookup[column] = {value: code for code, value in enumerate(categorical.categories)
+                                    if counts[code] > 0}
+
+    def options(self, column) -> list:
+        """مقدارهای موجود یک ستون (برای گزینه‌های فیلتر)"""
+        return list(self._lookup.get(column, {}))
+
+    def count(self, column, value) -> int:
+        code = self._lookup.get(column, {}).get(value)
+        return 0 if code is None else len(self._postings[column][code])
+
+    def rows(self, filters: dict) -> Optional[np.ndarray]:
+        """شماره ردیف‌های منطبق بر همه فیلترها (به ترتیب اصلی)؛ None یعنی بدون فیلتر
+
+        مقدار «همه» و ستون‌هایی که در جدول نیستند نادیده گرفته می‌شوند.
+        """
+        selected = []
+        for column, value in filters.items():
+            if value == ALL or column not in self._lookup:
+                continue
+            code = self._lookup[column].get(value)
+            if code is None:
+                return np.empty(0, dtype=np.int32)
+            selected.append((len(self._postings[column][code]), column, code))
+        if not selected:
+            return None
+        selected.sort(key=lambda item: item[0])
+        _, column, code = selected[0]
+        rows = self._postings[column][code]
+        for _, column, code in selected[1:]:
+            rows = rows[self._codes[column][rows] == code]
+        return rows
+
+    def select(self, filters: dict) -> pd.DataFrame:
+        """ردیف‌های منطبق بر فیلترها از جدول اصلی"""
+        rows = self.rows(filters)
+        return self.frame if rows is None else self.frame.iloc[rows]
+
+
+def filter_index(frame, columns) -> FilterIndex:
+    """ساخت ایندکس فیلتر (تابع ورودی CompleteTalentSystem.analytics)"""
+    return FilterIndex(frame, columns)
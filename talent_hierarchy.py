@@ -0,0 +1,313 @@
+"""ایندکس سلسله‌مراتب سازمانی (Organization.ParentCode) و زنجیره گزارش‌دهی (Employees.ManagerID)
+
+درخت با پیمایش عمق‌اول تکراری (بدون بازگشت، برای درخت‌های عمیق) به بازه‌های Euler-tour تبدیل می‌شود:
+گره‌های زیردرخت هر واحد دقیقاً خانه‌های [tin, tout) ترتیب پیمایش هستند. سنجه‌های هر واحد (سرانه، شکاف‌ها،
+هزینه‌ها، انحراف KPI) یک بار به ترتیب پیمایش چیده و جمع تجمعی می‌شوند؛ مجموع زیردرخت هر گره (واحد،
+معاونت یا کل سازمان) با یک تفریق به دست می‌آید. ParentCode ناموجود یا حلقه در درخت باعث خطا نمی‌شود:
+گره بی‌والد ریشه می‌شود و در orphans، و گره‌های هر حلقه در cycles ثبت می‌شوند (حلقه در یکی از گره‌هایش
+شکسته می‌شود). زنجیره گزارش‌دهی روی همین درخت ساخته می‌شود و زیرمجموعه هر مدیر یک برش ترتیب پیمایش است؛
+team_facts فقط ردیف‌های همان کارکنان را می‌خواند.
+"""
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from talent_analytics import CRITICAL_GAP_SIZE, GAP_FACT_SOURCES, GAP_SOLVED, gap_facts, plan_overview
+
+ORG_COLUMNS = ['Code', 'Title', 'ParentCode', 'Level']
+REPORTING_COLUMNS = ['EmployeeID', 'ManagerID', 'FullName']
+ROLLUP_MEASURES = ['headcount', 'gaps', 'open_gaps', 'critical_gaps', 'gap_cost', 'plan_cost',
+                   'kpi_variance_sum', 'kpi_count']
+ROLLUP_TITLES = {
+    'headcount': 'تعداد کارکنان', 'gaps': 'تعداد شکاف‌ها', 'open_gaps': 'شکاف‌های باز',
+    'critical_gaps': 'شکاف‌های بحرانی', 'gap_cost': 'هزینه برآوردی شکاف‌ها', 'plan_cost': 'هزینه برنامه‌های توسعه',
+    'kpi_variance': 'میانگین انحراف KPI',
+}
+
+
+class Hierarchy:
+    """درخت یک جدول (ستون کلید و ستون والد) با بازه Euler-tour هر گره"""
+
+    key_column = 'Code'
+    parent_column = 'ParentCode'
+    title_column = 'Title'
+    # والدی که در جدول نیست به جای ثبت در orphans یک گره ریشه جدید می‌شود (در external)
+    external_parents = False
+
+    def __init__(self, frame: pd.DataFrame):
+        key, parent_column = self.key_column, self.parent_column
+        if key in frame.columns:
+            frame = frame[frame[key].notna()].drop_duplicates(key)
+            self.codes = frame[key].astype(str).tolist()
+        else:
+            self.codes = []
+        n = len(self.codes)
+        self.titles = (frame[self.title_column].astype(object).where(frame[self.title_column].notna(), '')
+                       .astype(str).tolist() if self.title_column in frame.columns else [''] * n)
+        self.index = {code: node for node, code in enumerate(self.codes)}
+        parents = frame[parent_column].tolist() if parent_column in frame.columns else [None] * n
+        parents = [None if parent is None or pd.isna(parent) else str(parent).strip() for parent in parents]
+        self.external: List[str] = []
+        if self.external_parents:
+            for parent in dict.fromkeys(parents):
+                if parent and parent not in self.index:
+                    self.index[parent] = len(self.codes)
+                    self.codes.append(parent)
+                    self.titles.append('')
+                    self.external.append(parent)
+        self.parent = np.full(len(self.codes), -1, dtype=np.int64)
+        self.orphans: List[str] = []
+        for node, parent in enumerate(parents):
+            if not parent:
+                continue
+            if parent in self.index and self.index[parent] != node:
+                self.parent[node] = self.index[parent]
+            else:
+                self.orphans.append(self.codes[node])
+        self.cycles: List[str] = []
+        self._tour()
+
+    def _tour(self):
+        n = len(self.codes)
+        # فرزندان هر گره به صورت CSR (به ترتیب شیت)
+        order = np.argsort(self.parent, kind='stable')
+        start = np.searchsorted(self.parent[order], np.arange(-1, n + 1))
+        children = order.tolist()
+        bounds = start.tolist()
+        self._children = (children, bounds)
+        self.tin = np.full(n, -1, dtype=np.int64)
+        self.tout = np.full(n, -1, dtype=np.int64)
+        self.depth = np.zeros(n, dtype=np.int64)
+        self.order = np.empty(n, dtype=np.int64)
+        position = 0
+        for root in children[bounds[0]:bounds[1]]:
+            position = self._visit(root, position)
+        # گره‌هایی که از هیچ ریشه‌ای دیده نمی‌شوند در حلقه‌اند یا به حلقه‌ای آویزان‌اند: با دنبال کردن والدها
+        # تا تکرار یک گره، حلقه پیدا و در همان گره تکراری شکسته می‌شود (فقط گره‌های خود حلقه در cycles)
+        for tail in range(n):
+            if self.tin[tail] >= 0:
+                continue
+            walk = {}
+            node = tail
+            while node not in walk:
+                walk[node] = len(walk)
+                node = int(self.parent[node])
+            self.cycles.extend(self.codes[member] for member in list(walk)[walk[node]:])
+            self.parent[node] = -1
+            position = self._visit(node, position)
+        # کد گره‌ها به ترتیب پیمایش: زیردرخت هر گره یک برش پیوسته است
+        self._ordered = np.asarray(self.codes, dtype=object)[self.order]
+
+    def _visit(self, root, position) -> int:
+        """پیمایش عمق‌اول زیردرخت root از خانه position ترتیب پیمایش؛ خانه بعدی را برمی‌گرداند"""
+        children, bounds = self._children
+        stack = [(root, False)]
+        while stack:
+            node, done = stack.pop()
+            if done:
+                self.tout[node] = position
+                continue
+            if self.tin[node] >= 0:
+                continue
+            self.tin[node] = position
+            self.order[position] = node
+            position += 1
+            if self.parent[node] >= 0:
+                self.depth[node] = self.depth[self.parent[node]] + 1
+            stack.append((node, True))
+            kids = children[bounds[node + 1]:bounds[node + 2]]
+            stack.extend((kid, False) for kid in reversed(kids))
+        return position
+
+    @property
+    def roots(self) -> List[str]:
+        return [self.codes[node] for node in self.order if self.parent[node] < 0]
+
+    def children(self, code) -> List[str]:
+        """زیرواحدهای مستقیم یک گره (None: ریشه‌ها)"""
+        if code is None:
+            return self.roots
+        node = self.index.get(code)
+        if node is None:
+            return []
+        children, bounds = self._children
+        return [self.codes[kid] for kid in children[bounds[node + 1]:bounds[node + 2]]
+                if self.parent[kid] == node]
+
+    def path(self, code) -> List[str]:
+        """مسیر از ریشه تا گره"""
+        node = self.index.get(code)
+        path = []
+        while node is not None and node >= 0:
+            path.append(self.codes[node])
+            node = self.parent[node]
+            node = None if node < 0 else int(node)
+        return path[::-1]
+
+    def descendants(self, code) -> List[str]:
+        """کد همه گره‌های زیردرخت (شامل خود گره)"""
+        node = self.index.get(code)
+        if node is None:
+            return []
+        return self._ordered[self.tin[node]:self.tout[node]].tolist()
+
+    def title(self, code) -> str:
+        node = self.index.get(code)
+        return code if node is None or not self.titles[node] else f"{self.titles[node]} ({code})"
+
+
+class OrgHierarchy(Hierarchy):
+    """درخت واحدهای سازمانی (Organization.ParentCode)"""
+
+
+class ReportingChain(Hierarchy):
+    """زنجیره گزارش‌دهی کارکنان (Employees.ManagerID)
+
+    مدیری که خودش در Employees نیست (مثلاً MGR-201) گره ریشه می‌شود تا تیمش قابل انتخاب بماند.
+    زیرمجموعه مستقیم و غیرمستقیم هر مدیر برش [tin+1, tout) ترتیب پیمایش است: یک جست‌وجوی
+    دیکشنری و یک برش آرایه، بدون پیمایش گراف در هر درخواست.
+    """
+
+    key_column = 'EmployeeID'
+    parent_column = 'ManagerID'
+    title_column = 'FullName'
+    external_parents = True
+
+    @property
+    def managers(self) -> List[str]:
+        """کارکنانی که حداقل یک زیرمجموعه دارند، به ترتیب پیمایش درخت"""
+        nodes = self.order[(self.tout - self.tin)[self.order] > 1]
+        return [self.codes[node] for node in nodes]
+
+    def report_count(self, manager, indirect=True) -> int:
+        """تعداد زیرمجموعه‌های یک مدیر"""
+        node = self.index.get(manager)
+        if node is None:
+            return 0
+        return len(self.children(manager)) if not indirect else int(self.tout[node] - self.tin[node] - 1)
+
+    def subordinates(self, manager, indirect=True) -> List[str]:
+        """شناسه زیرمجموعه‌های یک مدیر (indirect=False: فقط گزارش‌دهندگان مستقیم)"""
+        node = self.index.get(manager)
+        if node is None:
+            return []
+        if not indirect:
+            return self.children(manager)
+        return self._ordered[self.tin[node] + 1:self.tout[node]].tolist()
+
+    def reports_to(self, employee, manager) -> bool:
+        """آیا employee مستقیم یا غیرمستقیم زیرمجموعه manager است"""
+        node, top = self.index.get(employee), self.index.get(manager)
+        if node is None or top is None:
+            return False
+        return bool(self.tin[top] < self.tin[node] < self.tout[top])
+
+
+class OrgRollup:
+    """سنجه‌های هر واحد به ترتیب Euler-tour و جمع تجمعی آن‌ها (مجموع زیردرخت با یک تفریق)"""
+
+    def __init__(self, hierarchy: OrgHierarchy, own: pd.DataFrame):
+        self.hierarchy = hierarchy
+        codes = [hierarchy.codes[node] for node in hierarchy.order]
+        values = own.reindex(index=codes, columns=ROLLUP_MEASURES).fillna(0).to_numpy(dtype=float)
+        self._prefix = np.vstack([np.zeros((1, len(ROLLUP_MEASURES))), np.cumsum(values, axis=0)])
+        # مقدارهای واحدهای ناموجود در Organization
+        unknown = own.index.difference(pd.Index(codes))
+        self.unassigned = own.reindex(index=unknown, columns=ROLLUP_MEASURES).fillna(0).sum()
+
+    @staticmethod
+    def _derived(sums: pd.DataFrame) -> pd.DataFrame:
+        result = sums.drop(columns=['kpi_variance_sum', 'kpi_count'])
+        result['kpi_variance'] = (sums['kpi_variance_sum'] / sums['kpi_count']).where(sums['kpi_count'] > 0)
+        for column in ['headcount', 'gaps', 'open_gaps', 'critical_gaps']:
+            result[column] = result[column].astype('int64')
+        return result
+
+    def _sums(self, nodes) -> np.ndarray:
+        nodes = np.asarray(nodes, dtype=np.int64)
+        return self._prefix[self.hierarchy.tout[nodes]] - self._prefix[self.hierarchy.tin[nodes]]
+
+    def totals(self, code=None) -> dict:
+        """سنجه‌های زیردرخت یک گره (None: کل سازمان شامل واحدهای نامعتبر)"""
+        if code is None:
+            sums = self._prefix[-1] + self.unassigned.to_numpy(dtype=float)
+        else:
+            node = self.hierarchy.index.get(code)
+            if node is None:
+                return {}
+            sums = self._sums([node])[0]
+        totals = dict(zip(ROLLUP_MEASURES, sums.tolist()))
+        count = totals.pop('kpi_count')
+        variance = totals.pop('kpi_variance_sum')
+        totals['kpi_variance'] = variance / count if count else np.nan
+        for measure in ['headcount', 'gaps', 'open_gaps', 'critical_gaps']:
+            totals[measure] = int(totals[measure])
+        return totals
+
+    def table(self, codes) -> pd.DataFrame:
+        """سنجه‌های زیردرخت چند گره (سطر به ازای هر کد)"""
+        nodes = [self.hierarchy.index[code] for code in codes if code in self.hierarchy.index]
+        sums = pd.DataFrame(self._sums(nodes).reshape(len(nodes), len(ROLLUP_MEASURES)), columns=ROLLUP_MEASURES,
+                            index=pd.Index([self.hierarchy.codes[node] for node in nodes], name='Code'))
+        result = self._derived(sums)
+        result.insert(0, 'Title', [self.hierarchy.titles[node] for node in nodes])
+        return result
+
+    def drill(self, code=None) -> pd.DataFrame:
+        """سنجه‌های زیرواحدهای مستقیم یک گره (None: ریشه‌ها)"""
+        return self.table(self.hierarchy.children(code))
+
+
+def reporting_chain(employees) -> ReportingChain:
+    """ساخت زنجیره گزارش‌دهی (تابع ورودی CompleteTalentSystem.analytics)"""
+    return ReportingChain(employees)
+
+
+def team_facts(backend, employee_ids) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """جدول واقعیت شکاف‌ها و نمای برنامه‌های توسعه یک مجموعه کارمند (مثلاً زیرمجموعه یک مدیر)
+
+    شرط کارمندان پیش از ادغام و هنگام خواندن اعمال می‌شود: فقط شکاف‌ها و ردیف‌های همین کارکنان و
+    برنامه‌های همان شکاف‌ها از موتور ذخیره‌سازی خوانده می‌شوند (در SQLite با ایندکس EmployeeID/GapID).
+    """
+    sources = dict(GAP_FACT_SOURCES)
+    gaps = backend.load_rows('Gaps', 'EmployeeID', employee_ids, columns=sources['Gaps'])
+    employees = backend.load_rows('Employees', 'EmployeeID', employee_ids, columns=sources['Employees'])
+    plans = backend.load_rows('Development_Plans', 'GapID', gaps['GapID'] if 'GapID' in gaps.columns else [])
+    facts = gap_facts(gaps, employees, plans)
+    return facts, plan_overview(plans, facts)
+
+
+def _sum_by(units, values=None) -> pd.Series:
+    values = pd.Series(1.0, index=units.index) if values is None else values
+    return values.groupby(units.astype(object).to_numpy(), sort=False).sum()
+
+
+def org_rollup(org, facts, employees, kpi, plans) -> OrgRollup:
+    """سنجه‌های هر واحد از جدول واقعیت شکاف‌ها، کارکنان، KPI و برنامه‌ها و تجمیع آن‌ها روی درخت سازمان"""
+    hierarchy = OrgHierarchy(org)
+    own = {}
+    if 'Unit' in employees.columns:
+        own['headcount'] = _sum_by(employees['Unit'])
+        if 'EmployeeID' in employees.columns and {'EmployeeID', 'Variance'} <= set(kpi.columns):
+            units = employees.drop_duplicates('EmployeeID').set_index('EmployeeID')['Unit']
+            kpi_units = pd.Series(units.reindex(kpi['EmployeeID']).to_numpy(), index=kpi.index)
+            variance = pd.to_numeric(kpi['Variance'], errors='coerce')
+            own['kpi_variance_sum'] = _sum_by(kpi_units, variance.fillna(0))
+            own['kpi_count'] = _sum_by(kpi_units, variance.notna().astype(float))
+    if 'Unit' in facts.columns:
+        units = facts['Unit']
+        own['gaps'] = _sum_by(units)
+        if 'Status' in facts.columns:
+            own['open_gaps'] = _sum_by(units, (facts['Status'] != GAP_SOLVED).fillna(True).astype(float))
+        if 'GapSize' in facts.columns:
+            critical = pd.to_numeric(facts['GapSize'], errors='coerce') >= CRITICAL_GAP_SIZE
+            own['critical_gaps'] = _sum_by(units, critical.fillna(False).astype(float))
+        if 'CostEstimate' in facts.columns:
+            own['gap_cost'] = _sum_by(units, pd.to_numeric(facts['CostEstimate'], errors='coerce').fillna(0))
+        if 'GapID' in facts.columns and {'GapID', 'Cost'} <= set(plans.columns):
+            gap_units = pd.Series(units.to_numpy(), index=facts['GapID'].to_numpy())
+            gap_units = gap_units[~gap_units.index.duplicated()]
+            plan_units = pd.Series(gap_units.reindex(plans['GapID']).to_numpy(), index=plans.index)
+            own['plan_cost'] = _sum_by(plan_units, pd.to_numeric(plans['Cost'], errors='coerce').fillna(0))
+    return OrgRollup(hierarchy, pd.DataFrame(own))
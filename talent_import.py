@@ -0,0 +1,309 @@
+"""ورود انبوه کارکنان، شکاف‌ها و برنامه‌های توسعه از فایل CSV یا اکسل (بدون وابستگی به Streamlit)
+
+اجرا:
+    python talent_import.py Employees employees.csv
+    python talent_import.py Gaps gaps.xlsx --dry-run --rejects rejects.csv
+"""
+import argparse
+import time
+from itertools import islice
+from typing import Iterator, List
+
+import numpy as np
+import pandas as pd
+
+from talent_storage import (ID_SEQUENCES, SHEET_KEYS, create_backend, insert_change, iter_xlsx_rows,
+                            load_storage_config, max_id_number)
+
+IMPORT_CHUNK_ROWS = 20_000
+LEVEL_RANGE = (1, 5)
+
+# قواعد هر موجودیت: ستون‌های اجباری، ستون‌های سطح (۱ تا ۵)، ستون‌های عددی و مقادیر پیش‌فرض
+IMPORT_RULES = {
+    'Employees': {
+        'title': 'کارکنان',
+        'required': ['EmployeeID', 'FullName', 'Unit'],
+        'levels': [],
+        'numeric': ['InterviewScore', 'SelfAssessmentScore', 'MotivationScore'],
+        'defaults': {},
+    },
+    'Gaps': {
+        'title': 'شکاف‌ها',
+        'required': ['EmployeeID', 'GapName', 'RequiredLevel', 'CurrentLevel'],
+        'levels': ['RequiredLevel', 'CurrentLevel'],
+        'numeric': ['GapSize', 'CostEstimate'],
+        'defaults': {'Status': 'جدید'},
+    },
+    'Development_Plans': {
+        'title': 'برنامه‌های توسعه',
+        'required': ['GapID', 'PlanName'],
+        'levels': [],
+        'numeric': ['EstimatedHours', 'Cost', 'Progress'],
+        'defaults': {'Progress': 0, 'Status': 'برنامه‌ریزی شده'},
+    },
+}
+
+
+class ImportReport:
+    """نتیجه ورود انبوه: تعداد ردیف‌های پذیرفته‌شده و جدول ردیف‌های ردشده با دلیل"""
+
+    def __init__(self, sheet_name):
+        self.sheet_name = sheet_name
+        self.total = 0
+        self.accepted = 0
+        self.ids: List[str] = []
+        self.ignored_columns: List[str] = []
+        self.rejected = pd.DataFrame(columns=['Row', 'Key', 'Errors'])
+        self.committed = False
+        self.seconds = 0.0
+
+    @property
+    def rejected_count(self) -> int:
+        return len(self.rejected)
+
+    def summary(self) -> str:
+        state = 'ثبت شد' if self.committed else 'ثبت نشد'
+        return (f"{self.sheet_name}: {self.total} ردیف، {self.accepted} پذیرفته، "
+                f"{self.rejected_count} ردشده ({state}) در {self.seconds:.1f} ثانیه")
+
+
+def _source_name(source) -> str:
+    return str(source if isinstance(source, str) else getattr(source, 'name', '')).lower()
+
+
+def read_chunks(source, chunk_rows=IMPORT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """خواندن دسته‌ای فایل CSV یا xlsx؛ همه مقادیر رشته هستند و شماره ردیف‌ها در کل فایل پیوسته است"""
+    name = _source_name(source)
+    if hasattr(source, 'seek'):
+        # فایل بارگذاری‌شده ممکن است قبلاً (مثلاً در اعتبارسنجی آزمایشی) خوانده شده باشد
+        source.seek(0)
+    if name.endswith(('.csv', '.txt')):
+        yield from pd.read_csv(source, dtype=str, chunksize=chunk_rows, encoding='utf-8-sig',
+                               keep_default_na=False, na_values=[''])
+        return
+    if not name.endswith(('.xlsx', '.xlsm')):
+        raise ValueError("فرمت فایل پشتیبانی نمی‌شود (فقط csv و xlsx)")
+    rows = iter_xlsx_rows(source)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [str(column).strip() if column is not None else f"Unnamed: {i}" for i, column in enumerate(header)]
+    width = len(columns)
+    start = 0
+    while True:
+        block = [row[:width] + [None] * (width - len(row)) for row in islice(rows, chunk_rows)]
+        if not block:
+            return
+        yield pd.DataFrame(block, columns=columns, index=pd.RangeIndex(start, start + len(block)))
+        start += len(block)
+
+
+def _clean(chunk) -> pd.DataFrame:
+    """حذف فاصله‌های اضافه، تبدیل رشته تهی به مقدار خالی و کنار گذاشتن ردیف‌های کاملاً خالی"""
+    chunk = chunk.apply(lambda column: column.str.strip()
+                        if pd.api.types.is_object_dtype(column) or pd.api.types.is_string_dtype(column) else column)
+    chunk = chunk.replace('', np.nan)
+    return chunk.dropna(how='all')
+
+
+def _add_error(errors, mask, message) -> pd.Series:
+    mask = np.asarray(mask, dtype=bool)
+    if not mask.any():
+        return errors
+    return errors.where(~mask, errors + message + '؛ ')
+
+
+def _known_values(backend, sheet_name, column) -> set:
+    df = backend.load_sheet(sheet_name, columns=[column])
+    if column not in df.columns:
+        return set()
+    return set(df[column].dropna().astype(str))
+
+
+class BulkImporter:
+    """اعتبارسنجی برداری دسته‌های ورودی یک موجودیت و ثبت ردیف‌های معتبر در یک نوشتن"""
+
+    def __init__(self, backend, sheet_name):
+        if sheet_name not in IMPORT_RULES:
+            raise ValueError(f"ورود انبوه برای شیت {sheet_name} پشتیبانی نمی‌شود")
+        self.backend = backend
+        self.sheet_name = sheet_name
+        self.rules = IMPORT_RULES[sheet_name]
+        self.key_column = SHEET_KEYS[sheet_name]
+        self.sheet_columns = list(backend.load_sheet(sheet_name).columns)
+        self.existing_keys = _known_values(backend, sheet_name, self.key_column)
+        self.seen_keys: set = set()
+        if sheet_name == 'Employees':
+            self.units = (_known_values(backend, 'Organization', 'Code')
+                          | _known_values(backend, 'Employees', 'Unit'))
+            self.managers = (self.existing_keys | _known_values(backend, 'Employees', 'ManagerID')
+                             | _known_values(backend, 'Organization', 'UnitHead'))
+        elif sheet_name == 'Gaps':
+            employees = backend.load_sheet('Employees', columns=['EmployeeID', 'JobCode', 'Unit'])
+            employees = employees.dropna(subset=['EmployeeID']).drop_duplicates('EmployeeID')
+            # شغل و واحد کارمند برای تکمیل ستون‌های خالی شکاف
+            self.employees = employees.set_index(employees['EmployeeID'].astype(str)).reindex(
+                columns=['JobCode', 'Unit'])
+        elif sheet_name == 'Development_Plans':
+            self.gaps = _known_values(backend, 'Gaps', 'GapID')
+
+    def check_columns(self, columns) -> List[str]:
+        """ستون‌های اجباری که در فایل وجود ندارند"""
+        return [column for column in self.rules['required'] if column not in columns]
+
+    def validate(self, chunk) -> pd.Series:
+        """دلایل رد هر ردیف (رشته تهی یعنی ردیف معتبر است)"""
+        errors = pd.Series('', index=chunk.index, dtype=object)
+        for column in self.rules['required']:
+            errors = _add_error(errors, chunk[column].isna(), f"{column} خالی است")
+
+        if self.key_column in chunk.columns:
+            keys = chunk[self.key_column]
+            present = keys.notna()
+            errors = _add_error(errors, present & (keys.duplicated(keep='first') | keys.isin(self.seen_keys)),
+                                f"{self.key_column} در فایل تکراری است")
+            errors = _add_error(errors, present & keys.isin(self.existing_keys),
+                                f"{self.key_column} قبلاً ثبت شده است")
+
+        low, high = LEVEL_RANGE
+        for column in self.rules['levels']:
+            values = pd.to_numeric(chunk[column], errors='coerce')
+            invalid = chunk[column].notna() & ~(values.between(low, high) & (values % 1 == 0))
+            errors = _add_error(errors, invalid, f"{column} باید عدد صحیح {low} تا {high} باشد")
+        for column in self.rules['numeric']:
+            if column in chunk.columns:
+                invalid = chunk[column].notna() & pd.to_numeric(chunk[column], errors='coerce').isna()
+                errors = _add_error(errors, invalid, f"{column} باید عدد باشد")
+
+        if self.sheet_name == 'Employees' and self.units:
+            errors = _add_error(errors, chunk['Unit'].notna() & ~chunk['Unit'].isin(self.units), "واحد ناشناخته")
+        elif self.sheet_name == 'Gaps':
+            errors = _add_error(errors, chunk['EmployeeID'].notna() & ~chunk['EmployeeID'].isin(self.employees.index),
+                                "کارمند ناشناخته")
+        elif self.sheet_name == 'Development_Plans':
+            errors = _add_error(errors, chunk['GapID'].notna() & ~chunk['GapID'].isin(self.gaps), "شکاف ناشناخته")
+        return errors
+
+    def check_managers(self, accepted) -> pd.Series:
+        """بررسی ManagerID پس از خواندن کل فایل تا مدیرانی که در همین فایل آمده‌اند هم شناخته شوند"""
+        errors = pd.Series('', index=accepted.index, dtype=object)
+        if 'ManagerID' not in accepted.columns:
+            return errors
+        managers = self.managers | set(accepted['EmployeeID'])
+        unknown = accepted['ManagerID'].notna() & ~accepted['ManagerID'].isin(managers)
+        return _add_error(errors, unknown, "مدیر ناشناخته")
+
+    def prepare(self, accepted) -> pd.DataFrame:
+        """تکمیل ستون‌های محاسبه‌شده، مقادیر پیش‌فرض و تبدیل ستون‌های عددی"""
+        accepted = accepted.copy()
+        for column in self.rules['levels'] + self.rules['numeric']:
+            if column in accepted.columns:
+                accepted[column] = pd.to_numeric(accepted[column], errors='coerce')
+        if self.sheet_name == 'Gaps':
+            employees = self.employees.reindex(accepted['EmployeeID'])
+            for column in ('JobCode', 'Unit'):
+                derived = pd.Series(employees[column].to_numpy(), index=accepted.index)
+                accepted[column] = accepted[column].fillna(derived) if column in accepted.columns else derived
+            gap_size = accepted['RequiredLevel'] - accepted['CurrentLevel']
+            accepted['GapSize'] = accepted['GapSize'].fillna(gap_size) if 'GapSize' in accepted.columns else gap_size
+        for column, value in self.rules['defaults'].items():
+            accepted[column] = accepted[column].fillna(value) if column in accepted.columns else value
+        return accepted
+
+    def run(self, source, dry_run=False, chunk_rows=IMPORT_CHUNK_ROWS) -> ImportReport:
+        report = ImportReport(self.sheet_name)
+        start = time.perf_counter()
+        accepted_chunks, rejected_chunks = [], []
+        columns_checked = False
+        for chunk in read_chunks(source, chunk_rows):
+            chunk.columns = [str(column).strip() for column in chunk.columns]
+            if not columns_checked:
+                missing = self.check_columns(chunk.columns)
+                if missing:
+                    raise ValueError(f"ستون‌های اجباری در فایل وجود ندارند: {', '.join(missing)}")
+                if self.sheet_columns:
+                    report.ignored_columns = [column for column in chunk.columns if column not in self.sheet_columns]
+                columns_checked = True
+            if report.ignored_columns:
+                chunk = chunk.drop(columns=report.ignored_columns)
+            chunk = _clean(chunk)
+            report.total += len(chunk)
+            errors = self.validate(chunk)
+            valid = (errors == '').to_numpy()
+            if self.key_column in chunk.columns:
+                self.seen_keys.update(chunk[self.key_column].dropna())
+            accepted_chunks.append(chunk[valid])
+            if not valid.all():
+                rejected_chunks.append(self._rejects(chunk[~valid], errors[~valid]))
+
+        accepted = pd.concat(accepted_chunks) if accepted_chunks else pd.DataFrame()
+        if self.sheet_name == 'Employees' and len(accepted):
+            errors = self.check_managers(accepted)
+            valid = (errors == '').to_numpy()
+            if not valid.all():
+                rejected_chunks.append(self._rejects(accepted[~valid], errors[~valid]))
+                accepted = accepted[valid]
+        if rejected_chunks:
+            report.rejected = pd.concat(rejected_chunks).sort_values('Row', ignore_index=True)
+        report.accepted = len(accepted)
+
+        if len(accepted) and not dry_run:
+            accepted = self.prepare(accepted)
+            if self.sheet_name in ID_SEQUENCES:
+                missing_ids = accepted[self.key_column].isna() if self.key_column in accepted.columns \
+                    else pd.Series(True, index=accepted.index)
+                # شناسه‌های آمده در فایل ممکن است از شمارنده جلوتر باشند: شمارنده پیش از تخصیص از آن‌ها عبور می‌کند
+                # تا ردیف‌های بدون شناسه شناسه‌ای از همین فایل نگیرند
+                prefix = ID_SEQUENCES[self.sheet_name][0]
+                floor = max_id_number(accepted[~missing_ids], self.key_column, prefix)
+                if missing_ids.any() or floor:
+                    # یک بلوک شناسه پشت سر هم برای همه ردیف‌های بدون شناسه
+                    ids = self.backend.allocate_ids(self.sheet_name, int(missing_ids.sum()), floor=floor)
+                    accepted.loc[missing_ids, self.key_column] = ids
+            report.ids = accepted[self.key_column].tolist()
+            rows = accepted.astype(object).where(accepted.notna(), None).to_dict('records')
+            self.backend.apply([insert_change(self.sheet_name, rows)])
+            report.committed = True
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def _rejects(self, rows, errors) -> pd.DataFrame:
+        # ردیف ۱ فایل عنوان ستون‌هاست
+        key = rows[self.key_column] if self.key_column in rows.columns else pd.Series(None, index=rows.index)
+        return pd.DataFrame({'Row': rows.index + 2, 'Key': key.to_numpy(),
+                             'Errors': errors.str.rstrip('؛ ').to_numpy()})
+
+
+def import_file(backend, sheet_name, source, dry_run=False, chunk_rows=IMPORT_CHUNK_ROWS) -> ImportReport:
+    """ورود انبوه یک فایل CSV/xlsx به شیت داده‌شده؛ ردیف‌های معتبر در یک نوشتن ثبت می‌شوند
+
+    با dry_run=True فقط اعتبارسنجی انجام و گزارش برگردانده می‌شود.
+    """
+    return BulkImporter(backend, sheet_name).run(source, dry_run=dry_run, chunk_rows=chunk_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ورود انبوه داده به سیستم مدیریت استعداد")
+    parser.add_argument('sheet', choices=list(IMPORT_RULES))
+    parser.add_argument('file', help="فایل CSV یا xlsx")
+    parser.add_argument('--dry-run', action='store_true', help="فقط اعتبارسنجی بدون ثبت")
+    parser.add_argument('--rejects', help="ذخیره ردیف‌های ردشده در این فایل CSV")
+    parser.add_argument('--chunk-rows', type=int, default=IMPORT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    backend = create_backend(load_storage_config())
+    report = import_file(backend, args.sheet, args.file, dry_run=args.dry_run, chunk_rows=args.chunk_rows)
+    if hasattr(backend, 'compact'):
+        # ثبت تغییرات باقی‌مانده ژورنال پیش از پایان پروسه
+        backend.compact()
+    print(report.summary())
+    if report.ignored_columns:
+        print(f"ستون‌های نادیده گرفته‌شده: {', '.join(report.ignored_columns)}")
+    if args.rejects and report.rejected_count:
+        report.rejected.to_csv(args.rejects, index=False, encoding='utf-8-sig')
+    elif report.rejected_count:
+        print(report.rejected.head(20).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,9 +3,28 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
+import io
 import os
 import numpy as np
 from typing import Dict, List
+from talent_storage import (Transaction, VersionConflict, create_backend, insert_change, load_storage_config,
+                            update_change, write_csv, write_workbook)
+from talent_import import IMPORT_RULES, import_file
+from talent_schema import empty_sheets
+from talent_analytics import (GAP_FACTS, GAP_SOLVED, RESULT_CACHE, career_stage_motivation,
+                              completed_plan_roi, cost_effectiveness, critical_gap_summary, critical_gaps,
+                              distribution, effectiveness_summary, group_total, monthly_costs,
+                              page_rows, plan_overview, plan_totals, planned_cost_forecast, roi_scores)
+from talent_aggregates import aggregate_store, dashboard_metrics
+from talent_search import search_store
+from talent_matching import COMPETENCY_COLUMNS, COURSE_COLUMNS, course_matcher
+from talent_recommend import (INPUT_COLUMNS as RECOMMENDATION_INPUTS, RECOMMENDATION_COLUMNS, RECOMMENDATION_SHEET,
+                              TOP_K, recommend_courses, recommendation_index)
+from talent_cube import CUBE_DIMENSIONS, DIMENSION_TITLES, gap_cube
+from talent_filters import ALL, EMPLOYEE_FILTERS, GAP_FILTERS, PLAN_FILTERS, FilterIndex, filter_index
+from talent_hierarchy import (ORG_COLUMNS, REPORTING_COLUMNS, ROLLUP_TITLES, org_rollup, reporting_chain,
+                              team_facts)
+from talent_synth import ORG_SIZES, generate_org, seed_backend
 
 # تنظیمات صفحه
 st.set_page_config(
@@ -19,108 +38,198 @@ st.set_page_config(
 st.markdown("<h1 style='text-align: center; color: #1f4e78;'>👥 سیستم کامل مدیریت استعداد و توسعه کارکنان</h1>", 
             unsafe_allow_html=True)
 
-# فایل ذخیره سازی داده‌ها
-DATA_FILE = "complete_talent_data.xlsx"
+# تنظیمات موتور ذخیره‌سازی داده‌ها (excel یا sqlite)
+STORAGE_CONFIG = load_storage_config()
 
 class CompleteTalentSystem:
-    def __init__(self):
+    def __init__(self, storage_config=None):
+        self.storage = create_backend(storage_config or STORAGE_CONFIG)
         self.init_data()
     
     def init_data(self):
         """ایجاد ساختار اولیه داده‌ها با تمام جداول"""
-        if not os.path.exists(DATA_FILE):
-            # ۱. کارکنان
-            employees_df = pd.DataFrame(columns=[
-                'EmployeeID', 'FullName', 'Gender', 'BirthDate', 'HireDate',
-                'JobCode', 'JobTitle', 'Unit', 'ManagerID', 'EducationLevel',
-                'Major', 'Specialization', 'PersonalityType', 'InterviewScore',
-                'SelfAssessmentScore', 'CareerStage', 'CareerStrategy', 
-                'RoleResponsibilities', 'KPITargets', 'LearningPreferences',
-                'MotivationScore', 'SuccessionPool'
-            ])
-            
-            # ۲. ساختار سازمانی
-            org_df = pd.DataFrame(columns=[
-                'Level', 'Code', 'Title', 'ParentCode', 'ResponsibilityLevel',
-                'UnitHead', 'NumberOfEmployees', 'DepartmentKPIs'
-            ])
-            
-            # ۳. شایستگی‌ها
-            competencies_df = pd.DataFrame(columns=[
-                'JobCode', 'CompetencyCategory', 'CompetencyName', 
-                'BehavioralIndicators', 'RequiredLevel', 'AssessmentMethod',
-                'LinkedCourses', 'Priority'
-            ])
-            
-            # ۴. شکاف‌ها
-            gaps_df = pd.DataFrame(columns=[
-                'GapID', 'EmployeeID', 'JobCode', 'Unit', 'GapType', 
-                'GapName', 'Description', 'RequiredLevel', 'CurrentLevel',
-                'GapSize', 'Urgency', 'ImpactOnTeam', 'ImpactOnOrg',
-                'CostEstimate', 'RootCause', 'Dependencies', 'Owner',
-                'SuccessMetric', 'Status'
-            ])
-            
-            # ۵. برنامه‌های توسعه
-            development_df = pd.DataFrame(columns=[
-                'PlanID', 'GapID', 'PlanName', 'PlanType', 'Provider',
-                'StartDate', 'EndDate', 'EstimatedHours', 'Cost', 'Owner',
-                'TargetOutcome', 'EvaluationMethod', 'Progress', 'Status'
-            ])
-            
-            # ۶. دوره‌های آموزشی
-            courses_df = pd.DataFrame(columns=[
-                'CourseID', 'CourseName', 'CourseType', 'Provider', 
-                'DurationHours', 'Cost', 'LinkedCompetency', 'DeliveryType',
-                'LevelExpectation', 'LevelAchieved'
-            ])
-            
-            # ۷. سوابق آموزشی
-            training_df = pd.DataFrame(columns=[
-                'RecordID', 'EmployeeID', 'CourseID', 'AttendanceDate',
-                'PreTestScore', 'PostTestScore', 'Improvement', 'Status'
-            ])
-            
-            # ۸. شاخص‌های عملکرد
-            kpi_df = pd.DataFrame(columns=[
-                'KPIID', 'EmployeeID', 'KPIName', 'Date', 'Value', 
-                'Target', 'Variance', 'Status', 'LinkedCompetency',
-                'LinkedGapID', 'UnitLevelAggregation'
-            ])
-            
-            # ذخیره در فایل اکسل
-            with pd.ExcelWriter(DATA_FILE, engine='openpyxl') as writer:
-                employees_df.to_excel(writer, sheet_name='Employees', index=False)
-                org_df.to_excel(writer, sheet_name='Organization', index=False)
-                competencies_df.to_excel(writer, sheet_name='Competencies', index=False)
-                gaps_df.to_excel(writer, sheet_name='Gaps', index=False)
-                development_df.to_excel(writer, sheet_name='Development_Plans', index=False)
-                courses_df.to_excel(writer, sheet_name='Training_Courses', index=False)
-                training_df.to_excel(writer, sheet_name='Training_Records', index=False)
-                kpi_df.to_excel(writer, sheet_name='KPI', index=False)
-    
-    def load_sheet(self, sheet_name):
-        """بارگذاری یک شیت از فایل اکسل"""
+        if not self.storage.exists():
+            # ایجاد جداول با ستون‌ها و نوع‌های ثبت‌شده در talent_schema
+            self.storage.initialize(empty_sheets())
+    
+    def load_sheet(self, sheet_name, columns=None, copy=False):
+        """بارگذاری یک شیت از موتور ذخیره‌سازی (columns: فقط ستون‌های لازم؛ برای تغییر داده copy=True)"""
         try:
-            return pd.read_excel(DATA_FILE, sheet_name=sheet_name)
+            return self.storage.load_sheet(sheet_name, columns=columns, copy=copy)
         except Exception as e:
             st.error(f"خطا در بارگذاری شیت {sheet_name}: {e}")
             return pd.DataFrame()
     
+    def load_rows(self, sheet_name, column, values, columns=None):
+        """بارگذاری فقط ردیف‌هایی از یک شیت که مقدار column آن‌ها در values است"""
+        try:
+            return self.storage.load_rows(sheet_name, column, values, columns=columns)
+        except Exception as e:
+            st.error(f"خطا در بارگذاری شیت {sheet_name}: {e}")
+            return pd.DataFrame()
+    
+    @property
+    def aggregates(self):
+        """تجمیع‌های افزایشی داشبورد برای موتور ذخیره‌سازی فعلی (مشترک در کل پروسه)"""
+        return aggregate_store(self.storage)
+    
+    @property
+    def search_index(self):
+        """ایندکس جستجوی متنی کارکنان، شکاف‌ها و برنامه‌ها (مشترک در کل پروسه)"""
+        return search_store(self.storage)
+    
+    def _write(self, changes, write):
+        """اجرای write همراه با به‌روزرسانی افزایشی تجمیع‌ها و ایندکس جستجو با همان تغییرات"""
+        return self.aggregates.write(changes, lambda: self.search_index.write(changes, write))
+    
+    def _replace(self, frames, write):
+        """اجرای write (جایگزینی کامل شیت‌ها) و بازسازی تجمیع‌ها و ایندکس جستجو از همان داده‌ها"""
+        return self.aggregates.replace(frames, lambda: self.search_index.replace(frames, write))
+    
+    def search(self, sheet_name, query, limit=20):
+        """(کلید، امتیاز) ردیف‌های منطبق بر query و تعداد کل نتیجه‌ها"""
+        try:
+            return self.search_index.search(sheet_name, query, limit)
+        except Exception as e:
+            st.error(f"خطا در جستجو: {e}")
+            return [], 0
+    
+    def analytics(self, func, sheets, *args):
+        """نتیجه یک تابع talent_analytics روی شیت‌ها؛ تا وقتی نسخه شیت‌ها تغییر نکرده از کش برمی‌گردد
+        
+        sheets: فهرست ورودی‌ها به ترتیب آرگومان‌های تابع؛ هر ورودی (نام شیت، ستون‌ها) یا یک جدول مشتق
+        (تابع، ورودی‌ها) مانند GAP_FACTS است که خودش از همین کش ساخته می‌شود. args آرگومان‌های بعدی (hashable)
+        """
+        def compute():
+            return func(*[self._analytics_input(source) for source in sheets], *args)
+        
+        try:
+            versions = self._input_versions(sheets)
+        except Exception:
+            versions = None
+        if versions is None:
+            return compute()
+        key = (id(self.storage), func.__name__, self._input_key(sheets), versions, args)
+        return RESULT_CACHE.get_or_compute(key, compute)
+    
+    def _analytics_input(self, source):
+        name, spec = source
+        if callable(name):
+            return self.analytics(name, spec)
+        return self.load_sheet(name, columns=spec)
+    
+    def _input_versions(self, sheets):
+        """نسخه شیت‌های ورودی (برای جدول مشتق، نسخه شیت‌های منبع آن)؛ None اگر نسخه یکی معلوم نباشد"""
+        versions = []
+        for name, spec in sheets:
+            version = self._input_versions(spec) if callable(name) else self.storage.sheet_version(name)
+            if version is None:
+                return None
+            versions.append(version)
+        return tuple(versions)
+    
+    def _input_key(self, sheets):
+        return tuple((name.__name__, self._input_key(spec)) if callable(name)
+                     else (name, tuple(spec) if spec else None) for name, spec in sheets)
+    
+    def course_matcher(self):
+        """ایندکس تطبیق شایستگی و دوره (تا تغییر دوره‌ها یا شایستگی‌ها در کش)"""
+        return self.analytics(course_matcher, [('Training_Courses', COURSE_COLUMNS),
+                                               ('Competencies', COMPETENCY_COLUMNS)])
+    
+    def course_recommendations(self):
+        """ایندکس توصیه‌های ذخیره‌شده دوره بر اساس GapID؛ None اگر کار دسته‌ای هنوز اجرا نشده باشد"""
+        try:
+            version = self.storage.sheet_version(RECOMMENDATION_SHEET)
+            key = (id(self.storage), recommendation_index.__name__, version)
+            return RESULT_CACHE.get_or_compute(key, lambda: recommendation_index(
+                self.storage.load_sheet(RECOMMENDATION_SHEET, columns=RECOMMENDATION_COLUMNS)))
+        except ValueError:
+            # شیت توصیه‌ها در داده‌های ساخته‌شده پیش از این نسخه وجود ندارد
+            return None
+    
+    def reporting_chain(self):
+        """زنجیره گزارش‌دهی کارکنان (تا تغییر شیت کارکنان در کش)"""
+        return self.analytics(reporting_chain, [('Employees', REPORTING_COLUMNS)])
+    
+    def team_scope(self, manager, indirect=True):
+        """ایندکس فیلتر شکاف‌ها و برنامه‌های زیرمجموعه یک مدیر؛ فقط ردیف‌های همان کارکنان خوانده می‌شود"""
+        def compute():
+            facts, plans = team_facts(self.storage, self.reporting_chain().subordinates(manager, indirect))
+            return FilterIndex(facts, GAP_FILTERS), FilterIndex(plans, PLAN_FILTERS)
+        
+        try:
+            versions = tuple(self.storage.sheet_version(name) for name in ('Employees', 'Gaps', 'Development_Plans'))
+            if None in versions:
+                return compute()
+            key = (id(self.storage), team_facts.__name__, manager, indirect, versions)
+            return RESULT_CACHE.get_or_compute(key, compute)
+        except Exception as e:
+            st.error(f"خطا در بارگذاری داده‌های زیرمجموعه: {e}")
+            return None
+    
+    def refresh_recommendations(self, top_k=TOP_K):
+        """محاسبه دسته‌ای k دوره برتر همه شکاف‌های باز و ذخیره در شیت توصیه‌ها"""
+        try:
+            gaps = self.storage.load_sheet('Gaps', columns=RECOMMENDATION_INPUTS['Gaps'])
+            employees = self.storage.load_sheet('Employees', columns=RECOMMENDATION_INPUTS['Employees'])
+            recommendations = recommend_courses(gaps, employees, self.course_matcher(), top_k=top_k)
+        except Exception as e:
+            st.error(f"خطا در محاسبه توصیه‌های دوره: {e}")
+            return None
+        return recommendations if self.save_sheet(recommendations, RECOMMENDATION_SHEET) else None
+    
     def save_sheet(self, df, sheet_name):
-        """ذخیره یک شیت در فایل اکسل"""
+        """ذخیره کامل یک شیت"""
         try:
-            existing_data = {}
-            try:
-                existing_data = pd.read_excel(DATA_FILE, sheet_name=None)
-            except:
-                pass
-                
-            existing_data[sheet_name] = df
-            with pd.ExcelWriter(DATA_FILE, engine='openpyxl') as writer:
-                for sheet, data in existing_data.items():
-                    data.to_excel(writer, sheet_name=sheet, index=False)
+            self._replace({sheet_name: df}, lambda: self.storage.save_sheet(df, sheet_name))
+            return True
+        except Exception as e:
+            st.error(f"خطا در ذخیره‌سازی: {e}")
+            return False
+    
+    def append_rows(self, sheet_name, rows):
+        """افزودن ردیف‌های جدید به یک شیت (در SQLite یک INSERT ساده)"""
+        try:
+            self._write([insert_change(sheet_name, rows)], lambda: self.storage.append_rows(sheet_name, rows))
+            return True
+        except Exception as e:
+            st.error(f"خطا در ذخیره‌سازی: {e}")
+            return False
+    
+    def update_rows(self, sheet_name, key_column, key, values, expected=None):
+        """به‌روزرسانی ستون‌های یک ردیف با کلید داده‌شده (بدون بازنویسی کل شیت)
+        
+        expected: مقادیری که کاربر هنگام باز کردن فرم دیده است؛ اگر کاربر دیگری در این فاصله
+        همان ردیف را تغییر داده باشد، تغییرات ذخیره نمی‌شود و هشدار نمایش داده می‌شود.
+        """
+        try:
+            self._write([update_change(sheet_name, key_column, key, values)],
+                        lambda: self.storage.update_rows(sheet_name, key_column, key, values, expected=expected))
+            return True
+        except VersionConflict as e:
+            st.warning(f"⚠️ {e}. لطفاً صفحه را دوباره بارگذاری و تغییرات را مجدداً اعمال کنید.")
+            return False
+        except Exception as e:
+            st.error(f"خطا در ذخیره‌سازی: {e}")
+            return False
+    
+    def allocate_id(self, sheet_name):
+        """شناسه جدید و یکتا برای Gaps، Development_Plans یا Training_Records (بدون بارگذاری شیت)"""
+        try:
+            return self.storage.allocate_ids(sheet_name)[0]
+        except Exception as e:
+            st.error(f"خطا در تخصیص شناسه: {e}")
+            return None
+    
+    def commit(self, transaction):
+        """ثبت همه تغییرات یک تراکنش (در چند شیت) با هم و در یک نوشتن"""
+        try:
+            self._write(transaction.changes, lambda: self.storage.commit(transaction))
             return True
+        except VersionConflict as e:
+            st.warning(f"⚠️ {e}. لطفاً صفحه را دوباره بارگذاری و تغییرات را مجدداً اعمال کنید.")
+            return False
         except Exception as e:
             st.error(f"خطا در ذخیره‌سازی: {e}")
             return False
@@ -229,7 +338,7 @@ class CompleteTalentSystem:
         # ۴. شکاف‌ها
         gaps_data = [
             {
-                'GapID': 'GAP-001', 'EmployeeID': 'EMP-002', 'JobCode': 'J-DEV-JR',
+                'GapID': 'GAP-000001', 'EmployeeID': 'EMP-002', 'JobCode': 'J-DEV-JR',
                 'Unit': 'UNIT01', 'GapType': 'مهارتی', 'GapName': 'طراحی معماری',
                 'Description': 'در طراحی معماری ماژول‌های مستقل مشکل دارد',
                 'RequiredLevel': 3, 'CurrentLevel': 1, 'GapSize': 2,
@@ -239,7 +348,7 @@ class CompleteTalentSystem:
                 'SuccessMetric': 'نمره آزمون عملی به ۴ برسد', 'Status': 'جدید'
             },
             {
-                'GapID': 'GAP-002', 'EmployeeID': 'EMP-001', 'JobCode': 'J-DEV-SR',
+                'GapID': 'GAP-000002', 'EmployeeID': 'EMP-001', 'JobCode': 'J-DEV-SR',
                 'Unit': 'UNIT01', 'GapType': 'رفتاری', 'GapName': 'ارائه مؤثر',
                 'Description': 'در ارائه یافته‌ها به مدیریت ضعف دارد',
                 'RequiredLevel': 4, 'CurrentLevel': 2, 'GapSize': 2,
@@ -249,7 +358,7 @@ class CompleteTalentSystem:
                 'SuccessMetric': 'ارائه موفق به مدیریت ارشد', 'Status': 'در دست اقدام'
             },
             {
-                'GapID': 'GAP-003', 'EmployeeID': 'EMP-003', 'JobCode': 'J-NET-AD',
+                'GapID': 'GAP-000003', 'EmployeeID': 'EMP-003', 'JobCode': 'J-NET-AD',
                 'Unit': 'UNIT02', 'GapType': 'مهارتی', 'GapName': 'امنیت شبکه',
                 'Description': 'آشنایی کمی با پروتکل‌های امنیتی جدید دارد',
                 'RequiredLevel': 4, 'CurrentLevel': 2, 'GapSize': 2,
@@ -263,21 +372,21 @@ class CompleteTalentSystem:
         # ۵. برنامه‌های توسعه
         development_data = [
             {
-                'PlanID': 'PLAN-001', 'GapID': 'GAP-001', 'PlanName': 'دوره آموزشی معماری نرم‌افزار',
+                'PlanID': 'PLAN-000001', 'GapID': 'GAP-000001', 'PlanName': 'دوره آموزشی معماری نرم‌افزار',
                 'PlanType': 'آموزش', 'Provider': 'آکادمی داخلی', 'StartDate': '2024-08-01',
                 'EndDate': '2024-08-15', 'EstimatedHours': 16, 'Cost': 2000000,
                 'Owner': 'EMP-002', 'TargetOutcome': 'توانایی طراحی ماژول مستقل',
                 'EvaluationMethod': 'ارزیابی عملی توسط لید تیم', 'Progress': 0, 'Status': 'برنامه‌ریزی شده'
             },
             {
-                'PlanID': 'PLAN-002', 'GapID': 'GAP-002', 'PlanName': 'کارگاه مهارت‌های ارائه',
+                'PlanID': 'PLAN-000002', 'GapID': 'GAP-000002', 'PlanName': 'کارگاه مهارت‌های ارائه',
                 'PlanType': 'آموزش', 'Provider': 'مؤسسه بیرونی', 'StartDate': '2024-07-10',
                 'EndDate': '2024-07-11', 'EstimatedHours': 8, 'Cost': 1500000,
                 'Owner': 'EMP-001', 'TargetOutcome': 'ارائه مؤثر به مدیریت',
                 'EvaluationMethod': 'ارائه آزمایشی', 'Progress': 25, 'Status': 'در جریان'
             },
             {
-                'PlanID': 'PLAN-003', 'GapID': 'GAP-003', 'PlanName': 'دوره تخصصی امنیت شبکه',
+                'PlanID': 'PLAN-000003', 'GapID': 'GAP-000003', 'PlanName': 'دوره تخصصی امنیت شبکه',
                 'PlanType': 'آموزش', 'Provider': 'شرکت سیسکو', 'StartDate': '2024-09-01',
                 'EndDate': '2024-09-30', 'EstimatedHours': 40, 'Cost': 5000000,
                 'Owner': 'EMP-003', 'TargetOutcome': 'دریافت گواهینامه CCNA Security',
@@ -319,90 +428,172 @@ class CompleteTalentSystem:
                 'KPIID': 'KPI-001', 'EmployeeID': 'EMP-001', 'KPIName': 'تعداد باگ در تولید',
                 'Date': '2024-06-01', 'Value': 1, 'Target': 2, 'Variance': -1,
                 'Status': 'سبز', 'LinkedCompetency': 'برنامه‌نویسی پیشرفته پایتون',
-                'LinkedGapID': 'GAP-002', 'UnitLevelAggregation': '۹۸%'
+                'LinkedGapID': 'GAP-000002', 'UnitLevelAggregation': '۹۸%'
             },
             {
                 'KPIID': 'KPI-002', 'EmployeeID': 'EMP-001', 'KPIName': 'تحویل به موقع وظایف',
                 'Date': '2024-06-01', 'Value': 95, 'Target': 100, 'Variance': -5,
                 'Status': 'زرد', 'LinkedCompetency': 'رهبری فنی',
-                'LinkedGapID': 'GAP-002', 'UnitLevelAggregation': '۹۵%'
+                'LinkedGapID': 'GAP-000002', 'UnitLevelAggregation': '۹۵%'
             },
             {
                 'KPIID': 'KPI-003', 'EmployeeID': 'EMP-002', 'KPIName': 'یادگیری فناوری جدید',
                 'Date': '2024-06-01', 'Value': 2, 'Target': 3, 'Variance': -1,
                 'Status': 'زرد', 'LinkedCompetency': 'برنامه‌نویسی مقدماتی پایتون',
-                'LinkedGapID': 'GAP-001', 'UnitLevelAggregation': '۶۷%'
+                'LinkedGapID': 'GAP-000001', 'UnitLevelAggregation': '۶۷%'
             },
             {
                 'KPIID': 'KPI-004', 'EmployeeID': 'EMP-003', 'KPIName': ' uptime شبکه',
                 'Date': '2024-06-01', 'Value': 99.8, 'Target': 99.5, 'Variance': 0.3,
                 'Status': 'سبز', 'LinkedCompetency': 'مدیریت شبکه‌های پیشرفته',
-                'LinkedGapID': 'GAP-003', 'UnitLevelAggregation': '۹۹.۸%'
+                'LinkedGapID': 'GAP-000003', 'UnitLevelAggregation': '۹۹.۸%'
             }
         ]
         
-        # ذخیره تمام داده‌ها
-        self.save_sheet(pd.DataFrame(org_data), 'Organization')
-        self.save_sheet(pd.DataFrame(employees_data), 'Employees')
-        self.save_sheet(pd.DataFrame(competencies_data), 'Competencies')
-        self.save_sheet(pd.DataFrame(gaps_data), 'Gaps')
-        self.save_sheet(pd.DataFrame(development_data), 'Development_Plans')
-        self.save_sheet(pd.DataFrame(courses_data), 'Training_Courses')
-        self.save_sheet(pd.DataFrame(kpi_data), 'KPI')
+        # ذخیره تمام داده‌ها در یک نوشتن و هم‌سطح کردن شمارنده شناسه‌ها
+        sheets = {
+            'Organization': pd.DataFrame(org_data),
+            'Employees': pd.DataFrame(employees_data),
+            'Competencies': pd.DataFrame(competencies_data),
+            'Gaps': pd.DataFrame(gaps_data),
+            'Development_Plans': pd.DataFrame(development_data),
+            'Training_Courses': pd.DataFrame(courses_data),
+            'KPI': pd.DataFrame(kpi_data),
+            RECOMMENDATION_SHEET: empty_sheets()[RECOMMENDATION_SHEET],
+        }
+        try:
+            self._replace(sheets, lambda: self.storage.save_sheets(sheets))
+            self.storage.sync_sequences(list(sheets), frames=sheets)
+        except Exception as e:
+            st.error(f"خطا در ذخیره داده‌های نمونه: {e}")
+            return
         
         st.success("✅ داده‌های نمونه کامل با موفقیت ایجاد شدند!")
+    
+    def generate_synthetic_org(self, employees, seed=0):
+        """ایجاد سازمان ساختگی بزرگ (همه شیت‌ها) برای آزمون مقیاس"""
+        try:
+            sheets = generate_org(employees, seed=seed)
+            # توصیه‌های دوره قبلی به شکاف‌های داده جایگزین‌شده تعلق دارند
+            sheets[RECOMMENDATION_SHEET] = empty_sheets()[RECOMMENDATION_SHEET]
+            seed_backend(self.storage, sheets)
+        except Exception as e:
+            st.error(f"خطا در ایجاد سازمان ساختگی: {e}")
+            return False
+        st.success(f"✅ سازمان ساختگی با {employees:,} کارمند و {len(sheets['Gaps']):,} شکاف ایجاد شد")
+        return True
 
 # ایجاد نمونه از سیستم
 tms = CompleteTalentSystem()
 
+def format_date(value):
+    """نمایش تاریخ به صورت YYYY-MM-DD (ستون‌های تاریخ پس از بارگذاری Timestamp هستند)"""
+    if pd.isna(value):
+        return ''
+    return value.strftime('%Y-%m-%d') if hasattr(value, 'strftime') else str(value)
+
+def format_rial(value):
+    """نمایش مبلغ به ریال بدون اعشار (ستون‌های هزینه float64 هستند)؛ مقدار خالی «-»"""
+    number = pd.to_numeric(value, errors='coerce')
+    return f"{number:,.0f} ریال" if pd.notna(number) else '-'
+
+PAGE_SIZES = [25, 50, 100, 500]
+
+def select_team(key):
+    """انتخاب مدیر برای محدود کردن فهرست به زیرمجموعه او
+    
+    خروجی: ایندکس فیلتر شکاف‌ها و برنامه‌های زیرمجموعه (tms.team_scope) یا None برای کل سازمان
+    """
+    chain = tms.reporting_chain()
+    managers = chain.managers
+    if not managers:
+        return None
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        manager = st.selectbox("مدیر", [ALL] + managers, key=f"{key}_manager",
+                               format_func=lambda code: code if code == ALL else
+                               f"{chain.title(code)} - {chain.report_count(code):,} نفر")
+    with col2:
+        indirect = st.checkbox("زیرمجموعه غیرمستقیم", value=True, key=f"{key}_indirect")
+    if chain.cycles:
+        st.warning(f"⚠️ حلقه در زنجیره گزارش‌دهی (ManagerID): {', '.join(chain.cycles[:5])}")
+    if manager == ALL:
+        return None
+    return tms.team_scope(manager, indirect)
+
+def show_paged_table(df, key, columns=None):
+    """جدول صفحه‌بندی‌شده: مرتب‌سازی و برش روی سرور انجام و فقط ردیف‌های صفحه جاری به مرورگر فرستاده می‌شود
+    
+    key: پیشوند یکتای کلید ویجت‌ها در صفحه؛ columns: ستون‌های نمایش (ستون‌های ناموجود نادیده گرفته می‌شوند)
+    """
+    columns = [col for col in (columns or list(df.columns)) if col in df.columns]
+    total = len(df)
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        sort_by = st.selectbox("مرتب‌سازی بر اساس", ['-'] + columns, key=f"{key}_sort")
+    with col2:
+        order = st.selectbox("ترتیب", ["صعودی", "نزولی"], key=f"{key}_order")
+    with col3:
+        page_size = st.selectbox("تعداد ردیف در صفحه", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    
+    pages = max(1, -(-total // page_size))
+    # با تغییر فیلتر یا اندازه صفحه، شماره صفحه قبلی ممکن است از تعداد صفحه‌ها بیشتر شود
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    with col4:
+        page = st.number_input(f"صفحه (از {pages:,})", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    
+    page_df = page_rows(df, page, page_size, sort_by=None if sort_by == '-' else sort_by,
+                        ascending=order == "صعودی")
+    start = (page - 1) * page_size
+    st.caption(f"ردیف {min(start + 1, total):,} تا {start + len(page_df):,} از {total:,}")
+    st.dataframe(page_df[columns], use_container_width=True, hide_index=True)
+
 def show_comprehensive_dashboard():
     """داشبورد جامع با تمام متریک‌ها"""
     st.markdown("## 📊 داشبورد جامع مدیریت استعداد")
     
-    # بارگذاری تمام داده‌ها
-    employees_df = tms.load_sheet('Employees')
-    gaps_df = tms.load_sheet('Gaps')
-    development_df = tms.load_sheet('Development_Plans')
-    kpi_df = tms.load_sheet('KPI')
-    training_df = tms.load_sheet('Training_Records')
+    # فقط ستون‌های مورد نیاز داشبورد؛ محاسبات تا تغییر داده از کش talent_analytics خوانده می‌شوند
+    employees = ('Employees', ['EmployeeID', 'CareerStage', 'MotivationScore'])
+    plans = ('Development_Plans', ['Status'])
+    # نمودارهای شکاف از برش‌های مکعب شکاف‌ها (یک گذر روی شیت، تا تغییر داده در کش)
+    cube = tms.analytics(gap_cube, [GAP_FACTS])
+    # کارت‌های ردیف اول از تجمیع‌های افزایشی خوانده می‌شوند (مستقل از اندازه سازمان)
+    try:
+        metrics = dashboard_metrics(tms.aggregates)
+    except Exception as e:
+        st.error(f"خطا در خواندن تجمیع‌های داشبورد: {e}")
+        return
     
     # ردیف اول: کارت‌های کلیدی
     col1, col2, col3, col4, col5, col6 = st.columns(6)
     
     with col1:
-        total_employees = len(employees_df) if not employees_df.empty else 0
-        st.metric("👥 کارکنان", total_employees, "نفر")
+        st.metric("👥 کارکنان", metrics['employees'], "نفر")
     
     with col2:
-        total_gaps = len(gaps_df) if not gaps_df.empty else 0
-        st.metric("🎯 شکاف‌ها", total_gaps, "مورد")
+        st.metric("🎯 شکاف‌ها", metrics['gaps'], "مورد")
     
     with col3:
-        critical_gaps = len(gaps_df[gaps_df['GapSize'] >= 2]) if not gaps_df.empty else 0
-        st.metric("🚨 شکاف‌های بحرانی", critical_gaps, "مورد")
+        st.metric("🚨 شکاف‌های بحرانی", metrics['critical_gaps'], "مورد")
     
     with col4:
-        active_plans = len(development_df[development_df['Status'] == 'در جریان']) if not development_df.empty else 0
-        st.metric("📈 برنامه‌های فعال", active_plans, "برنامه")
+        st.metric("📈 برنامه‌های فعال", metrics['active_plans'], "برنامه")
     
     with col5:
-        completed_plans = len(development_df[development_df['Status'] == 'تکمیل شده']) if not development_df.empty else 0
-        st.metric("✅ برنامه‌های تکمیل شده", completed_plans, "برنامه")
+        st.metric("✅ برنامه‌های تکمیل شده", metrics['completed_plans'], "برنامه")
     
     with col6:
-        if not employees_df.empty and 'MotivationScore' in employees_df.columns:
-            avg_motivation = employees_df['MotivationScore'].mean() 
-        else:
-            avg_motivation = 0
-        st.metric("💪 میانگین انگیزه", f"{avg_motivation:.1f}", "/10")
+        st.metric("💪 میانگین انگیزه", f"{metrics['avg_motivation']:.1f}", "/10")
     
     # ردیف دوم: نمودارها
     col1, col2 = st.columns(2)
     
     with col1:
-        if not gaps_df.empty and 'GapType' in gaps_df.columns:
+        gap_type_dist = cube.slice(['GapType'])['count'].sort_values(ascending=False)
+        if not gap_type_dist.empty:
             # نمودار توزیع شکاف‌ها
-            gap_type_dist = gaps_df['GapType'].value_counts()
             fig_gap_type = px.pie(
                 values=gap_type_dist.values,
                 names=gap_type_dist.index,
@@ -412,9 +603,9 @@ def show_comprehensive_dashboard():
             st.plotly_chart(fig_gap_type, use_container_width=True)
     
     with col2:
-        if not development_df.empty and 'Status' in development_df.columns:
+        status_dist = tms.analytics(distribution, [plans], 'Status')
+        if not status_dist.empty:
             # نمودار وضعیت برنامه‌های توسعه
-            status_dist = development_df['Status'].value_counts()
             fig_status = px.bar(
                 x=status_dist.values,
                 y=status_dist.index,
@@ -429,28 +620,23 @@ def show_comprehensive_dashboard():
     col1, col2 = st.columns(2)
     
     with col1:
-        if not gaps_df.empty and not employees_df.empty and 'Unit' in employees_df.columns:
-            # شکاف‌ها به تفکیک واحد
-            gap_analysis = gaps_df.merge(
-                employees_df[['EmployeeID', 'Unit']], 
-                on='EmployeeID', how='left'
+        # شکاف‌ها به تفکیک واحد
+        unit_gaps = cube.slice(['Unit'])['count']
+        if not unit_gaps.empty:
+            fig_unit_gaps = px.bar(
+                x=unit_gaps.values,
+                y=unit_gaps.index,
+                title="تعداد شکاف‌ها به تفکیک واحد",
+                orientation='h',
+                color=unit_gaps.values,
+                color_continuous_scale='Blues'
             )
-            if not gap_analysis.empty and 'Unit' in gap_analysis.columns:
-                unit_gaps = gap_analysis.groupby('Unit').size()
-                fig_unit_gaps = px.bar(
-                    x=unit_gaps.values,
-                    y=unit_gaps.index,
-                    title="تعداد شکاف‌ها به تفکیک واحد",
-                    orientation='h',
-                    color=unit_gaps.values,
-                    color_continuous_scale='Blues'
-                )
-                st.plotly_chart(fig_unit_gaps, use_container_width=True)
+            st.plotly_chart(fig_unit_gaps, use_container_width=True)
     
     with col2:
-        if not kpi_df.empty and 'Status' in kpi_df.columns:
+        kpi_status = tms.analytics(distribution, [('KPI', ['Status'])], 'Status')
+        if not kpi_status.empty:
             # عملکرد KPI
-            kpi_status = kpi_df['Status'].value_counts()
             fig_kpi = px.pie(
                 values=kpi_status.values,
                 names=kpi_status.index,
@@ -463,40 +649,24 @@ def show_comprehensive_dashboard():
     col1, col2 = st.columns(2)
     
     with col1:
-        if not gaps_df.empty and 'Urgency' in gaps_df.columns and 'ImpactOnTeam' in gaps_df.columns:
-            # ماتریس فوریت-تأثیر
-            urgency_order = ['کم', 'متوسط', 'زیاد']
-            impact_order = ['کم', 'متوسط', 'زیاد']
-            
-            # ایجاد ماتریس
-            matrix_data = []
-            for urgency in urgency_order:
-                for impact in impact_order:
-                    count = len(gaps_df[(gaps_df['Urgency'] == urgency) & 
-                                      (gaps_df['ImpactOnTeam'] == impact)])
-                    matrix_data.append({'فوریت': urgency, 'تأثیر': impact, 'تعداد': count})
-            
-            matrix_df = pd.DataFrame(matrix_data)
-            
-            if not matrix_df.empty:
-                fig_matrix = px.density_heatmap(
-                    matrix_df, 
-                    x='فوریت', 
-                    y='تأثیر', 
-                    z='تعداد',
-                    title="ماتریس فوریت-تأثیر شکاف‌ها",
-                    color_continuous_scale='RdYlGn_r'
-                )
-                st.plotly_chart(fig_matrix, use_container_width=True)
+        # ماتریس فوریت-تأثیر
+        matrix_df = (cube.crosstab('Urgency', 'ImpactOnTeam').stack()
+                     .rename_axis(['فوریت', 'تأثیر']).reset_index(name='تعداد'))
+        if not matrix_df.empty:
+            fig_matrix = px.density_heatmap(
+                matrix_df, 
+                x='فوریت', 
+                y='تأثیر', 
+                z='تعداد',
+                title="ماتریس فوریت-تأثیر شکاف‌ها",
+                color_continuous_scale='RdYlGn_r'
+            )
+            st.plotly_chart(fig_matrix, use_container_width=True)
     
     with col2:
-        if not employees_df.empty and 'CareerStage' in employees_df.columns and 'MotivationScore' in employees_df.columns:
-            # تحلیل مراحل شغلی
-            stage_analysis = employees_df.groupby('CareerStage').agg({
-                'MotivationScore': 'mean',
-                'EmployeeID': 'count'
-            }).reset_index()
-            
+        # تحلیل مراحل شغلی
+        stage_analysis = tms.analytics(career_stage_motivation, [employees])
+        if not stage_analysis.empty:
             fig_stage = px.scatter(
                 stage_analysis,
                 x='MotivationScore',
@@ -531,44 +701,25 @@ def show_employees_list():
     employees_df = tms.load_sheet('Employees')
     
     if not employees_df.empty:
-        # فیلترها
+        # گزینه‌ها و فیلترها از ایندکس فیلتر کارکنان (تا تغییر شیت در کش)
+        index = tms.analytics(filter_index, [('Employees', None)], EMPLOYEE_FILTERS)
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            units = ['همه'] + list(employees_df['Unit'].unique()) if 'Unit' in employees_df.columns else ['همه']
-            selected_unit = st.selectbox("فیلتر بر اساس واحد", units)
+            selected_unit = st.selectbox("فیلتر بر اساس واحد", [ALL] + index.options('Unit'))
         
         with col2:
-            if 'CareerStage' in employees_df.columns:
-                career_stages = ['همه'] + list(employees_df['CareerStage'].unique()) 
-            else:
-                career_stages = ['همه']
-            selected_stage = st.selectbox("فیلتر بر اساس مرحله شغلی", career_stages)
+            selected_stage = st.selectbox("فیلتر بر اساس مرحله شغلی", [ALL] + index.options('CareerStage'))
         
         with col3:
-            if 'EducationLevel' in employees_df.columns:
-                education_levels = ['همه'] + list(employees_df['EducationLevel'].unique())
-            else:
-                education_levels = ['همه']
-            selected_edu = st.selectbox("فیلتر بر اساس تحصیلات", education_levels)
+            selected_edu = st.selectbox("فیلتر بر اساس تحصیلات", [ALL] + index.options('EducationLevel'))
         
         with col4:
-            if 'SuccessionPool' in employees_df.columns:
-                succession_pools = ['همه'] + list(employees_df['SuccessionPool'].unique())
-            else:
-                succession_pools = ['همه']
-            selected_pool = st.selectbox("فیلتر بر اساس جانشین‌پروری", succession_pools)
+            selected_pool = st.selectbox("فیلتر بر اساس جانشین‌پروری", [ALL] + index.options('SuccessionPool'))
         
         # اعمال فیلترها
-        filtered_df = employees_df.copy()
-        if selected_unit != 'همه' and 'Unit' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['Unit'] == selected_unit]
-        if selected_stage != 'همه' and 'CareerStage' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['CareerStage'] == selected_stage]
-        if selected_edu != 'همه' and 'EducationLevel' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['EducationLevel'] == selected_edu]
-        if selected_pool != 'همه' and 'SuccessionPool' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['SuccessionPool'] == selected_pool]
+        filtered_df = index.select({'Unit': selected_unit, 'CareerStage': selected_stage,
+                                    'EducationLevel': selected_edu, 'SuccessionPool': selected_pool})
         
         # نمایش آمار
         st.info(f"📊 نمایش {len(filtered_df)} کارمند از {len(employees_df)} کارمند")
@@ -577,21 +728,13 @@ def show_employees_list():
         display_columns = ['EmployeeID', 'FullName', 'Gender', 'JobTitle', 'Unit', 
                           'EducationLevel', 'CareerStage', 'MotivationScore', 'SuccessionPool']
         
-        # حذف ستون‌هایی که وجود ندارند
-        display_columns = [col for col in display_columns if col in filtered_df.columns]
+        # نمایش جدول (فقط صفحه جاری)
+        show_paged_table(filtered_df, 'employees_list', display_columns)
         
-        # نمایش جدول
-        st.dataframe(
-            filtered_df[display_columns],
-            use_container_width=True,
-            hide_index=True
-        )
-        
-        # دکمه دانلود
-        csv = filtered_df.to_csv(index=False, encoding='utf-8-sig')
+        # دکمه دانلود (فایل فقط هنگام کلیک ساخته می‌شود)
         st.download_button(
             label="📥 دانلود خروجی CSV",
-            data=csv,
+            data=lambda: export_buffer(write_csv, filtered_df),
             file_name=f"employees_{datetime.now().strftime('%Y%m%d')}.csv",
             mime="text/csv"
         )
@@ -682,12 +825,7 @@ def add_employee_form():
                         'SuccessionPool': succession_pool
                     }
                     
-                    if employees_df.empty:
-                        employees_df = pd.DataFrame([new_employee])
-                    else:
-                        employees_df = pd.concat([employees_df, pd.DataFrame([new_employee])], ignore_index=True)
-                    
-                    if tms.save_sheet(employees_df, 'Employees'):
+                    if tms.append_rows('Employees', [new_employee]):
                         st.success("✅ اطلاعات کارمند با موفقیت ذخیره شد!")
                         st.balloons()
             else:
@@ -700,11 +838,22 @@ def edit_employee_form():
     employees_df = tms.load_sheet('Employees')
     
     if not employees_df.empty:
-        employee_ids = [''] + list(employees_df['EmployeeID'].unique())
+        query = st.text_input("🔍 جستجوی کارمند (نام، شغل، رشته یا کد)", key="edit_employee_query")
+        if query.strip():
+            matches, total = tms.search('Employees', query, limit=SEARCH_LIMIT)
+            if total > len(matches):
+                st.caption(f"{total:,} نتیجه؛ {len(matches)} نتیجه اول نمایش داده می‌شود")
+            employee_ids = [''] + [key for key, _ in matches]
+        else:
+            employee_ids = [''] + list(employees_df['EmployeeID'].unique())
         selected_emp = st.selectbox("انتخاب کارمند برای ویرایش", employee_ids)
         
         if selected_emp:
             employee_data = employees_df[employees_df['EmployeeID'] == selected_emp].iloc[0]
+            editable_columns = ['FullName', 'JobTitle', 'Unit', 'EducationLevel', 'CareerStage',
+                                'MotivationScore', 'SuccessionPool', 'CareerStrategy']
+            snapshot_key = f"edit_employee_snapshot_{selected_emp}"
+            current_values = {column: employee_data[column] for column in editable_columns if column in employee_data}
             
             with st.form("edit_employee_form"):
                 col1, col2 = st.columns(2)
@@ -743,17 +892,26 @@ def edit_employee_form():
                 
                 if submitted:
                     # به‌روزرسانی داده‌ها
-                    employees_df.loc[employees_df['EmployeeID'] == selected_emp, 'FullName'] = full_name
-                    employees_df.loc[employees_df['EmployeeID'] == selected_emp, 'JobTitle'] = job_title
-                    employees_df.loc[employees_df['EmployeeID'] == selected_emp, 'Unit'] = unit
-                    employees_df.loc[employees_df['EmployeeID'] == selected_emp, 'EducationLevel'] = education_level
-                    employees_df.loc[employees_df['EmployeeID'] == selected_emp, 'CareerStage'] = career_stage
-                    employees_df.loc[employees_df['EmployeeID'] == selected_emp, 'MotivationScore'] = motivation_score
-                    employees_df.loc[employees_df['EmployeeID'] == selected_emp, 'SuccessionPool'] = succession_pool
-                    employees_df.loc[employees_df['EmployeeID'] == selected_emp, 'CareerStrategy'] = career_strategy
+                    updates = {
+                        'FullName': full_name,
+                        'JobTitle': job_title,
+                        'Unit': unit,
+                        'EducationLevel': education_level,
+                        'CareerStage': career_stage,
+                        'MotivationScore': motivation_score,
+                        'SuccessionPool': succession_pool,
+                        'CareerStrategy': career_strategy,
+                    }
                     
-                    if tms.save_sheet(employees_df, 'Employees'):
+                    # مقادیری که کاربر هنگام باز کردن فرم دیده بود (کنترل همزمانی)
+                    expected = st.session_state.get(snapshot_key)
+                    if tms.update_rows('Employees', 'EmployeeID', selected_emp, updates, expected=expected):
+                        st.session_state.pop(snapshot_key, None)
                         st.success("✅ اطلاعات کارمند با موفقیت به‌روزرسانی شد!")
+                    else:
+                        st.session_state[snapshot_key] = current_values
+                else:
+                    st.session_state[snapshot_key] = current_values
     else:
         st.info("📝 هیچ کارمندی برای ویرایش وجود ندارد.")
 
@@ -761,9 +919,11 @@ def analyze_employees():
     """تحلیل پیشرفته کارکنان"""
     st.subheader("📊 تحلیل پیشرفته کارکنان")
     
-    employees_df = tms.load_sheet('Employees')
-    gaps_df = tms.load_sheet('Gaps')
-    kpi_df = tms.load_sheet('KPI')
+    employees_df = tms.load_sheet('Employees', columns=[
+        'EmployeeID', 'FullName', 'Unit', 'EducationLevel', 'CareerStage',
+        'MotivationScore', 'SuccessionPool'
+    ])
+    gaps_df = tms.analytics(*GAP_FACTS)
     
     if not employees_df.empty:
         col1, col2 = st.columns(2)
@@ -818,15 +978,12 @@ def analyze_employees():
         if not gaps_df.empty and not employees_df.empty:
             st.subheader("تحلیل شکاف‌های مهارتی کارکنان")
             
-            # ارتباط داده‌ها
-            employee_gaps = gaps_df.merge(
-                employees_df[['EmployeeID', 'FullName', 'Unit', 'CareerStage']],
-                on='EmployeeID', how='left'
-            )
+            # شکاف‌ها همراه با مرحله شغلی کارمند (جدول واقعیت شکاف‌ها)
+            employee_gaps = gaps_df
             
             # شکاف‌ها به تفکیک مرحله شغلی
             if not employee_gaps.empty and 'CareerStage' in employee_gaps.columns:
-                stage_gap_analysis = employee_gaps.groupby('CareerStage').agg({
+                stage_gap_analysis = employee_gaps.groupby('CareerStage', observed=True).agg({
                     'GapSize': 'mean',
                     'GapID': 'count'
                 }).reset_index()
@@ -867,52 +1024,37 @@ def gap_management():
 
 def show_gaps_list():
     """نمایش لیست شکاف‌ها"""
-    gaps_df = tms.load_sheet('Gaps')
-    employees_df = tms.load_sheet('Employees')
-    competencies_df = tms.load_sheet('Competencies')
+    # با انتخاب مدیر فقط شکاف‌های زیرمجموعه او خوانده و ادغام می‌شود؛ در غیر این صورت جدول واقعیت مشترک
+    team = select_team('gaps_list')
+    # گزینه‌ها و فیلترها از ایندکس فیلتر شکاف‌ها
+    index = team[0] if team else tms.analytics(filter_index, [GAP_FACTS], GAP_FILTERS)
+    gaps_df = index.frame
     
     if not gaps_df.empty:
-        # فیلترها
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            gap_types = ['همه'] + list(gaps_df['GapType'].unique()) if 'GapType' in gaps_df.columns else ['همه']
-            selected_type = st.selectbox("نوع شکاف", gap_types)
+            selected_type = st.selectbox("نوع شکاف", [ALL] + index.options('GapType'))
         
         with col2:
-            urgency_levels = ['همه'] + list(gaps_df['Urgency'].unique()) if 'Urgency' in gaps_df.columns else ['همه']
-            selected_urgency = st.selectbox("فوریت", urgency_levels)
+            selected_urgency = st.selectbox("فوریت", [ALL] + index.options('Urgency'))
         
         with col3:
-            statuses = ['همه'] + list(gaps_df['Status'].unique()) if 'Status' in gaps_df.columns else ['همه']
-            selected_status = st.selectbox("وضعیت", statuses)
+            selected_status = st.selectbox("وضعیت", [ALL] + index.options('Status'))
         
         with col4:
             gap_sizes = ['همه', 'کم (1)', 'متوسط (2)', 'زیاد (3+)']
             selected_size = st.selectbox("اندازه شکاف", gap_sizes)
         
-        # اعمال فیلترها
-        filtered_df = gaps_df.copy()
-        if selected_type != 'همه' and 'GapType' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['GapType'] == selected_type]
-        if selected_urgency != 'همه' and 'Urgency' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['Urgency'] == selected_urgency]
-        if selected_status != 'همه' and 'Status' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['Status'] == selected_status]
+        # اعمال فیلترها (اندازه شکاف فقط روی ردیف‌های باقی‌مانده)
+        filtered_df = index.select({'GapType': selected_type, 'Urgency': selected_urgency, 'Status': selected_status})
         if selected_size != 'همه' and 'GapSize' in filtered_df.columns:
             if selected_size == 'کم (1)':
-                filtered_df = filtered_df[filtered_df['GapSize'] == 1]
+                filtered_df = filtered_df[(filtered_df['GapSize'] == 1).fillna(False)]
             elif selected_size == 'متوسط (2)':
-                filtered_df = filtered_df[filtered_df['GapSize'] == 2]
+                filtered_df = filtered_df[(filtered_df['GapSize'] == 2).fillna(False)]
             elif selected_size == 'زیاد (3+)':
-                filtered_df = filtered_df[filtered_df['GapSize'] >= 3]
-        
-        # ارتباط با اطلاعات کارمند
-        if not employees_df.empty and 'EmployeeID' in employees_df.columns:
-            filtered_df = filtered_df.merge(
-                employees_df[['EmployeeID', 'FullName', 'JobTitle', 'Unit']],
-                on='EmployeeID', how='left'
-            )
+                filtered_df = filtered_df[(filtered_df['GapSize'] >= 3).fillna(False)]
         
         st.info(f"📊 نمایش {len(filtered_df)} شکاف از {len(gaps_df)} شکاف")
         
@@ -920,15 +1062,10 @@ def show_gaps_list():
         display_columns = ['FullName', 'JobTitle', 'Unit', 'GapName', 'GapType', 
                           'CurrentLevel', 'RequiredLevel', 'GapSize', 'Urgency', 'Status']
         
-        # حذف ستون‌هایی که وجود ندارند
-        display_columns = [col for col in display_columns if col in filtered_df.columns]
-        
-        st.dataframe(
-            filtered_df[display_columns],
-            use_container_width=True,
-            hide_index=True
-        )
+        show_paged_table(filtered_df, 'gaps_list', display_columns)
         
+    elif team:
+        st.info("📝 برای زیرمجموعه این مدیر شکافی ثبت نشده است.")
     else:
         st.info("📝 هنوز شکافی ثبت نشده است.")
 
@@ -981,10 +1118,9 @@ def add_gap_form():
             
             if submitted:
                 if employee_id and gap_name:
-                    gaps_df = tms.load_sheet('Gaps')
-                    
+                    gap_id = tms.allocate_id('Gaps')
                     new_gap = {
-                        'GapID': f"GAP-{len(gaps_df) + 1:03d}",
+                        'GapID': gap_id,
                         'EmployeeID': employee_id,
                         'JobCode': employee_info['JobCode'] if 'JobCode' in employee_info else '',
                         'Unit': employee_info['Unit'],
@@ -1005,12 +1141,7 @@ def add_gap_form():
                         'Status': status
                     }
                     
-                    if gaps_df.empty:
-                        gaps_df = pd.DataFrame([new_gap])
-                    else:
-                        gaps_df = pd.concat([gaps_df, pd.DataFrame([new_gap])], ignore_index=True)
-                    
-                    if tms.save_sheet(gaps_df, 'Gaps'):
+                    if gap_id and tms.append_rows('Gaps', [new_gap]):
                         st.success("✅ شکاف جدید با موفقیت ثبت شد!")
                         st.balloons()
                 else:
@@ -1022,42 +1153,28 @@ def show_gap_analysis():
     """تحلیل پیشرفته شکاف‌ها"""
     st.subheader("📊 تحلیل پیشرفته شکاف‌ها")
     
-    gaps_df = tms.load_sheet('Gaps')
-    employees_df = tms.load_sheet('Employees')
+    # جدول‌های متقاطع و drill-down از مکعب شکاف‌ها؛ علل ریشه‌ای از جدول واقعیت شکاف‌ها
+    cube = tms.analytics(gap_cube, [GAP_FACTS])
     
-    if not gaps_df.empty:
+    if cube.total()['count']:
         # تحلیل سطح واحد
         col1, col2 = st.columns(2)
         
         with col1:
             # شکاف‌ها به تفکیک واحد و نوع
-            if not employees_df.empty and 'Unit' in employees_df.columns:
-                gap_analysis = gaps_df.merge(
-                    employees_df[['EmployeeID', 'Unit']], 
-                    on='EmployeeID', how='left'
+            unit_gap_type = cube.crosstab('Unit', 'GapType')
+            if not unit_gap_type.empty:
+                fig_unit_gap = px.bar(
+                    unit_gap_type,
+                    title="توزیع شکاف‌ها بر اساس واحد و نوع",
+                    barmode='group'
                 )
-                
-                if not gap_analysis.empty and 'Unit' in gap_analysis.columns and 'GapType' in gap_analysis.columns:
-                    unit_gap_type = pd.crosstab(
-                        gap_analysis['Unit'], 
-                        gap_analysis['GapType']
-                    )
-                    
-                    fig_unit_gap = px.bar(
-                        unit_gap_type,
-                        title="توزیع شکاف‌ها بر اساس واحد و نوع",
-                        barmode='group'
-                    )
-                    st.plotly_chart(fig_unit_gap, use_container_width=True)
+                st.plotly_chart(fig_unit_gap, use_container_width=True)
         
         with col2:
             # نمودار فوریت شکاف‌ها
-            if 'Urgency' in gaps_df.columns and 'ImpactOnTeam' in gaps_df.columns:
-                urgency_impact = pd.crosstab(
-                    gaps_df['Urgency'],
-                    gaps_df['ImpactOnTeam']
-                )
-                
+            urgency_impact = cube.crosstab('Urgency', 'ImpactOnTeam')
+            if urgency_impact.to_numpy().any():
                 fig_urgency = px.imshow(
                     urgency_impact,
                     title="ماتریس فوریت-تأثیر شکاف‌ها",
@@ -1070,77 +1187,85 @@ def show_gap_analysis():
         
         with col3:
             # توزیع هزینه‌های برآورد شده
-            if 'CostEstimate' in gaps_df.columns and 'GapType' in gaps_df.columns:
-                cost_analysis = gaps_df.groupby('GapType')['CostEstimate'].sum()
-                if not cost_analysis.empty:
-                    fig_cost = px.pie(
-                        values=cost_analysis.values,
-                        names=cost_analysis.index,
-                        title="توزیع هزینه‌های برآورد شده بر اساس نوع شکاف"
-                    )
-                    st.plotly_chart(fig_cost, use_container_width=True)
+            cost_analysis = cube.slice(['GapType'])['cost']
+            if not cost_analysis.empty:
+                fig_cost = px.pie(
+                    values=cost_analysis.values,
+                    names=cost_analysis.index,
+                    title="توزیع هزینه‌های برآورد شده بر اساس نوع شکاف"
+                )
+                st.plotly_chart(fig_cost, use_container_width=True)
         
         with col4:
             # تحلیل ریشه‌های علل
-            if 'RootCause' in gaps_df.columns:
-                root_cause_analysis = gaps_df['RootCause'].value_counts()
-                if not root_cause_analysis.empty:
-                    fig_root_cause = px.bar(
-                        x=root_cause_analysis.values,
-                        y=root_cause_analysis.index,
-                        title="توزیع علل ریشه‌ای شکاف‌ها",
-                        orientation='h'
-                    )
-                    st.plotly_chart(fig_root_cause, use_container_width=True)
+            root_cause_analysis = tms.analytics(distribution, [GAP_FACTS], 'RootCause')
+            if not root_cause_analysis.empty:
+                fig_root_cause = px.bar(
+                    x=root_cause_analysis.values,
+                    y=root_cause_analysis.index,
+                    title="توزیع علل ریشه‌ای شکاف‌ها",
+                    orientation='h'
+                )
+                st.plotly_chart(fig_root_cause, use_container_width=True)
+        
+        # تحلیل چندبعدی: انتخاب مقدار هر بعد یک سطح پایین‌تر می‌رود (واحد ← نوع ← فوریت ← تأثیر ← وضعیت)
+        st.write("### 🔎 تحلیل چندبعدی شکاف‌ها")
+        path = {}
+        drill_columns = st.columns(len(CUBE_DIMENSIONS))
+        for drill_col, dimension in zip(drill_columns, CUBE_DIMENSIONS):
+            with drill_col:
+                choice = st.selectbox(DIMENSION_TITLES[dimension], ['همه'] + cube.members_of(dimension, path),
+                                      key=f"cube_{dimension}")
+            if choice == 'همه':
+                break
+            path[dimension] = choice
+        
+        total = cube.total(path)
+        col5, col6, col7 = st.columns(3)
+        col5.metric("تعداد شکاف‌ها", f"{total['count']:,}")
+        col6.metric("هزینه برآوردی", f"{total['cost']:,.0f}")
+        col7.metric("میانگین اندازه شکاف", f"{total['gap_size']:.2f}" if pd.notna(total['gap_size']) else '-')
+        
+        drill_down = cube.drill(path)
+        if drill_down is not None and not drill_down.empty:
+            level = drill_down.index.name
+            st.dataframe(
+                drill_down.rename_axis(DIMENSION_TITLES[level]).rename(columns={
+                    'count': 'تعداد', 'cost': 'هزینه برآوردی', 'gap_size': 'میانگین اندازه شکاف'
+                }),
+                use_container_width=True
+            )
         
     else:
         st.info("📊 داده‌ای برای تحلیل وجود ندارد")
 
+CRITICAL_CARDS_PAGE = 20
+
 def show_critical_gaps():
     """نمایش شکاف‌های بحرانی"""
     st.subheader("🚨 شکاف‌های بحرانی (Gap ≥ 2)")
     
-    gaps_df = tms.load_sheet('Gaps')
-    employees_df = tms.load_sheet('Employees')
-    development_df = tms.load_sheet('Development_Plans')
+    gaps_df = tms.analytics(*GAP_FACTS)
     
     if not gaps_df.empty and 'GapSize' in gaps_df.columns:
-        critical_gaps = gaps_df[gaps_df['GapSize'] >= 2]
-        
-        if not critical_gaps.empty:
-            # ارتباط با اطلاعات کارمند
-            if not employees_df.empty and 'EmployeeID' in employees_df.columns:
-                # فقط ستون‌های موجود را انتخاب می‌کنیم
-                employee_columns = ['EmployeeID', 'FullName', 'JobTitle', 'ManagerID']
-                # فقط ستون‌هایی که وجود دارند را اضافه می‌کنیم
-                available_columns = [col for col in employee_columns if col in employees_df.columns]
-                
-                if available_columns:
-                    critical_gaps = critical_gaps.merge(
-                        employees_df[available_columns],
-                        on='EmployeeID', how='left'
-                    )
-            
-            # ارتباط با برنامه‌های توسعه
-            if not development_df.empty and 'GapID' in development_df.columns:
-                development_columns = ['GapID', 'PlanName', 'Status', 'Progress']
-                available_dev_columns = [col for col in development_columns if col in development_df.columns]
-                
-                if available_dev_columns:
-                    critical_gaps = critical_gaps.merge(
-                        development_df[available_dev_columns],
-                        on='GapID', how='left'
-                    )
-            
-            st.info(f"🔴 تعداد شکاف‌های بحرانی: {len(critical_gaps)}")
+        # شکاف‌های بحرانی همراه با اطلاعات کارمند و آخرین برنامه توسعه (از جدول واقعیت شکاف‌ها)
+        critical = tms.analytics(critical_gaps, [GAP_FACTS])
+        recommendations = tms.course_recommendations()
+        matcher = tms.course_matcher() if recommendations is not None else None
+        
+        if not critical.empty:
+            st.info(f"🔴 تعداد شکاف‌های بحرانی: {len(critical):,} (به ترتیب امتیاز اولویت)")
             
-            for _, gap in critical_gaps.iterrows():
+            # فقط کارت‌های صفحه‌های نمایش‌داده‌شده ساخته می‌شوند؛ ردیف‌ها dict ساده هستند نه Series
+            visible = st.session_state.get('critical_gaps_visible', CRITICAL_CARDS_PAGE)
+            for gap in critical.iloc[:visible].to_dict('records'):
                 # ایجاد عنوان ایمن
                 employee_name = gap.get('FullName', 'نامشخص')
                 gap_name = gap.get('GapName', 'نامشخص')
                 gap_size = gap.get('GapSize', 0)
                 
-                with st.expander(f"🔴 {employee_name} - {gap_name} (شکاف: {gap_size})", expanded=True):
+                with st.expander(f"🔴 {employee_name} - {gap_name} (شکاف: {gap_size}، اولویت: {gap['Priority']:g})",
+                                 expanded=True):
                     col1, col2, col3 = st.columns(3)
                     
                     with col1:
@@ -1162,7 +1287,7 @@ def show_critical_gaps():
                         st.write(f"👥 تأثیر بر تیم: {gap.get('ImpactOnTeam', 'نامشخص')}")
                         st.write(f"🏢 تأثیر بر سازمان: {gap.get('ImpactOnOrg', 'نامشخص')}")
                         cost = gap.get('CostEstimate', 0)
-                        st.write(f"💰 برآورد هزینه: {cost:,} ریال")
+                        st.write(f"💰 برآورد هزینه: {format_rial(cost)}")
                         st.write(f"🔍 علت ریشه‌ای: {gap.get('RootCause', 'نامشخص')}")
                     
                     # نمایش پیشرفت اگر برنامه توسعه وجود دارد
@@ -1170,55 +1295,70 @@ def show_critical_gaps():
                     if pd.notna(plan_name) and plan_name:
                         st.write("**📋 برنامه توسعه مرتبط:**")
                         st.write(f"📝 برنامه: {plan_name}")
-                        st.write(f"📈 وضعیت: {gap.get('Status', 'نامشخص')}")
+                        st.write(f"📈 وضعیت: {gap.get('PlanStatus', 'نامشخص')}")
                         progress = gap.get('Progress', 0)
+                        progress = 0 if pd.isna(progress) else progress
                         st.write(f"📊 پیشرفت: {progress}%")
                         st.progress(progress / 100)
                     else:
                         st.warning("⚠️ هیچ برنامه توسعه‌ای برای این شکاف تعریف نشده است!")
                     
+                    # دوره‌های توصیه‌شده کار دسته‌ای
+                    if matcher is not None:
+                        courses = recommended_courses(recommendations, matcher, gap.get('GapID'))
+                        if not courses.empty and 'CourseName' in courses.columns:
+                            st.write(f"**🎓 دوره‌های پیشنهادی:** {'، '.join(courses['CourseName'].astype(str))}")
+                    
                     # نمایش نوار پیشرفت شکاف
                     st.write("**پیشرفت رفع شکاف:**")
                     current_level = gap.get('CurrentLevel', 0)
                     required_level = gap.get('RequiredLevel', 1)
-                    if required_level > 0:
+                    if pd.notna(current_level) and pd.notna(required_level) and required_level > 0:
                         progress_percentage = (current_level / required_level) * 100
                     else:
                         progress_percentage = 0
                     st.progress(progress_percentage / 100)
                     st.write(f"پیشرفت: {progress_percentage:.1f}%")
             
+            remaining = len(critical) - visible
+            if remaining > 0:
+                if st.button(f"⬇️ نمایش {min(CRITICAL_CARDS_PAGE, remaining)} شکاف بعدی (باقی‌مانده: {remaining:,})",
+                             key="critical_gaps_more"):
+                    st.session_state['critical_gaps_visible'] = visible + CRITICAL_CARDS_PAGE
+                    st.rerun()
+            
             # خلاصه آماری
             st.subheader("📈 خلاصه آماری شکاف‌های بحرانی")
+            summary = tms.analytics(critical_gap_summary, [(critical_gaps, [GAP_FACTS])])
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                total_cost = critical_gaps['CostEstimate'].sum() if 'CostEstimate' in critical_gaps.columns else 0
-                st.metric("💰 مجموع هزینه‌های برآورد شده", f"{total_cost:,} ریال")
+                st.metric("💰 مجموع هزینه‌های برآورد شده", format_rial(summary['total_cost']))
             
             with col2:
-                avg_gap_size = critical_gaps['GapSize'].mean() if 'GapSize' in critical_gaps.columns else 0
-                st.metric("📏 میانگین اندازه شکاف", f"{avg_gap_size:.1f}")
+                st.metric("📏 میانگین اندازه شکاف", f"{summary['avg_gap_size']:.1f}")
             
             with col3:
-                if 'Urgency' in critical_gaps.columns:
-                    high_urgency = len(critical_gaps[critical_gaps['Urgency'] == 'زیاد'])
-                else:
-                    high_urgency = 0
-                st.metric("⏰ شکاف‌های با فوریت زیاد", high_urgency)
+                st.metric("⏰ شکاف‌های با فوریت زیاد", summary['high_urgency'])
             
             with col4:
-                if 'ImpactOnOrg' in critical_gaps.columns:
-                    high_impact = len(critical_gaps[critical_gaps['ImpactOnOrg'] == 'زیاد'])
-                else:
-                    high_impact = 0
-                st.metric("🏢 شکاف‌های با تأثیر سازمانی زیاد", high_impact)
+                st.metric("🏢 شکاف‌های با تأثیر سازمانی زیاد", summary['high_impact'])
                 
         else:
             st.success("✅ هیچ شکاف بحرانی وجود ندارد!")
     else:
         st.info("📝 هیچ شکافی برای نمایش وجود ندارد")
 
+def recommended_courses(recommendations, matcher, gap_id):
+    """دوره‌های توصیه‌شده یک شکاف به ترتیب رتبه همراه با مشخصات دوره (خالی اگر توصیه‌ای ثبت نشده)"""
+    if recommendations is None:
+        return pd.DataFrame()
+    rows = recommendations.select({'GapID': gap_id})
+    if rows.empty or 'CourseID' not in matcher.courses.columns:
+        return pd.DataFrame()
+    courses = matcher.courses.drop_duplicates('CourseID')
+    return rows[['CourseID', 'Score', 'MatchScore']].merge(courses, on='CourseID', how='inner')
+
 def link_gap_development():
     """ارتباط شکاف‌ها با برنامه‌های توسعه"""
     st.subheader("🔗 ارتباط شکاف‌ها با برنامه‌های توسعه")
@@ -1226,7 +1366,8 @@ def link_gap_development():
     gaps_df = tms.load_sheet('Gaps')
     development_df = tms.load_sheet('Development_Plans')
     employees_df = tms.load_sheet('Employees')
-    courses_df = tms.load_sheet('Training_Courses')
+    matcher = tms.course_matcher()
+    recommendations = tms.course_recommendations()
     
     if not gaps_df.empty:
         # انتخاب شکاف برای ایجاد برنامه توسعه
@@ -1264,13 +1405,15 @@ def link_gap_development():
                 plan_type = st.selectbox("نوع برنامه *", ["آموزش", "منتورینگ", "پروژه", "مطالعه", "کارگاه"])
                 provider = st.text_input("ارائه‌دهنده", placeholder="آکادمی داخلی")
                 
-                # پیشنهاد دوره‌های مرتبط
-                if not courses_df.empty and 'LinkedCompetency' in courses_df.columns:
-                    related_courses = courses_df[courses_df['LinkedCompetency'].str.contains(selected_gap['GapName'], na=False)]
-                    if not related_courses.empty:
-                        st.write("**🎓 دوره‌های پیشنهادی:**")
-                        for _, course in related_courses.iterrows():
-                            st.write(f"- {course['CourseName']} ({course['Provider']})")
+                # پیشنهاد دوره‌ها: توصیه‌های کار دسته‌ای و برای شکاف‌های تازه ایندکس تطبیق شایستگی و دوره
+                related_courses = recommended_courses(recommendations, matcher, selected_gap_id)
+                if related_courses.empty:
+                    related_courses = matcher.suggest(selected_gap['GapName'])
+                if not related_courses.empty:
+                    st.write("**🎓 دوره‌های پیشنهادی:**")
+                    for course in related_courses.to_dict('records'):
+                        score = course.get('Score', course['MatchScore'])
+                        st.write(f"- {course.get('CourseName')} ({course.get('Provider')}) - امتیاز {score:.0%}")
                 
                 start_date = st.date_input("تاریخ شروع", value=datetime.now())
             
@@ -1289,10 +1432,9 @@ def link_gap_development():
             
             if submitted:
                 if plan_name:
-                    development_df = tms.load_sheet('Development_Plans')
-                    
+                    plan_id = tms.allocate_id('Development_Plans')
                     new_plan = {
-                        'PlanID': f"PLAN-{len(development_df) + 1:03d}",
+                        'PlanID': plan_id,
                         'GapID': selected_gap_id,
                         'PlanName': plan_name,
                         'PlanType': plan_type,
@@ -1308,15 +1450,13 @@ def link_gap_development():
                         'Status': 'برنامه‌ریزی شده'
                     }
                     
-                    if development_df.empty:
-                        development_df = pd.DataFrame([new_plan])
-                    else:
-                        development_df = pd.concat([development_df, pd.DataFrame([new_plan])], ignore_index=True)
+                    # ثبت برنامه و به‌روزرسانی وضعیت شکاف در یک تراکنش
+                    transaction = Transaction()
+                    transaction.insert('Development_Plans', [new_plan])
+                    transaction.update('Gaps', 'GapID', selected_gap_id, {'Status': 'در دست اقدام'})
                     
-                    if tms.save_sheet(development_df, 'Development_Plans'):
-                        # به‌روزرسانی وضعیت شکاف
-                        gaps_df.loc[gaps_df['GapID'] == selected_gap_id, 'Status'] = 'در دست اقدام'
-                        tms.save_sheet(gaps_df, 'Gaps')
+                    if plan_id and tms.commit(transaction):
+                        development_df = tms.load_sheet('Development_Plans')
                         
                         st.success("✅ برنامه توسعه با موفقیت ایجاد شد!")
                         st.balloons()
@@ -1335,11 +1475,11 @@ def link_gap_development():
                         with col1:
                             st.write(f"**نوع:** {plan['PlanType']}")
                             st.write(f"**ارائه‌دهنده:** {plan['Provider']}")
-                            st.write(f"**تاریخ شروع:** {plan['StartDate']}")
+                            st.write(f"**تاریخ شروع:** {format_date(plan['StartDate'])}")
                         
                         with col2:
-                            st.write(f"**تاریخ پایان:** {plan['EndDate']}")
-                            st.write(f"**هزینه:** {plan['Cost']:,} ریال")
+                            st.write(f"**تاریخ پایان:** {format_date(plan['EndDate'])}")
+                            st.write(f"**هزینه:** {format_rial(plan['Cost'])}")
                             st.write(f"**ساعت تخمینی:** {plan['EstimatedHours']} ساعت")
                         
                         with col3:
@@ -1372,10 +1512,9 @@ def update_progress(plan_id):
                                 .index(development_df.loc[plan_index, 'Status']))
         
         if st.button("💾 ذخیره تغییرات"):
-            development_df.loc[plan_index, 'Progress'] = new_progress
-            development_df.loc[plan_index, 'Status'] = new_status
+            updates = {'Progress': new_progress, 'Status': new_status}
             
-            if tms.save_sheet(development_df, 'Development_Plans'):
+            if tms.update_rows('Development_Plans', 'PlanID', plan_id, updates):
                 st.success("✅ پیشرفت برنامه با موفقیت به‌روزرسانی شد!")
                 st.rerun()
 
@@ -1399,49 +1538,36 @@ def development_plan_management():
 
 def show_development_plans():
     """نمایش برنامه‌های توسعه"""
-    development_df = tms.load_sheet('Development_Plans')
-    gaps_df = tms.load_sheet('Gaps')
-    employees_df = tms.load_sheet('Employees')
+    # با انتخاب مدیر فقط برنامه‌های شکاف‌های زیرمجموعه او خوانده و ادغام می‌شود
+    team = select_team('development_plans')
+    if team:
+        index = team[1]
+    else:
+        # ارتباط داده‌ها
+        plans = (plan_overview, [('Development_Plans', None), GAP_FACTS])
+        # گزینه‌ها و فیلترها از ایندکس فیلتر برنامه‌ها
+        index = tms.analytics(filter_index, [plans], PLAN_FILTERS)
+    development_df = index.frame
     
     if not development_df.empty:
-        # ارتباط داده‌ها
-        merged_df = development_df.merge(
-            gaps_df[['GapID', 'EmployeeID', 'GapName', 'GapSize']],
-            on='GapID', how='left'
-        ).merge(
-            employees_df[['EmployeeID', 'FullName', 'Unit']],
-            on='EmployeeID', how='left'
-        )
-        
         # فیلترها
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            statuses = ['همه'] + list(development_df['Status'].unique()) if 'Status' in development_df.columns else ['همه']
-            selected_status = st.selectbox("وضعیت برنامه", statuses)
+            selected_status = st.selectbox("وضعیت برنامه", [ALL] + index.options('Status'))
         
         with col2:
-            plan_types = ['همه'] + list(development_df['PlanType'].unique()) if 'PlanType' in development_df.columns else ['همه']
-            selected_type = st.selectbox("نوع برنامه", plan_types)
+            selected_type = st.selectbox("نوع برنامه", [ALL] + index.options('PlanType'))
         
         with col3:
-            units = ['همه'] + list(merged_df['Unit'].unique()) if 'Unit' in merged_df.columns else ['همه']
-            selected_unit = st.selectbox("واحد سازمانی", units)
+            selected_unit = st.selectbox("واحد سازمانی", [ALL] + index.options('Unit'))
         
         with col4:
-            providers = ['همه'] + list(development_df['Provider'].unique()) if 'Provider' in development_df.columns else ['همه']
-            selected_provider = st.selectbox("ارائه‌دهنده", providers)
+            selected_provider = st.selectbox("ارائه‌دهنده", [ALL] + index.options('Provider'))
         
         # اعمال فیلترها
-        filtered_df = merged_df.copy()
-        if selected_status != 'همه' and 'Status' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['Status'] == selected_status]
-        if selected_type != 'همه' and 'PlanType' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['PlanType'] == selected_type]
-        if selected_unit != 'همه' and 'Unit' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['Unit'] == selected_unit]
-        if selected_provider != 'همه' and 'Provider' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['Provider'] == selected_provider]
+        filtered_df = index.select({'Status': selected_status, 'PlanType': selected_type,
+                                    'Unit': selected_unit, 'Provider': selected_provider})
         
         st.info(f"📊 نمایش {len(filtered_df)} برنامه از {len(development_df)} برنامه")
         
@@ -1449,39 +1575,21 @@ def show_development_plans():
         display_columns = ['FullName', 'Unit', 'GapName', 'PlanName', 'PlanType', 
                           'StartDate', 'EndDate', 'Progress', 'Status', 'Cost']
         
-        # حذف ستون‌هایی که وجود ندارند
-        display_columns = [col for col in display_columns if col in filtered_df.columns]
-        
-        st.dataframe(
-            filtered_df[display_columns],
-            use_container_width=True,
-            hide_index=True
-        )
+        show_paged_table(filtered_df, 'development_plans', display_columns)
         
         # آمار مالی
-        if 'Cost' in filtered_df.columns:
-            total_cost = filtered_df['Cost'].sum()
-        else:
-            total_cost = 0
-            
-        if 'Progress' in filtered_df.columns:
-            avg_progress = filtered_df['Progress'].mean()
-        else:
-            avg_progress = 0
-            
-        if 'EstimatedHours' in filtered_df.columns:
-            total_hours = filtered_df['EstimatedHours'].sum()
-        else:
-            total_hours = 0
+        totals = plan_totals(filtered_df)
         
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("💰 مجموع هزینه‌ها", f"{total_cost:,} ریال")
+            st.metric("💰 مجموع هزینه‌ها", format_rial(totals['total_cost']))
         with col2:
-            st.metric("📊 میانگین پیشرفت", f"{avg_progress:.1f}%")
+            st.metric("📊 میانگین پیشرفت", f"{totals['avg_progress']:.1f}%")
         with col3:
-            st.metric("⏰ مجموع ساعت‌ها", f"{total_hours} ساعت")
+            st.metric("⏰ مجموع ساعت‌ها", f"{totals['total_hours']} ساعت")
             
+    elif team:
+        st.info("📝 برای زیرمجموعه این مدیر برنامه توسعه‌ای ثبت نشده است.")
     else:
         st.info("📝 هنوز برنامه توسعه‌ای ثبت نشده است.")
 
@@ -1514,9 +1622,9 @@ def track_progress():
         
         with col2:
             st.write(f"**پیشرفت فعلی:** {selected_plan['Progress']}%")
-            st.write(f"**تاریخ شروع:** {selected_plan['StartDate']}")
-            st.write(f"**تاریخ پایان:** {selected_plan['EndDate']}")
-            st.write(f"**هزینه:** {selected_plan['Cost']:,} ریال")
+            st.write(f"**تاریخ شروع:** {format_date(selected_plan['StartDate'])}")
+            st.write(f"**تاریخ پایان:** {format_date(selected_plan['EndDate'])}")
+            st.write(f"**هزینه:** {format_rial(selected_plan['Cost'])}")
         
         # اطلاعات شکاف مرتبط
         if not gaps_df.empty and not employees_df.empty and 'GapID' in selected_plan:
@@ -1554,29 +1662,38 @@ def track_progress():
                                           value=datetime.now() if new_progress == 100 else None,
                                           disabled=new_progress != 100)
         
+        # مقادیری که کاربر هنگام باز کردن صفحه دیده بود (کنترل همزمانی)
+        snapshot_key = f"track_progress_snapshot_{selected_plan_id}"
+        current_values = {'Progress': selected_plan['Progress'], 'Status': selected_plan['Status']}
+        
         if st.button("💾 به‌روزرسانی پیشرفت"):
-            development_df.loc[development_df['PlanID'] == selected_plan_id, 'Progress'] = new_progress
-            development_df.loc[development_df['PlanID'] == selected_plan_id, 'Status'] = new_status
+            plan_updates = {'Progress': new_progress, 'Status': new_status}
+            plan_completed = new_progress == 100 and new_status == 'تکمیل شده'
+            if plan_completed:
+                plan_updates['EndDate'] = completion_date.strftime('%Y-%m-%d')
+            
+            # برنامه و شکاف مرتبط با هم و در یک نوشتن ذخیره می‌شوند
+            transaction = Transaction()
+            transaction.update('Development_Plans', 'PlanID', selected_plan_id, plan_updates,
+                               expected=st.session_state.get(snapshot_key))
             
-            if new_progress == 100 and new_status == 'تکمیل شده':
-                development_df.loc[development_df['PlanID'] == selected_plan_id, 'EndDate'] = completion_date.strftime('%Y-%m-%d')
+            # به‌روزرسانی وضعیت شکاف مرتبط
+            if plan_completed and 'GapID' in selected_plan and pd.notna(selected_plan['GapID']):
+                # به‌روزرسانی سطح فعلی کارمند
+                gap_info = gaps_df[gaps_df['GapID'] == selected_plan['GapID']].iloc[0]
+                new_current_level = gap_info['RequiredLevel']  # پس از تکمیل برنامه، سطح فعلی برابر سطح مورد نیاز می‌شود
                 
-                # به‌روزرسانی وضعیت شکاف مرتبط
-                if 'GapID' in selected_plan and pd.notna(selected_plan['GapID']):
-                    gaps_df = tms.load_sheet('Gaps')
-                    gaps_df.loc[gaps_df['GapID'] == selected_plan['GapID'], 'Status'] = 'حل شده'
-                    
-                    # به‌روزرسانی سطح فعلی کارمند
-                    gap_info = gaps_df[gaps_df['GapID'] == selected_plan['GapID']].iloc[0]
-                    new_current_level = gap_info['RequiredLevel']  # پس از تکمیل برنامه، سطح فعلی برابر سطح مورد نیاز می‌شود
-                    gaps_df.loc[gaps_df['GapID'] == selected_plan['GapID'], 'CurrentLevel'] = new_current_level
-                    gaps_df.loc[gaps_df['GapID'] == selected_plan['GapID'], 'GapSize'] = 0
-                    
-                    tms.save_sheet(gaps_df, 'Gaps')
+                transaction.update('Gaps', 'GapID', selected_plan['GapID'],
+                                   {'Status': 'حل شده', 'CurrentLevel': new_current_level, 'GapSize': 0})
             
-            if tms.save_sheet(development_df, 'Development_Plans'):
+            if tms.commit(transaction):
+                st.session_state.pop(snapshot_key, None)
                 st.success("✅ پیشرفت برنامه با موفقیت به‌روزرسانی شد!")
                 st.rerun()
+            else:
+                st.session_state[snapshot_key] = current_values
+        else:
+            st.session_state[snapshot_key] = current_values
         
         # نمایش نمودار پیشرفت
         st.write("### نمودار پیشرفت برنامه‌ها:")
@@ -1605,34 +1722,24 @@ def effectiveness_report():
     """گزارش اثربخشی برنامه‌های توسعه"""
     st.subheader("📈 گزارش اثربخشی برنامه‌های توسعه")
     
-    development_df = tms.load_sheet('Development_Plans')
-    gaps_df = tms.load_sheet('Gaps')
-    employees_df = tms.load_sheet('Employees')
+    plans = ('Development_Plans', ['GapID', 'PlanName', 'PlanType', 'Cost', 'Progress', 'Status'])
+    summary = tms.analytics(effectiveness_summary, [plans])
     
-    if not development_df.empty:
-        # محاسبه اثربخشی
-        completed_plans = development_df[development_df['Status'] == 'تکمیل شده']
-        total_plans = len(development_df)
-        completion_rate = (len(completed_plans) / total_plans * 100) if total_plans > 0 else 0
-        
+    if summary['total_plans'] > 0:
         # کارت‌های اثربخشی
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("📋 کل برنامه‌ها", total_plans)
+            st.metric("📋 کل برنامه‌ها", summary['total_plans'])
         
         with col2:
-            st.metric("✅ برنامه‌های تکمیل شده", len(completed_plans))
+            st.metric("✅ برنامه‌های تکمیل شده", summary['completed_plans'])
         
         with col3:
-            st.metric("📊 نرخ تکمیل", f"{completion_rate:.1f}%")
+            st.metric("📊 نرخ تکمیل", f"{summary['completion_rate']:.1f}%")
         
         with col4:
-            if 'Cost' in development_df.columns:
-                total_investment = development_df['Cost'].sum()
-            else:
-                total_investment = 0
-            st.metric("💰 سرمایه‌گذاری کل", f"{total_investment:,} ریال")
+            st.metric("💰 سرمایه‌گذاری کل", format_rial(summary['total_investment']))
         
         # تحلیل هزینه-اثربخشی
         st.write("### تحلیل هزینه-اثربخشی")
@@ -1641,55 +1748,33 @@ def effectiveness_report():
         
         with col1:
             # هزینه بر اساس نوع برنامه
-            if 'PlanType' in development_df.columns and 'Cost' in development_df.columns:
-                cost_by_type = development_df.groupby('PlanType')['Cost'].sum()
-                if not cost_by_type.empty:
-                    fig_cost_type = px.pie(
-                        values=cost_by_type.values,
-                        names=cost_by_type.index,
-                        title="توزیع هزینه بر اساس نوع برنامه"
-                    )
-                    st.plotly_chart(fig_cost_type, use_container_width=True)
+            cost_by_type = tms.analytics(group_total, [plans], 'PlanType', 'Cost', 'sum')
+            if not cost_by_type.empty:
+                fig_cost_type = px.pie(
+                    values=cost_by_type.values,
+                    names=cost_by_type.index,
+                    title="توزیع هزینه بر اساس نوع برنامه"
+                )
+                st.plotly_chart(fig_cost_type, use_container_width=True)
         
         with col2:
             # اثربخشی بر اساس نوع برنامه
-            if 'PlanType' in development_df.columns and 'Progress' in development_df.columns:
-                effectiveness_by_type = development_df.groupby('PlanType')['Progress'].mean()
-                if not effectiveness_by_type.empty:
-                    fig_effectiveness = px.bar(
-                        x=effectiveness_by_type.values,
-                        y=effectiveness_by_type.index,
-                        title="میانگین پیشرفت بر اساس نوع برنامه",
-                        orientation='h'
-                    )
-                    st.plotly_chart(fig_effectiveness, use_container_width=True)
+            effectiveness_by_type = tms.analytics(group_total, [plans], 'PlanType', 'Progress', 'mean')
+            if not effectiveness_by_type.empty:
+                fig_effectiveness = px.bar(
+                    x=effectiveness_by_type.values,
+                    y=effectiveness_by_type.index,
+                    title="میانگین پیشرفت بر اساس نوع برنامه",
+                    orientation='h'
+                )
+                st.plotly_chart(fig_effectiveness, use_container_width=True)
         
         # ROI تحلیلی
         st.write("### بازگشت سرمایه (ROI) تحلیلی")
         
-        if not completed_plans.empty and not gaps_df.empty:
-            # محاسبه ROI ساده
-            completed_with_gaps = completed_plans.merge(
-                gaps_df[['GapID', 'GapSize', 'ImpactOnTeam', 'ImpactOnOrg']],
-                on='GapID', how='left'
-            )
-            
-            # امتیازدهی به تأثیرات
-            impact_score = {
-                'کم': 1,
-                'متوسط': 2,
-                'زیاد': 3
-            }
-            
-            completed_with_gaps['TeamImpactScore'] = completed_with_gaps['ImpactOnTeam'].map(impact_score)
-            completed_with_gaps['OrgImpactScore'] = completed_with_gaps['ImpactOnOrg'].map(impact_score)
-            completed_with_gaps['TotalImpact'] = completed_with_gaps['TeamImpactScore'] + completed_with_gaps['OrgImpactScore']
-            
-            # ROI ساده
-            if 'Cost' in completed_with_gaps.columns:
-                completed_with_gaps['ROI'] = (completed_with_gaps['TotalImpact'] * 1000000) / completed_with_gaps['Cost']
-                completed_with_gaps['ROI'] = completed_with_gaps['ROI'].replace([np.inf, -np.inf], 0)
-            
+        completed_with_gaps = tms.analytics(completed_plan_roi, [plans, GAP_FACTS])
+        if not completed_with_gaps.empty:
+            if 'ROI' in completed_with_gaps.columns:
                 st.dataframe(
                     completed_with_gaps[['PlanName', 'PlanType', 'Cost', 'TotalImpact', 'ROI']],
                     use_container_width=True,
@@ -1717,8 +1802,8 @@ def financial_analysis():
     """تحلیل مالی برنامه‌های توسعه"""
     st.subheader("💰 تحلیل مالی برنامه‌های توسعه")
     
-    development_df = tms.load_sheet('Development_Plans')
-    gaps_df = tms.load_sheet('Gaps')
+    plans = ('Development_Plans', ['GapID', 'PlanName', 'PlanType', 'StartDate', 'Cost', 'Status'])
+    development_df = tms.load_sheet(*plans)
     
     if not development_df.empty:
         # تحلیل هزینه‌ها
@@ -1726,26 +1811,23 @@ def financial_analysis():
         
         with col1:
             # توزیع هزینه‌ها بر اساس وضعیت
-            if 'Status' in development_df.columns and 'Cost' in development_df.columns:
-                cost_by_status = development_df.groupby('Status')['Cost'].sum()
-                if not cost_by_status.empty:
-                    fig_cost_status = px.pie(
-                        values=cost_by_status.values,
-                        names=cost_by_status.index,
-                        title="توزیع هزینه‌ها بر اساس وضعیت برنامه"
-                    )
-                    st.plotly_chart(fig_cost_status, use_container_width=True)
+            cost_by_status = tms.analytics(group_total, [plans], 'Status', 'Cost', 'sum')
+            if not cost_by_status.empty:
+                fig_cost_status = px.pie(
+                    values=cost_by_status.values,
+                    names=cost_by_status.index,
+                    title="توزیع هزینه‌ها بر اساس وضعیت برنامه"
+                )
+                st.plotly_chart(fig_cost_status, use_container_width=True)
         
         with col2:
             # هزینه‌های ماهانه
             if 'StartDate' in development_df.columns and 'Cost' in development_df.columns:
-                development_df['StartDate'] = pd.to_datetime(development_df['StartDate'])
-                monthly_costs = development_df.groupby(development_df['StartDate'].dt.to_period('M'))['Cost'].sum()
-                monthly_costs.index = monthly_costs.index.astype(str)
+                monthly = tms.analytics(monthly_costs, [plans])
                 
                 fig_monthly = px.line(
-                    x=monthly_costs.index,
-                    y=monthly_costs.values,
+                    x=monthly.index,
+                    y=monthly.values,
                     title="هزینه‌های ماهانه برنامه‌های توسعه",
                     labels={'x': 'ماه', 'y': 'هزینه (ریال)'}
                 )
@@ -1754,70 +1836,40 @@ def financial_analysis():
         # تحلیل بازگشت سرمایه
         st.write("### 📊 تحلیل بازگشت سرمایه (ROI)")
         
-        if not gaps_df.empty:
-            # محاسبه ROI پیشرفته
-            development_with_gaps = development_df.merge(
-                gaps_df[['GapID', 'GapSize', 'ImpactOnTeam', 'ImpactOnOrg', 'Urgency']],
-                on='GapID', how='left'
+        # امتیاز ROI پیشرفته: اندازه شکاف × تأثیرها × ضریب فوریت به ازای هزینه
+        development_with_gaps = tms.analytics(roi_scores, [plans, GAP_FACTS])
+        if 'ROI_Score' in development_with_gaps.columns:
+            # نمایش ROI
+            st.dataframe(
+                development_with_gaps[['PlanName', 'PlanType', 'Cost', 'GapSize', 'ROI_Score']],
+                use_container_width=True,
+                hide_index=True
             )
             
-            # سیستم امتیازدهی پیشرفته
-            urgency_multiplier = {
-                'کم': 1,
-                'متوسط': 1.5,
-                'زیاد': 2
-            }
-            
-            impact_score = {
-                'کم': 1,
-                'متوسط': 2,
-                'زیاد': 3
-            }
-            
-            if 'Cost' in development_with_gaps.columns:
-                development_with_gaps['ROI_Score'] = (
-                    development_with_gaps['GapSize'] * 
-                    development_with_gaps['ImpactOnTeam'].map(impact_score) * 
-                    development_with_gaps['ImpactOnOrg'].map(impact_score) *
-                    development_with_gaps['Urgency'].map(urgency_multiplier) *
-                    1000000 / development_with_gaps['Cost']
-                )
-                
-                development_with_gaps['ROI_Score'] = development_with_gaps['ROI_Score'].replace([np.inf, -np.inf], 0)
-                
-                # نمایش ROI
-                st.dataframe(
-                    development_with_gaps[['PlanName', 'PlanType', 'Cost', 'GapSize', 'ROI_Score']].sort_values('ROI_Score', ascending=False),
-                    use_container_width=True,
-                    hide_index=True
-                )
-                
-                # نمودار ROI
-                fig_roi_advanced = px.scatter(
-                    development_with_gaps,
-                    x='Cost',
-                    y='ROI_Score',
-                    size='GapSize',
-                    color='PlanType',
-                    title="تحلیل پیشرفته ROI",
-                    hover_data=['PlanName']
-                )
-                st.plotly_chart(fig_roi_advanced, use_container_width=True)
+            # نمودار ROI
+            fig_roi_advanced = px.scatter(
+                development_with_gaps,
+                x='Cost',
+                y='ROI_Score',
+                size='GapSize',
+                color='PlanType',
+                title="تحلیل پیشرفته ROI",
+                hover_data=['PlanName']
+            )
+            st.plotly_chart(fig_roi_advanced, use_container_width=True)
         
         # پیش‌بینی هزینه‌های آینده
         st.write("### 🔮 پیش‌بینی هزینه‌های آینده")
         
-        planned_plans = development_df[development_df['Status'] == 'برنامه‌ریزی شده']
-        total_planned_cost = planned_plans['Cost'].sum() if not planned_plans.empty and 'Cost' in planned_plans.columns else 0
+        forecast = tms.analytics(planned_cost_forecast, [plans])
         
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("💰 هزینه‌های برنامه‌ریزی شده", f"{total_planned_cost:,} ریال")
+            st.metric("💰 هزینه‌های برنامه‌ریزی شده", format_rial(forecast['total_cost']))
         with col2:
-            st.metric("📋 تعداد برنامه‌های آینده", len(planned_plans))
+            st.metric("📋 تعداد برنامه‌های آینده", forecast['count'])
         with col3:
-            avg_planned_cost = total_planned_cost / len(planned_plans) if len(planned_plans) > 0 else 0
-            st.metric("💵 میانگین هزینه برنامه", f"{avg_planned_cost:,.0f} ریال")
+            st.metric("💵 میانگین هزینه برنامه", format_rial(forecast['avg_cost']))
     
     else:
         st.info("💰 داده‌ای برای تحلیل مالی وجود ندارد")
@@ -1826,7 +1878,8 @@ def data_management():
     """مدیریت داده‌ها"""
     st.markdown("## 🗃️ مدیریت داده‌ها و گزارش‌گیری")
     
-    tab1, tab2, tab3, tab4 = st.tabs(["📥 نمونه‌سازی", "📊 گزارش‌های جامع", "📤 خروجی‌گیری", "⚙️ تنظیمات سیستم"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📥 نمونه‌سازی", "📦 ورود انبوه", "📊 گزارش‌های جامع",
+                                            "📤 خروجی‌گیری", "⚙️ تنظیمات سیستم"])
     
     with tab1:
         st.subheader("ایجاد داده‌های نمونه")
@@ -1844,25 +1897,106 @@ def data_management():
         st.write("✅ ۳ برنامه توسعه")
         st.write("✅ ۴ دوره آموزشی")
         st.write("✅ ۴ شاخص عملکرد (KPI)")
+        
+        st.write("---")
+        st.subheader("سازمان ساختگی بزرگ")
+        st.write("تولید سازمانی کامل با سلسله‌مراتب مدیریتی، شکاف‌ها، برنامه‌ها، سوابق آموزشی و KPI برای آزمون کارایی. "
+                 "داده‌های فعلی جایگزین می‌شوند.")
+        col1, col2 = st.columns(2)
+        with col1:
+            org_size = st.selectbox("تعداد کارکنان", list(ORG_SIZES), key="synthetic_size")
+        with col2:
+            org_seed = st.number_input("seed", min_value=0, value=0, step=1, key="synthetic_seed")
+        if st.button("🏭 ایجاد سازمان ساختگی", use_container_width=True):
+            with st.spinner("در حال تولید و ذخیره داده‌ها..."):
+                created = tms.generate_synthetic_org(ORG_SIZES[org_size], seed=int(org_seed))
+            if created:
+                st.rerun()
+        
+        st.write("---")
+        st.subheader("توصیه دوره برای همه شکاف‌ها")
+        st.write("همه شکاف‌های باز با همه دوره‌ها امتیازدهی و دوره‌های برتر هر شکاف ذخیره می‌شوند "
+                 "(تطبیق شایستگی، سطح دوره، هزینه، مدت، نوع ارائه و فوریت شکاف).")
+        top_k = st.number_input("تعداد دوره برای هر شکاف", min_value=1, max_value=20, value=TOP_K, step=1,
+                                key="recommendation_top_k")
+        if st.button("🎓 محاسبه توصیه‌های دوره", use_container_width=True):
+            with st.spinner("در حال امتیازدهی شکاف‌ها و دوره‌ها..."):
+                recommendations = tms.refresh_recommendations(int(top_k))
+            if recommendations is not None:
+                st.success(f"✅ {len(recommendations):,} توصیه برای {recommendations['GapID'].nunique():,} شکاف ذخیره شد!")
     
     with tab2:
-        show_comprehensive_reports()
+        bulk_import()
     
     with tab3:
-        export_data()
+        show_comprehensive_reports()
     
     with tab4:
+        export_data()
+    
+    with tab5:
         system_settings()
 
+def bulk_import():
+    """ورود انبوه کارکنان، شکاف‌ها و برنامه‌های توسعه از فایل CSV یا اکسل"""
+    st.subheader("📦 ورود انبوه داده")
+    st.write("ردیف‌های فایل به صورت دسته‌ای اعتبارسنجی می‌شوند؛ ردیف‌های معتبر یکجا ثبت و ردیف‌های نامعتبر گزارش می‌شوند.")
+    
+    sheet_titles = {rules['title']: sheet_name for sheet_name, rules in IMPORT_RULES.items()}
+    selected_title = st.selectbox("نوع داده", list(sheet_titles.keys()))
+    sheet_name = sheet_titles[selected_title]
+    st.caption(f"ستون‌های اجباری: {', '.join(IMPORT_RULES[sheet_name]['required'])}")
+    
+    uploaded_file = st.file_uploader("فایل CSV یا اکسل", type=['csv', 'xlsx'], key="bulk_import_file")
+    dry_run = st.checkbox("فقط اعتبارسنجی (بدون ثبت)")
+    
+    if uploaded_file is not None and st.button("📦 شروع ورود", use_container_width=True):
+        try:
+            with st.spinner("در حال خواندن و اعتبارسنجی فایل..."):
+                report = import_file(tms.storage, sheet_name, uploaded_file, dry_run=dry_run)
+        except VersionConflict:
+            st.warning("⚠️ داده‌ها همزمان توسط کاربر دیگری تغییر کرده‌اند؛ دوباره تلاش کنید.")
+            return
+        except Exception as e:
+            st.error(f"خطا در ورود فایل: {e}")
+            return
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("کل ردیف‌ها", report.total)
+        with col2:
+            st.metric("پذیرفته", report.accepted)
+        with col3:
+            st.metric("ردشده", report.rejected_count)
+        
+        if report.committed:
+            st.success(f"✅ {report.accepted} ردیف در {report.seconds:.1f} ثانیه ثبت شد!")
+        elif dry_run:
+            st.info("اعتبارسنجی انجام شد؛ داده‌ای ثبت نشد.")
+        if report.ignored_columns:
+            st.warning(f"⚠️ ستون‌های ناشناخته نادیده گرفته شدند: {', '.join(report.ignored_columns)}")
+        if report.rejected_count:
+            st.write("### ردیف‌های ردشده")
+            st.dataframe(report.rejected.head(1000), use_container_width=True)
+            st.download_button(
+                label="📥 دانلود گزارش ردیف‌های ردشده",
+                data=report.rejected.to_csv(index=False).encode('utf-8-sig'),
+                file_name=f"{sheet_name}_rejects.csv",
+                mime="text/csv"
+            )
+
 def show_comprehensive_reports():
     """گزارش‌های جامع"""
     st.subheader("📊 گزارش‌های جامع تحلیلی")
     
-    # بارگذاری تمام داده‌ها
-    employees_df = tms.load_sheet('Employees')
-    gaps_df = tms.load_sheet('Gaps')
-    development_df = tms.load_sheet('Development_Plans')
-    kpi_df = tms.load_sheet('KPI')
+    # فقط ستون‌های مورد نیاز گزارش‌ها؛ محاسبات تا تغییر داده از کش talent_analytics خوانده می‌شوند
+    employees = ('Employees', ['EmployeeID', 'CareerStage', 'MotivationScore'])
+    plans = ('Development_Plans', ['PlanType', 'Cost', 'Progress'])
+    # شاخص‌های شکاف به تفکیک واحد و وضعیت از مکعب شکاف‌ها
+    cube = tms.analytics(gap_cube, [GAP_FACTS])
+    gap_count = cube.total()['count']
+    employees_df = tms.load_sheet(*employees)
+    development_df = tms.load_sheet(*plans)
     
     if not employees_df.empty:
         col1, col2 = st.columns(2)
@@ -1873,7 +2007,7 @@ def show_comprehensive_reports():
             
             # توزیع مرحله شغلی
             if 'CareerStage' in employees_df.columns:
-                stage_dist = employees_df['CareerStage'].value_counts()
+                stage_dist = tms.analytics(distribution, [employees], 'CareerStage')
                 fig_stage = px.bar(
                     x=stage_dist.values,
                     y=stage_dist.index,
@@ -1883,27 +2017,26 @@ def show_comprehensive_reports():
                 st.plotly_chart(fig_stage, use_container_width=True)
             
             # تحلیل انگیزه
-            if 'MotivationScore' in employees_df.columns and 'CareerStage' in employees_df.columns:
-                motivation_analysis = employees_df.groupby('CareerStage')['MotivationScore'].mean()
-                if not motivation_analysis.empty:
-                    fig_motivation = px.line(
-                        x=motivation_analysis.index,
-                        y=motivation_analysis.values,
-                        title="میانگین انگیزه بر اساس مرحله شغلی"
-                    )
-                    st.plotly_chart(fig_motivation, use_container_width=True)
+            motivation_analysis = tms.analytics(group_total, [employees], 'CareerStage', 'MotivationScore', 'mean')
+            if not motivation_analysis.empty:
+                fig_motivation = px.line(
+                    x=motivation_analysis.index,
+                    y=motivation_analysis.values,
+                    title="میانگین انگیزه بر اساس مرحله شغلی"
+                )
+                st.plotly_chart(fig_motivation, use_container_width=True)
         
         with col2:
             # گزارش شکاف‌ها و توسعه
             st.write("### 🎯 تحلیل شکاف‌ها و توسعه")
             
-            if not gaps_df.empty and not development_df.empty:
+            if gap_count and not development_df.empty:
                 # اثربخشی برنامه‌های توسعه
-                gap_closure_rate = len(gaps_df[gaps_df['Status'] == 'حل شده']) / len(gaps_df) * 100
+                gap_closure = cube.total({'Status': GAP_SOLVED})['count'] / gap_count * 100
                 
                 fig_closure = go.Figure(go.Indicator(
                     mode="gauge+number+delta",
-                    value=gap_closure_rate,
+                    value=gap_closure,
                     domain={'x': [0, 1], 'y': [0, 1]},
                     title={'text': "نرخ رفع شکاف‌ها"},
                     gauge={'axis': {'range': [None, 100]},
@@ -1916,52 +2049,45 @@ def show_comprehensive_reports():
                 st.plotly_chart(fig_closure, use_container_width=True)
             
             # تحلیل هزینه-فایده
-            if not development_df.empty and 'PlanType' in development_df.columns and 'Cost' in development_df.columns and 'Progress' in development_df.columns:
-                cost_effectiveness = development_df.groupby('PlanType').agg({
-                    'Cost': 'sum',
-                    'Progress': 'mean'
-                }).reset_index()
-                
-                if not cost_effectiveness.empty:
-                    fig_cost_effect = px.scatter(
-                        cost_effectiveness,
-                        x='Cost',
-                        y='Progress',
-                        size='Cost',
-                        color='PlanType',
-                        title="تحلیل هزینه-اثربخشی برنامه‌ها"
-                    )
-                    st.plotly_chart(fig_cost_effect, use_container_width=True)
+            cost_effect = tms.analytics(cost_effectiveness, [plans])
+            if not cost_effect.empty:
+                fig_cost_effect = px.scatter(
+                    cost_effect,
+                    x='Cost',
+                    y='Progress',
+                    size='Cost',
+                    color='PlanType',
+                    title="تحلیل هزینه-اثربخشی برنامه‌ها"
+                )
+                st.plotly_chart(fig_cost_effect, use_container_width=True)
         
         # گزارش عملکرد واحدها
         st.write("### 🏢 گزارش عملکرد واحدهای سازمانی")
         
-        if not employees_df.empty and not gaps_df.empty and 'Unit' in employees_df.columns:
-            unit_analysis = gaps_df.merge(
-                employees_df[['EmployeeID', 'Unit']],
-                on='EmployeeID', how='left'
+        unit_perf = cube.slice(['Unit']).rename(columns={
+            'count': 'GapID', 'gap_size': 'GapSize', 'cost': 'CostEstimate'
+        }).reset_index()
+        if not unit_perf.empty:
+            fig_unit_perf = px.bar(
+                unit_perf,
+                x='Unit',
+                y='GapID',
+                color='GapSize',
+                title="تعداد و میانگین شکاف‌ها به تفکیک واحد",
+                hover_data=['CostEstimate']
             )
-            
-            if not unit_analysis.empty and 'Unit' in unit_analysis.columns:
-                unit_performance = unit_analysis.groupby('Unit').agg({
-                    'GapID': 'count',
-                    'GapSize': 'mean',
-                    'CostEstimate': 'sum'
-                }).reset_index()
-                
-                fig_unit_perf = px.bar(
-                    unit_performance,
-                    x='Unit',
-                    y='GapID',
-                    color='GapSize',
-                    title="تعداد و میانگین شکاف‌ها به تفکیک واحد",
-                    hover_data=['CostEstimate']
-                )
-                st.plotly_chart(fig_unit_perf, use_container_width=True)
+            st.plotly_chart(fig_unit_perf, use_container_width=True)
     
     else:
         st.info("📊 داده‌ای برای گزارش‌گیری وجود ندارد")
 
+def export_buffer(writer, data):
+    """ساخت فایل خروجی در حافظه (بدون فایل موقت روی دیسک)"""
+    buffer = io.BytesIO()
+    writer(buffer, data)
+    buffer.seek(0)
+    return buffer
+
 def export_data():
     """خروجی‌گیری داده‌ها"""
     st.subheader("📤 خروجی‌گیری داده‌ها")
@@ -1983,62 +2109,46 @@ def export_data():
     if not df.empty:
         st.info(f"📊 تعداد رکوردهای {selected_sheet}: {len(df)}")
         
-        # نمایش پیش‌نمایش
-        st.dataframe(df, use_container_width=True, hide_index=True)
+        # نمایش پیش‌نمایش (صفحه‌بندی‌شده؛ فایل‌های خروجی همه رکوردها را دارند)
+        show_paged_table(df, f"export_{sheets[selected_sheet]}")
         
+        sheet_name = sheets[selected_sheet]
+        stamp = datetime.now().strftime('%Y%m%d')
         col1, col2 = st.columns(2)
         
+        # فایل‌ها در حافظه و فقط هنگام کلیک روی دکمه دانلود ساخته می‌شوند
         with col1:
-            # خروجی Excel
-            try:
-                excel_buffer = pd.ExcelWriter(f"{selected_sheet}_export.xlsx", engine='openpyxl')
-                df.to_excel(excel_buffer, index=False)
-                excel_buffer.close()
-                
-                with open(f"{selected_sheet}_export.xlsx", "rb") as file:
-                    st.download_button(
-                        label="📥 دانلود Excel",
-                        data=file,
-                        file_name=f"{selected_sheet}_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                        mime="application/vnd.ms-excel"
-                    )
-            except Exception as e:
-                st.error(f"خطا در ایجاد فایل Excel: {e}")
+            st.download_button(
+                label="📥 دانلود Excel",
+                data=lambda: export_buffer(write_workbook, {sheet_name: df}),
+                file_name=f"{selected_sheet}_{stamp}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
         
         with col2:
-            # خروجی CSV
-            csv_data = df.to_csv(index=False, encoding='utf-8-sig')
             st.download_button(
                 label="📥 دانلود CSV",
-                data=csv_data,
-                file_name=f"{selected_sheet}_{datetime.now().strftime('%Y%m%d')}.csv",
+                data=lambda: export_buffer(write_csv, df),
+                file_name=f"{selected_sheet}_{stamp}.csv",
                 mime="text/csv"
             )
         
-        # خروجی کلی
+        # خروجی کلی: شیت‌ها یکی‌یکی بارگذاری و به صورت جریانی در فایل نوشته می‌شوند
         st.write("### خروجی کلی سیستم")
-        if st.button("📦 خروجی کامل سیستم در یک فایل Excel"):
-            try:
-                all_data = {}
-                for sheet_name in sheets.values():
-                    all_data[sheet_name] = tms.load_sheet(sheet_name)
-                
-                output_file = f"complete_talent_system_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
-                
-                with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-                    for sheet_name, sheet_data in all_data.items():
-                        if not sheet_data.empty:
-                            sheet_data.to_excel(writer, sheet_name=sheet_name, index=False)
-                
-                with open(output_file, "rb") as file:
-                    st.download_button(
-                        label="📥 دانلود فایل کامل سیستم",
-                        data=file,
-                        file_name=output_file,
-                        mime="application/vnd.ms-excel"
-                    )
-            except Exception as e:
-                st.error(f"خطا در ایجاد خروجی: {e}")
+        storage = tms.storage
+        
+        def all_sheets():
+            for name in sheets.values():
+                sheet_data = storage.load_sheet(name)
+                if not sheet_data.empty:
+                    yield name, sheet_data
+        
+        st.download_button(
+            label="📦 خروجی کامل سیستم در یک فایل Excel",
+            data=lambda: export_buffer(write_workbook, all_sheets()),
+            file_name=f"complete_talent_system_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
     
     else:
         st.info("📝 داده‌ای برای خروجی‌گیری وجود ندارد")
@@ -2054,13 +2164,13 @@ def system_settings():
         st.write(f"**تاریخ ایجاد:** {datetime.now().strftime('%Y/%m/%d %H:%M')}")
         st.write(f"**ورژن:** ۴.۰ - سیستم کامل")
         st.write(f"**تعداد جداول:** ۸")
-        st.write(f"**فایل داده:** {DATA_FILE}")
+        st.write(f"**موتور ذخیره‌سازی:** {tms.storage.describe()}")
         st.write(f"**تعداد ماژول‌ها:** ۵")
         
         # آمار سیستم
-        employees_df = tms.load_sheet('Employees')
-        gaps_df = tms.load_sheet('Gaps')
-        development_df = tms.load_sheet('Development_Plans')
+        employees_df = tms.load_sheet('Employees', columns=['EmployeeID'])
+        gaps_df = tms.load_sheet('Gaps', columns=['GapID'])
+        development_df = tms.load_sheet('Development_Plans', columns=['PlanID'])
         
         st.write("### آمار سیستم")
         st.write(f"**کارکنان:** {len(employees_df) if not employees_df.empty else 0}")
@@ -2075,11 +2185,19 @@ def system_settings():
         
         if st.button("🧹 بازنشانی سیستم", use_container_width=True):
             if st.checkbox("آیا مطمئن هستید؟ تمام داده‌ها پاک خواهند شد!"):
-                if os.path.exists(DATA_FILE):
-                    os.remove(DATA_FILE)
+                tms.storage.reset()
                 st.success("✅ سیستم بازنشانی شد!")
                 st.rerun()
         
+        # ورود داده از فایل اکسل به موتور ذخیره‌سازی فعلی
+        uploaded_workbook = st.file_uploader("📥 ورود داده از فایل اکسل", type=['xlsx'])
+        if uploaded_workbook is not None and st.button("📥 ورود شیت‌ها", use_container_width=True):
+            try:
+                imported_sheets = tms.storage.import_workbook(uploaded_workbook)
+                st.success(f"✅ {len(imported_sheets)} شیت با موفقیت وارد شد!")
+            except Exception as e:
+                st.error(f"خطا در ورود فایل: {e}")
+        
         if st.button("📋 لاگ سیستم", use_container_width=True):
             show_system_log()
         
@@ -2137,6 +2255,94 @@ def show_system_log():
     for log in log_entries:
         st.write(f"`{log}`")
 
+ORG_ROLLUP_INPUTS = [('Organization', ORG_COLUMNS), GAP_FACTS, ('Employees', ['EmployeeID', 'Unit']),
+                     ('KPI', ['EmployeeID', 'Variance']), ('Development_Plans', ['GapID', 'Cost'])]
+
+def show_org_hierarchy():
+    """ساختار سازمانی: سنجه‌های تجمیعی هر معاونت و واحد با drill-down روی درخت Organization"""
+    st.header("🏢 ساختار سازمانی")
+    rollup = tms.analytics(org_rollup, ORG_ROLLUP_INPUTS)
+    hierarchy = rollup.hierarchy
+    if not hierarchy.codes:
+        st.info("📝 ساختار سازمانی تعریف نشده است.")
+        return
+    if hierarchy.cycles or hierarchy.orphans:
+        st.warning(f"⚠️ واحدهای با والد نامعتبر یا حلقه در ساختار (به عنوان ریشه نمایش داده می‌شوند): "
+                   f"{'، '.join((hierarchy.orphans + hierarchy.cycles)[:10])}")
+    
+    # انتخاب هر سطح یک سطح پایین‌تر می‌رود (سازمان ← معاونت ← واحد ← ...)
+    selected = None
+    options = hierarchy.roots
+    level = 0
+    while options:
+        choice = st.selectbox(f"سطح {level + 1}", [ALL] + options, key=f"org_level_{level}",
+                              format_func=lambda code: code if code == ALL else hierarchy.title(code))
+        if choice == ALL:
+            break
+        selected = choice
+        options = hierarchy.children(selected)
+        level += 1
+    
+    totals = rollup.totals(selected)
+    st.subheader(hierarchy.title(selected) if selected else "کل سازمان")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("تعداد کارکنان", f"{totals['headcount']:,}")
+    col2.metric("شکاف‌های باز", f"{totals['open_gaps']:,}", f"{totals['critical_gaps']:,} بحرانی", delta_color="off")
+    col3.metric("هزینه برآوردی شکاف‌ها", f"{totals['gap_cost']:,.0f}")
+    col4.metric("میانگین انحراف KPI", f"{totals['kpi_variance']:.1f}" if pd.notna(totals['kpi_variance']) else '-')
+    
+    drill_down = rollup.drill(selected)
+    if not drill_down.empty:
+        st.write("### زیرواحدها")
+        fig = px.bar(drill_down.reset_index(), x='Code', y=['open_gaps', 'critical_gaps'], barmode='group',
+                     title="شکاف‌های باز و بحرانی زیرواحدها", hover_data=['Title'])
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(drill_down.rename(columns=ROLLUP_TITLES).rename(columns={'Title': 'عنوان'}),
+                     use_container_width=True)
+    if selected is None and rollup.unassigned.any():
+        st.caption(f"{int(rollup.unassigned['headcount']):,} کارمند و {int(rollup.unassigned['gaps']):,} شکاف "
+                   "در واحدهای ثبت‌نشده در ساختار سازمانی فقط در کل سازمان شمرده شده‌اند.")
+
+SEARCH_LIMIT = 50
+SEARCH_TITLES = {'Employees': "👥 کارکنان", 'Gaps': "🎯 شکاف‌ها", 'Development_Plans': "📈 برنامه‌های توسعه"}
+SEARCH_COLUMNS = {
+    'Employees': ['EmployeeID', 'FullName', 'JobTitle', 'Unit', 'Major', 'Specialization'],
+    'Gaps': ['GapID', 'EmployeeID', 'GapName', 'Description', 'Urgency', 'Status'],
+    'Development_Plans': ['PlanID', 'GapID', 'PlanName', 'Status', 'EndDate'],
+}
+
+def show_search():
+    """جستجوی متنی در کارکنان، شکاف‌ها و برنامه‌های توسعه"""
+    st.header("🔍 جستجو")
+    query = st.text_input("عبارت جستجو (نام، شغل، رشته، تخصص، شکاف یا برنامه)", key="search_query")
+    st.caption("نویسه‌های عربی و فارسی، نیم‌فاصله و ارقام یکسان در نظر گرفته می‌شوند؛ "
+               "هر واژه می‌تواند ابتدای یک واژه باشد.")
+    if not query.strip():
+        return
+    
+    for sheet_name, title in SEARCH_TITLES.items():
+        matches, total = tms.search(sheet_name, query, limit=SEARCH_LIMIT)
+        st.subheader(f"{title} ({total:,})")
+        if not matches:
+            st.info("نتیجه‌ای یافت نشد.")
+            continue
+        key_column = SEARCH_COLUMNS[sheet_name][0]
+        keys = [key for key, _ in matches]
+        # فقط ردیف‌های همین نتیجه‌ها خوانده می‌شوند، نه کل شیت
+        rows = tms.load_rows(sheet_name, key_column, keys, columns=SEARCH_COLUMNS[sheet_name])
+        if key_column not in rows.columns:
+            continue
+        rows = rows.drop_duplicates(key_column).set_index(key_column).reindex(keys).reset_index()
+        if sheet_name == 'Development_Plans' and 'GapID' in rows.columns:
+            # برنامه ستون کارمند ندارد؛ کارمند از شکاف مربوط به برنامه
+            gaps = tms.load_rows('Gaps', 'GapID', rows['GapID'].dropna().unique(), columns=['GapID', 'EmployeeID'])
+            if 'EmployeeID' in gaps.columns:
+                employees = gaps.drop_duplicates('GapID').set_index('GapID')['EmployeeID']
+                rows.insert(1, 'EmployeeID', rows['GapID'].map(employees))
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        if total > len(matches):
+            st.caption(f"{len(matches)} نتیجه اول از {total:,} نتیجه؛ برای نتیجه دقیق‌تر واژه‌های بیشتری وارد کنید.")
+
 def main():
     """تابع اصلی"""
     
@@ -2148,6 +2354,8 @@ def main():
         "👥 مدیریت کارکنان": employee_management,
         "🎯 مدیریت شکاف‌ها": gap_management,
         "📈 برنامه‌های توسعه": development_plan_management,
+        "🏢 ساختار سازمانی": show_org_hierarchy,
+        "🔍 جستجو": show_search,
         "🗃️ گزارش‌گیری پیشرفته": data_management
     }
     
@@ -2160,7 +2368,7 @@ def main():
     st.sidebar.markdown("---")
     st.sidebar.markdown(f"**آخرین به‌روزرسانی:** {datetime.now().strftime('%Y/%m/%d %H:%M')}")
     st.sidebar.markdown("**ورژن:** ۴.۰ - سیستم کامل")
-    st.sidebar.markdown("**تعداد جداول:** ۸")
+    st.sidebar.markdown("**تعداد جداول:** ۹")
     st.sidebar.markdown("**وضعیت:** 🟢 فعال")
 
 if __name__ == "__main__":
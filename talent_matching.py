@@ -0,0 +1,138 @@
+"""ایندکس تطبیق شایستگی با دوره‌های آموزشی برای پیشنهاد دوره به شکاف‌ها
+
+هر دوره با متن شایستگی مرتبط (LinkedCompetency)، نام شایستگی‌هایی که در Competencies.LinkedCourses به آن
+ارجاع داده‌اند و با وزن کمتر نام دوره توصیف می‌شود. متن‌ها با همان یکسان‌سازی جستجو (talent_search)
+به واژه و سه‌حرفی (trigram) شکسته و با وزن TF-IDF نرمال می‌شوند؛ امتیاز هر دوره میانگین شباهت کسینوسی
+واژه‌ها و سه‌حرفی‌هاست تا نام‌های نزدیک (مثلاً «برنامه نویسی پایتون» و «برنامه‌نویسی پیشرفته پایتون») هم
+پیدا شوند. ایندکس از طریق CompleteTalentSystem.analytics یک بار ساخته می‌شود و پیشنهادهای هر نام شکاف
+پس از اولین محاسبه از حافظه برمی‌گردد.
+"""
+import math
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from talent_search import normalize, tokenize
+
+COURSE_COLUMNS = ['CourseID', 'CourseName', 'Provider', 'LinkedCompetency', 'DurationHours', 'Cost',
+                  'DeliveryType', 'LevelExpectation']
+COMPETENCY_COLUMNS = ['CompetencyName', 'LinkedCourses']
+
+# وزن هر متن در توصیف دوره
+LINK_WEIGHT = 1.0
+NAME_WEIGHT = 0.5
+MATCH_THRESHOLD = 0.2
+SUGGESTION_LIMIT = 5
+_COURSE_LIST = re.compile(r'[\s,;،؛]+')
+
+
+def _features(text) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """واژه‌ها و سه‌حرفی‌های یک متن"""
+    words = tokenize(text)
+    grams = []
+    for word in words:
+        padded = f" {word} "
+        grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return words, tuple(grams)
+
+
+class _Vectors:
+    """بردارهای TF-IDF نرمال‌شده دوره‌ها برای یک نوع ویژگی، به صورت فهرست ردیف‌های هر ویژگی"""
+
+    def __init__(self, documents: List[Dict[str, float]]):
+        n = len(documents)
+        frequency: Dict[str, int] = {}
+        for document in documents:
+            for feature in document:
+                frequency[feature] = frequency.get(feature, 0) + 1
+        self.idf = {feature: math.log(1 + n / count) for feature, count in frequency.items()}
+        rows: Dict[str, List[int]] = {}
+        weights: Dict[str, List[float]] = {}
+        for row, document in enumerate(documents):
+            vector = {feature: weight * self.idf[feature] for feature, weight in document.items()}
+            norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+            for feature, value in vector.items():
+                rows.setdefault(feature, []).append(row)
+                weights.setdefault(feature, []).append(value / norm)
+        self.postings = {feature: (np.asarray(rows[feature], dtype=np.int64),
+                                   np.asarray(weights[feature], dtype=float)) for feature in rows}
+        self.size = n
+
+    def cosine(self, features) -> np.ndarray:
+        """شباهت کسینوسی یک متن (فهرست ویژگی‌ها) با همه دوره‌ها"""
+        scores = np.zeros(self.size)
+        counts: Dict[str, int] = {}
+        for feature in features:
+            if feature in self.postings:
+                counts[feature] = counts.get(feature, 0) + 1
+        if not counts:
+            return scores
+        vector = {feature: count * self.idf[feature] for feature, count in counts.items()}
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        for feature, value in vector.items():
+            rows, weights = self.postings[feature]
+            scores[rows] += weights * (value / norm)
+        return scores
+
+
+class CourseMatcher:
+    """ایندکس تطبیق متن شایستگی/شکاف با دوره‌ها و حافظه پیشنهادهای هر متن"""
+
+    def __init__(self, courses: pd.DataFrame, competencies: pd.DataFrame):
+        self.courses = courses.reset_index(drop=True)
+        n = len(self.courses)
+        texts: List[List[Tuple[object, float]]] = [[] for _ in range(n)]
+        for column, weight in (('LinkedCompetency', LINK_WEIGHT), ('CourseName', NAME_WEIGHT)):
+            if column in self.courses.columns:
+                for row, value in enumerate(self.courses[column].tolist()):
+                    texts[row].append((value, weight))
+        if 'CourseID' in self.courses.columns and {'CompetencyName', 'LinkedCourses'} <= set(competencies.columns):
+            rows = {course_id: row for row, course_id in enumerate(self.courses['CourseID'].tolist())}
+            links = competencies[['CompetencyName', 'LinkedCourses']].dropna().drop_duplicates()
+            for name, linked in links.itertuples(index=False):
+                for course_id in _COURSE_LIST.split(str(linked)):
+                    if course_id in rows:
+                        texts[rows[course_id]].append((name, LINK_WEIGHT))
+        words, grams = [], []
+        for course_texts in texts:
+            course_words, course_grams = {}, {}
+            for text, weight in course_texts:
+                text_words, text_grams = _features(text)
+                for feature in text_words:
+                    course_words[feature] = max(course_words.get(feature, 0), weight)
+                for feature in text_grams:
+                    course_grams[feature] = max(course_grams.get(feature, 0), weight)
+            words.append(course_words)
+            grams.append(course_grams)
+        self._words = _Vectors(words)
+        self._grams = _Vectors(grams)
+        self._suggestions: Dict[tuple, pd.DataFrame] = {}
+        # پیشنهادهای نام همه شایستگی‌ها (نام شکاف‌ها معمولاً همین نام‌هاست) از پیش محاسبه می‌شوند
+        if 'CompetencyName' in competencies.columns:
+            for name in competencies['CompetencyName'].dropna().unique():
+                self.suggest(name)
+
+    def scores(self, text) -> np.ndarray:
+        """امتیاز تطبیق (۰ تا ۱) متن با هر دوره، به ترتیب ردیف‌های courses"""
+        text_words, text_grams = _features(text)
+        return (self._words.cosine(text_words) + self._grams.cosine(text_grams)) / 2
+
+    def suggest(self, text, limit=SUGGESTION_LIMIT, threshold=MATCH_THRESHOLD) -> pd.DataFrame:
+        """دوره‌های پیشنهادی برای یک متن (مثلاً نام شکاف) به ترتیب امتیاز، با ستون MatchScore"""
+        if text is None or (not isinstance(text, str) and pd.isna(text)):
+            return self.courses.iloc[:0].assign(MatchScore=pd.Series(dtype=float))
+        key = (normalize(text), limit, threshold)
+        cached = self._suggestions.get(key)
+        if cached is None:
+            scores = self.scores(text)
+            order = np.argsort(-scores, kind='stable')[:limit]
+            order = order[scores[order] >= threshold]
+            cached = self._suggestions[key] = self.courses.iloc[order].assign(MatchScore=scores[order].round(3))
+        return cached
+
+
+def course_matcher(courses, competencies) -> CourseMatcher:
+    """ساخت ایندکس تطبیق دوره‌ها (تابع ورودی CompleteTalentSystem.analytics)"""
+    return CourseMatcher(courses, competencies)
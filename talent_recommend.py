@@ -0,0 +1,211 @@
+"""موتور دسته‌ای پیشنهاد دوره برای همه شکاف‌های باز سازمان
+
+امتیاز هر جفت شکاف × دوره از تطبیق شایستگی (CourseMatcher)، نزدیکی LevelExpectation دوره به RequiredLevel
+شکاف، هزینه و مدت دوره (مدت کوتاه‌تر برای شکاف‌های فوری‌تر وزن بیشتری دارد) و سازگاری DeliveryType با
+LearningPreferences کارمند به دست می‌آید. شکاف‌ها بر اساس نام گروه‌بندی می‌شوند و هر گروه فقط با دوره‌هایی
+که تطبیق شایستگی کافی دارند و در تکه‌هایی با سقف CHUNK_CELLS خانه امتیاز می‌گیرد؛ k دوره برتر هر شکاف
+در شیت Course_Recommendations ذخیره می‌شود تا صفحه‌ها فقط آن را بخوانند.
+
+اجرا:
+    python talent_recommend.py
+    python talent_recommend.py --top-k 10 --backend sqlite --path big.db
+"""
+import argparse
+import time
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from talent_analytics import GAP_SOLVED, URGENCY_MULTIPLIERS
+from talent_filters import FilterIndex
+from talent_matching import COMPETENCY_COLUMNS, COURSE_COLUMNS, MATCH_THRESHOLD, CourseMatcher
+from talent_search import normalize
+from talent_storage import STORAGE_BACKENDS, create_backend, load_storage_config
+
+RECOMMENDATION_SHEET = 'Course_Recommendations'
+RECOMMENDATION_COLUMNS = ['GapID', 'Rank', 'CourseID', 'Score', 'MatchScore']
+# ستون‌های لازم شیت‌های ورودی
+INPUT_COLUMNS = {
+    'Gaps': ['GapID', 'EmployeeID', 'GapName', 'RequiredLevel', 'Urgency', 'Status'],
+    'Employees': ['EmployeeID', 'LearningPreferences'],
+    'Training_Courses': COURSE_COLUMNS,
+    'Competencies': COMPETENCY_COLUMNS,
+}
+
+TOP_K = 5
+# سقف خانه‌های ماتریس امتیاز در هر تکه (هر آرایه float حدود ۱۶ مگابایت)
+CHUNK_CELLS = 2_000_000
+# وزن معیارها در کنار تطبیق شایستگی (امتیاز نهایی = تطبیق × میانگین وزنی معیارها)
+WEIGHTS = {'base': 1.0, 'level': 0.3, 'preference': 0.2, 'cost': 0.15, 'duration': 0.15}
+# واژه‌های ترجیح یادگیری سازگار با هر نوع ارائه دوره
+DELIVERY_PREFERENCES = {
+    'کلاسی': ('حضوری', 'کلاس', 'دوره'),
+    'کارگاهی': ('کارگاه', 'عملی', 'حضوری', 'منتور'),
+    'خودآموز': ('آنلاین', 'مجازی', 'مطالعه', 'فردی'),
+    'آزمایشگاهی': ('آزمایشگاه', 'عملی', 'پروژه'),
+}
+NEUTRAL = 0.5
+
+
+def _numbers(df, column) -> np.ndarray:
+    if column not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+
+def _cheapness(values) -> np.ndarray:
+    """۱ برای کمترین و ۰ برای بیشترین مقدار در کاتالوگ؛ مقدار نامعلوم خنثی"""
+    if np.isnan(values).all():
+        return np.full(len(values), NEUTRAL)
+    low, high = np.nanmin(values), np.nanmax(values)
+    scaled = 1 - (values - low) / (high - low) if high > low else np.ones(len(values))
+    return np.where(np.isnan(values), NEUTRAL, scaled)
+
+
+def _preference_fit(preferences, deliveries) -> np.ndarray:
+    """سازگاری هر متن ترجیح یادگیری با هر نوع ارائه؛ سطر و ستون آخر برای مقدار نامعلوم (خنثی)"""
+    fit = np.full((len(preferences) + 1, len(deliveries) + 1), NEUTRAL)
+    for row, preference in enumerate(preferences):
+        text = normalize(preference)
+        for column, delivery in enumerate(deliveries):
+            keywords = DELIVERY_PREFERENCES.get(delivery)
+            if keywords and text.strip():
+                fit[row, column] = float(any(normalize(keyword) in text for keyword in keywords))
+    return fit
+
+
+def open_gaps(gaps) -> pd.DataFrame:
+    """شکاف‌هایی که هنوز حل نشده‌اند"""
+    if 'Status' not in gaps.columns:
+        return gaps
+    return gaps[(gaps['Status'] != GAP_SOLVED).fillna(True)]
+
+
+def recommend_courses(gaps, employees, matcher: CourseMatcher, top_k=TOP_K,
+                      chunk_cells=CHUNK_CELLS) -> pd.DataFrame:
+    """k دوره برتر هر شکاف باز (ستون‌های RECOMMENDATION_COLUMNS، به ترتیب شکاف و رتبه)"""
+    gaps = open_gaps(gaps)
+    courses = matcher.courses
+    if gaps.empty or courses.empty or 'GapID' not in gaps.columns or 'CourseID' not in courses.columns:
+        return pd.DataFrame(columns=RECOMMENDATION_COLUMNS)
+
+    # ویژگی‌های دوره‌ها (یک بار برای کل کاتالوگ)
+    level_expectation = _numbers(courses, 'LevelExpectation')
+    cost = _cheapness(_numbers(courses, 'Cost'))
+    duration = _cheapness(_numbers(courses, 'DurationHours'))
+    delivery_codes, deliveries = (pd.factorize(courses['DeliveryType']) if 'DeliveryType' in courses.columns
+                                  else (np.full(len(courses), -1), []))
+
+    # ویژگی‌های شکاف‌ها
+    required = _numbers(gaps, 'RequiredLevel')
+    urgency = (gaps['Urgency'].astype(object).map(URGENCY_MULTIPLIERS) if 'Urgency' in gaps.columns
+               else pd.Series(np.nan, index=gaps.index))
+    urgency = (pd.to_numeric(urgency, errors='coerce').fillna(1).to_numpy(dtype=float)
+               / max(URGENCY_MULTIPLIERS.values()))
+    preferences = pd.Series(np.nan, index=gaps.index, dtype=object)
+    if {'EmployeeID', 'LearningPreferences'} <= set(employees.columns) and 'EmployeeID' in gaps.columns:
+        lookup = employees.drop_duplicates('EmployeeID').set_index('EmployeeID')['LearningPreferences']
+        preferences = lookup.reindex(gaps['EmployeeID']).astype(object)
+    preference_codes, preference_values = pd.factorize(preferences)
+    preference_fit = _preference_fit(list(preference_values), list(deliveries))
+    name_codes, names = (pd.factorize(gaps['GapName']) if 'GapName' in gaps.columns
+                         else (np.full(len(gaps), -1), []))
+
+    weights = WEIGHTS
+    gap_rows, ranks, course_rows, scores, matches = [], [], [], [], []
+    order = np.argsort(name_codes, kind='stable')
+    bounds = np.searchsorted(name_codes[order], np.arange(len(names) + 1))
+    for code, name in enumerate(names):
+        # تطبیق یک نام در هر دور (حافظه به تعداد دوره‌ها محدود است، نه نام‌ها × دوره‌ها)
+        match = matcher.scores(name)
+        candidates = np.flatnonzero(match >= MATCH_THRESHOLD)
+        if not len(candidates):
+            continue
+        members = order[bounds[code]:bounds[code + 1]]
+        k = min(top_k, len(candidates))
+        step = max(1, chunk_cells // len(candidates))
+        candidate_match = match[candidates]
+        candidate_level = level_expectation[candidates]
+        candidate_delivery = delivery_codes[candidates]
+        fixed = weights['base'] + weights['cost'] * cost[candidates]
+        for start in range(0, len(members), step):
+            rows = members[start:start + step]
+            level = 1 - np.abs(candidate_level[None, :] - required[rows, None]) / 4
+            level = np.where(np.isnan(level), NEUTRAL, np.clip(level, 0, 1))
+            preference = preference_fit[preference_codes[rows]][:, candidate_delivery]
+            pace = weights['duration'] * urgency[rows, None]
+            score = fixed[None, :] + weights['level'] * level + weights['preference'] * preference
+            score += pace * duration[candidates][None, :]
+            score /= (weights['base'] + weights['level'] + weights['preference'] + weights['cost']) + pace
+            score *= candidate_match[None, :]
+            # k خانه برتر هر سطر بدون مرتب‌سازی کامل
+            top = np.argpartition(-score, k - 1, axis=1)[:, :k] if k < len(candidates) else \
+                np.tile(np.arange(len(candidates)), (len(rows), 1))
+            top_scores = np.take_along_axis(score, top, axis=1)
+            ranked = np.argsort(-top_scores, axis=1, kind='stable')
+            top = np.take_along_axis(top, ranked, axis=1)
+            gap_rows.append(np.repeat(rows, k))
+            ranks.append(np.tile(np.arange(1, k + 1), len(rows)))
+            course_rows.append(candidates[top].ravel())
+            scores.append(np.take_along_axis(top_scores, ranked, axis=1).ravel())
+            matches.append(candidate_match[top].ravel())
+    if not gap_rows:
+        return pd.DataFrame(columns=RECOMMENDATION_COLUMNS)
+
+    gap_rows = np.concatenate(gap_rows)
+    result = pd.DataFrame({
+        'GapID': gaps['GapID'].to_numpy(dtype=object)[gap_rows],
+        'Rank': np.concatenate(ranks),
+        'CourseID': courses['CourseID'].to_numpy(dtype=object)[np.concatenate(course_rows)],
+        'Score': np.concatenate(scores).round(4),
+        'MatchScore': np.concatenate(matches).round(4),
+    })
+    # ترتیب ردیف‌های شیت شکاف‌ها و سپس رتبه
+    result = result.iloc[np.lexsort((result['Rank'].to_numpy(), gap_rows))]
+    return result.reset_index(drop=True)
+
+
+def recommendation_index(recommendations) -> FilterIndex:
+    """ایندکس توصیه‌ها بر اساس GapID (ردیف‌های هر شکاف به ترتیب رتبه)"""
+    return FilterIndex(recommendations, ['GapID'])
+
+
+def load_inputs(backend) -> Dict[str, pd.DataFrame]:
+    """ستون‌های لازم شیت‌های ورودی موتور پیشنهاد"""
+    return {sheet_name: backend.load_sheet(sheet_name, columns=columns)
+            for sheet_name, columns in INPUT_COLUMNS.items()}
+
+
+def run_recommendations(backend, top_k=TOP_K) -> pd.DataFrame:
+    """محاسبه توصیه‌های همه شکاف‌های باز و ذخیره در شیت Course_Recommendations"""
+    sheets = load_inputs(backend)
+    matcher = CourseMatcher(sheets['Training_Courses'], sheets['Competencies'])
+    result = recommend_courses(sheets['Gaps'], sheets['Employees'], matcher, top_k=top_k)
+    backend.save_sheet(result, RECOMMENDATION_SHEET)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="محاسبه دسته‌ای دوره‌های پیشنهادی برای شکاف‌های باز")
+    parser.add_argument('--top-k', type=int, default=TOP_K)
+    parser.add_argument('--backend', choices=list(STORAGE_BACKENDS), help="پیش‌فرض: TMS_STORAGE_BACKEND")
+    parser.add_argument('--path', help="مسیر فایل یا پوشه داده")
+    args = parser.parse_args()
+
+    config = load_storage_config()
+    if args.backend:
+        config['backend'] = args.backend
+        if not args.path:
+            config.pop('path', None)
+    if args.path:
+        config['path'] = args.path
+    backend = create_backend(config)
+    start = time.perf_counter()
+    result = run_recommendations(backend, top_k=args.top_k)
+    print(f"{result['GapID'].nunique():,} شکاف، {len(result):,} توصیه در {backend.describe()}: "
+          f"{time.perf_counter() - start:.1f} ثانیه")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""ثبت مرکزی ستون‌ها و نوع داده شیت‌های سیستم مدیریت استعداد
+
+نوع‌ها یک بار هنگام ورود داده به کش اعمال می‌شوند: متن‌های تکراری با مجموعه مقدار محدود (واحد، وضعیت، ...)
+به category (متن‌های آزاد فرم‌ها مانند عنوان شغل یا نام شکاف TEXT می‌مانند)،
+سطوح به Int16، مبالغ و نمره‌ها به float و تاریخ‌ها به datetime64.
+"""
+from typing import Dict
+
+import pandas as pd
+
+TEXT = 'text'
+CATEGORY = 'category'
+LEVEL = 'Int16'
+COUNT = 'Int32'
+NUMBER = 'float64'
+DATE = 'datetime64[ns]'
+
+SHEET_SCHEMAS: Dict[str, Dict[str, str]] = {
+    # ۱. کارکنان
+    'Employees': {
+        'EmployeeID': TEXT, 'FullName': TEXT, 'Gender': CATEGORY, 'BirthDate': DATE, 'HireDate': DATE,
+        'JobCode': CATEGORY, 'JobTitle': TEXT, 'Unit': CATEGORY, 'ManagerID': TEXT,
+        'EducationLevel': CATEGORY, 'Major': TEXT, 'Specialization': TEXT, 'PersonalityType': CATEGORY,
+        'InterviewScore': NUMBER, 'SelfAssessmentScore': NUMBER, 'CareerStage': CATEGORY,
+        'CareerStrategy': TEXT, 'RoleResponsibilities': TEXT, 'KPITargets': TEXT,
+        'LearningPreferences': TEXT, 'MotivationScore': NUMBER, 'SuccessionPool': TEXT,
+    },
+    # ۲. ساختار سازمانی
+    'Organization': {
+        'Level': LEVEL, 'Code': TEXT, 'Title': TEXT, 'ParentCode': TEXT, 'ResponsibilityLevel': CATEGORY,
+        'UnitHead': TEXT, 'NumberOfEmployees': COUNT, 'DepartmentKPIs': TEXT,
+    },
+    # ۳. شایستگی‌ها
+    'Competencies': {
+        'JobCode': CATEGORY, 'CompetencyCategory': CATEGORY, 'CompetencyName': TEXT,
+        'BehavioralIndicators': TEXT, 'RequiredLevel': LEVEL, 'AssessmentMethod': CATEGORY,
+        'LinkedCourses': TEXT, 'Priority': CATEGORY,
+    },
+    # ۴. شکاف‌ها
+    'Gaps': {
+        'GapID': TEXT, 'EmployeeID': TEXT, 'JobCode': CATEGORY, 'Unit': CATEGORY, 'GapType': CATEGORY,
+        'GapName': TEXT, 'Description': TEXT, 'RequiredLevel': LEVEL, 'CurrentLevel': LEVEL,
+        'GapSize': LEVEL, 'Urgency': CATEGORY, 'ImpactOnTeam': CATEGORY, 'ImpactOnOrg': CATEGORY,
+        'CostEstimate': NUMBER, 'RootCause': CATEGORY, 'Dependencies': TEXT, 'Owner': TEXT,
+        'SuccessMetric': TEXT, 'Status': CATEGORY,
+    },
+    # ۵. برنامه‌های توسعه
+    'Development_Plans': {
+        'PlanID': TEXT, 'GapID': TEXT, 'PlanName': TEXT, 'PlanType': CATEGORY, 'Provider': CATEGORY,
+        'StartDate': DATE, 'EndDate': DATE, 'EstimatedHours': NUMBER, 'Cost': NUMBER, 'Owner': TEXT,
+        'TargetOutcome': TEXT, 'EvaluationMethod': TEXT, 'Progress': LEVEL, 'Status': CATEGORY,
+    },
+    # ۶. دوره‌های آموزشی
+    'Training_Courses': {
+        'CourseID': TEXT, 'CourseName': TEXT, 'CourseType': CATEGORY, 'Provider': CATEGORY,
+        'DurationHours': NUMBER, 'Cost': NUMBER, 'LinkedCompetency': TEXT, 'DeliveryType': CATEGORY,
+        'LevelExpectation': LEVEL, 'LevelAchieved': LEVEL,
+    },
+    # ۷. سوابق آموزشی
+    'Training_Records': {
+        'RecordID': TEXT, 'EmployeeID': TEXT, 'CourseID': CATEGORY, 'AttendanceDate': DATE,
+        'PreTestScore': NUMBER, 'PostTestScore': NUMBER, 'Improvement': NUMBER, 'Status': CATEGORY,
+    },
+    # ۸. شاخص‌های عملکرد
+    'KPI': {
+        'KPIID': TEXT, 'EmployeeID': TEXT, 'KPIName': TEXT, 'Date': DATE, 'Value': NUMBER,
+        'Target': NUMBER, 'Variance': NUMBER, 'Status': CATEGORY, 'LinkedCompetency': TEXT,
+        'LinkedGapID': TEXT, 'UnitLevelAggregation': TEXT,
+    },
+    # ۹. دوره‌های پیشنهادی شکاف‌ها (خروجی talent_recommend)
+    'Course_Recommendations': {
+        'GapID': TEXT, 'Rank': LEVEL, 'CourseID': CATEGORY, 'Score': NUMBER, 'MatchScore': NUMBER,
+    },
+}
+
+
+def sheet_columns(sheet_name):
+    return list(SHEET_SCHEMAS.get(sheet_name, {}))
+
+
+def empty_sheets() -> Dict[str, pd.DataFrame]:
+    """شیت‌های خالی با ستون‌ها و نوع‌های تعریف‌شده (ساختار اولیه سیستم)"""
+    return {sheet_name: pd.DataFrame({column: pd.Series(dtype=object if kind == TEXT else kind)
+                                      for column, kind in schema.items()})
+            for sheet_name, schema in SHEET_SCHEMAS.items()}
+
+
+def _convert(series, kind) -> pd.Series:
+    """تبدیل یک ستون؛ اگر تبدیل باعث از دست رفتن مقداری شود ستون بدون تغییر برمی‌گردد"""
+    if kind == CATEGORY:
+        return series.astype(CATEGORY)
+    if kind == DATE:
+        converted = pd.to_datetime(series, errors='coerce', format='ISO8601')
+    else:
+        converted = pd.to_numeric(series, errors='coerce')
+    # رشته تهی همان مقدار خالی است؛ هر مقدار دیگری که تبدیل نشود یعنی ستون نوع دیگری دارد
+    if (converted.isna() & series.notna() & (series != '')).any():
+        return series
+    if kind in (LEVEL, COUNT) and not (converted.dropna() % 1 == 0).all():
+        return series
+    return converted.astype(kind)
+
+
+def apply_schema(df, sheet_name) -> pd.DataFrame:
+    """اعمال نوع‌های ثبت‌شده روی ستون‌های موجود یک شیت (ستون‌های هم‌نوع دست نمی‌خورند)"""
+    schema = SHEET_SCHEMAS.get(sheet_name)
+    if not schema:
+        return df
+    changed = {}
+    for column, kind in schema.items():
+        if kind == TEXT or column not in df.columns:
+            continue
+        series = df[column]
+        if isinstance(series, pd.DataFrame) or str(series.dtype) == kind:
+            continue
+        try:
+            converted = _convert(series, kind)
+        except (TypeError, ValueError, OverflowError):
+            continue
+        if converted is not series:
+            changed[column] = converted
+    if not changed:
+        return df
+    df = df.copy(deep=False)
+    for column, converted in changed.items():
+        df[column] = converted
+    return df
@@ -0,0 +1,270 @@
+"""جستجوی متنی فارسی روی کارکنان، شکاف‌ها و برنامه‌های توسعه با ایندکس معکوس
+
+متن‌ها پیش از ایندکس و جستجو یکسان‌سازی می‌شوند: ي/ى عربی به ی، ك به ک، ة/ۀ به ه، أ/إ به ا، ارقام فارسی و
+عربی به لاتین و حذف اعراب و کشیده. واژه‌های دارای نیم‌فاصله (ZWNJ) هم به صورت چسبیده و هم به صورت اجزا
+ایندکس می‌شوند و واژه نیم‌فاصله‌دار پرس‌وجو با شکل چسبیده یا با همه اجزایش پیدا می‌شود: «می‌خواهم» هر سه
+شکل «می‌خواهم»، «میخواهم» و «می خواهم» را پیدا می‌کند و «میخواهم» و «می خواهم» شکل نیم‌فاصله‌دار را.
+هر واژه پرس‌وجو پیشوند در نظر گرفته می‌شود و همه واژه‌ها باید پیدا شوند. ایندکس هر شیت با SearchStore همراه نوشتن‌ها به‌روز می‌ماند.
+"""
+import re
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from talent_aggregates import MaterializedStore
+from talent_storage import SHEET_KEYS
+
+SEARCH_FIELDS = {
+    'Employees': ['FullName', 'Major', 'Specialization', 'JobTitle'],
+    'Gaps': ['GapName', 'Description'],
+    'Development_Plans': ['PlanName'],
+}
+
+ZWNJ = '\u200c'
+_CHARACTERS = {'ي': 'ی', 'ى': 'ی', 'ك': 'ک', 'ة': 'ه', 'ۀ': 'ه', 'أ': 'ا', 'إ': 'ا', 'ـ': '',
+               '\u200d': ZWNJ, '\u200e': '', '\u200f': ''}
+_CHARACTERS.update({digit: str(i) for i, digit in enumerate('۰۱۲۳۴۵۶۷۸۹')})
+_CHARACTERS.update({digit: str(i) for i, digit in enumerate('٠١٢٣٤٥٦٧٨٩')})
+# اعراب (فتحه، کسره، تنوین، تشدید، ...)
+_CHARACTERS.update({chr(code): '' for code in list(range(0x064B, 0x0660)) + [0x0670]})
+_TRANSLATION = str.maketrans(_CHARACTERS)
+_WORD = re.compile(r'[\w\u200c]+')
+
+
+def normalize(text) -> str:
+    """یکسان‌سازی نویسه‌های عربی/فارسی، ارقام و حروف لاتین کوچک"""
+    return str(text).translate(_TRANSLATION).lower()
+
+
+def _terms(normalized) -> Tuple[str, ...]:
+    words = _WORD.findall(normalized)
+    if ZWNJ in normalized:
+        terms = []
+        for word in words:
+            parts = [part for part in word.split(ZWNJ) if part]
+            if len(parts) > 1:
+                terms.append(''.join(parts))
+            terms.extend(parts)
+        words = terms
+    return tuple(dict.fromkeys(words)) if len(words) > 1 else tuple(words)
+
+
+def tokenize(text) -> Tuple[str, ...]:
+    """واژه‌های یکسان‌شده یک متن (واژه نیم‌فاصله‌دار: شکل چسبیده و اجزا)"""
+    if text is None or (not isinstance(text, str) and pd.isna(text)):
+        return ()
+    return _terms(normalize(text))
+
+
+def _query_words(query) -> List[Tuple[Tuple[str, ...], ...]]:
+    """واژه‌های پرس‌وجو؛ هر واژه فهرستی از حالت‌های جایگزین است که همه واژه‌های یک حالت باید پیدا شوند
+    (واژه نیم‌فاصله‌دار: شکل چسبیده یا همه اجزا)"""
+    if query is None or (not isinstance(query, str) and pd.isna(query)):
+        return []
+    words = []
+    for word in _WORD.findall(normalize(query)):
+        parts = tuple(part for part in word.split(ZWNJ) if part)
+        if not parts:
+            continue
+        alternatives = (parts,) if len(parts) == 1 else ((''.join(parts),), parts)
+        if alternatives not in words:
+            words.append(alternatives)
+    return words
+
+
+def tokenize_all(values) -> List[Tuple[str, ...]]:
+    """واژه‌های مقدارهای غیرخالی (یکسان‌سازی همه با یک translate)"""
+    texts = list(map(str, np.asarray(values, dtype=object)))
+    normalized = normalize('\0'.join(texts)).split('\0')
+    if len(normalized) != len(texts):
+        return [tokenize(text) for text in texts]
+    return [_terms(text) for text in normalized]
+
+
+class SheetSearchIndex:
+    """ایندکس معکوس یک شیت: واژه ← شماره ردیف‌ها، و واژه‌های هر ستون هر ردیف برای به‌روزرسانی
+
+    هر کلید یک شماره ردیف ثابت (به ترتیب شیت) می‌گیرد؛ رتبه‌بندی روی آرایه مرتب شماره‌ها و برداری انجام
+    می‌شود و آرایه هر واژه تا تغییر آن واژه نگه داشته می‌شود.
+    """
+
+    def __init__(self, sheet_name, version):
+        self.sheet_name = sheet_name
+        self.version = version
+        self.key_column = SHEET_KEYS[sheet_name]
+        # کلید هم جستجوپذیر است (مثلاً EMP-0001)
+        self.fields = [self.key_column] + SEARCH_FIELDS[sheet_name]
+        self._keys: List[object] = []
+        self._ids: Dict[object, int] = {}
+        self._terms_of: Dict[str, List[Tuple[str, ...]]] = {field: [] for field in self.fields}
+        self._postings: Dict[str, Set[int]] = {}
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._vocabulary: Optional[List[str]] = None
+        self._unique = True
+
+    @property
+    def columns(self) -> List[str]:
+        return self.fields
+
+    def load(self, df):
+        """ساخت کامل: هر مقدار یکتای هر ستون یک بار واژه‌بندی می‌شود"""
+        if self.key_column not in df.columns:
+            self._unique = False
+            return self
+        self._keys = df[self.key_column].tolist()
+        self._ids = {key: row for row, key in enumerate(self._keys)}
+        self._unique = len(self._ids) == len(self._keys)
+        for field in self.fields:
+            if field not in df.columns:
+                self._terms_of[field] = [()] * len(df)
+                continue
+            codes, uniques = pd.factorize(df[field])
+            terms = tokenize_all(uniques)
+            # کد ‎-1 (مقدار خالی) به آخرین خانه یعنی () اشاره می‌کند
+            lookup = np.empty(len(terms) + 1, dtype=object)
+            lookup[:] = terms + [()]
+            self._terms_of[field] = lookup[codes].tolist()
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1)).tolist()
+            order = order.tolist()
+            for code, value_terms in enumerate(terms):
+                if not value_terms:
+                    continue
+                rows = set(order[bounds[code]:bounds[code + 1]])
+                for term in value_terms:
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        self._postings[term] = set(rows)
+                    else:
+                        postings |= rows
+        return self
+
+    def _changed(self, term):
+        self._arrays.pop(term, None)
+
+    def _set_field(self, row, field, value):
+        old, new = self._terms_of[field][row], tokenize(value)
+        if old == new:
+            return
+        self._terms_of[field][row] = new
+        others = {term for other in self.fields if other != field for term in self._terms_of[other][row]}
+        for term in old:
+            if term not in new and term not in others:
+                postings = self._postings[term]
+                postings.discard(row)
+                self._changed(term)
+                if not postings:
+                    del self._postings[term]
+                    self._vocabulary = None
+        for term in new:
+            if term not in self._postings:
+                self._postings[term] = set()
+                self._vocabulary = None
+            self._postings[term].add(row)
+            self._changed(term)
+
+    def apply(self, changes, upsert=True) -> bool:
+        """اعمال تغییرات ردیفی؛ False یعنی ایندکس باید بازسازی شود (کلید تکراری، تغییر کلید، ...)"""
+        if not self._unique:
+            return False
+        for change in changes:
+            if change['op'] == 'insert':
+                updates = [(row.get(self.key_column), row) for row in change['rows']]
+            elif change['op'] == 'update':
+                if change['key'] != self.key_column or self.key_column in change['values']:
+                    return False
+                if change['id'] not in self._ids:
+                    # به‌روزرسانی ردیف ناموجود اثری ندارد
+                    continue
+                updates = [(change['id'], change['values'])]
+            else:
+                return False
+            for key, values in updates:
+                if key is None or (change['op'] == 'insert' and key in self._ids and not upsert):
+                    return False
+                row = self._ids.get(key)
+                if row is None:
+                    row = self._ids[key] = len(self._keys)
+                    self._keys.append(key)
+                    for field in self.fields:
+                        self._terms_of[field].append(())
+                for field in self.fields:
+                    if field in values:
+                        self._set_field(row, field, values[field])
+        return True
+
+    def _array(self, term) -> np.ndarray:
+        """شماره ردیف‌های یک واژه به صورت آرایه مرتب"""
+        array = self._arrays.get(term)
+        if array is None:
+            postings = self._postings.get(term, ())
+            array = self._arrays[term] = np.sort(np.fromiter(postings, dtype=np.int64, count=len(postings)))
+        return array
+
+    def _matches(self, term) -> np.ndarray:
+        """شماره ردیف‌هایی که واژه‌ای با پیشوند term دارند"""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        start = bisect_left(self._vocabulary, term)
+        end = bisect_left(self._vocabulary, term + '\uffff')
+        if end - start == 1:
+            return self._array(self._vocabulary[start])
+        if end == start:
+            return np.empty(0, dtype=np.int64)
+        rows = set().union(*(self._postings[t] for t in self._vocabulary[start:end]))
+        return np.sort(np.fromiter(rows, dtype=np.int64, count=len(rows)))
+
+    def _exact(self, term) -> np.ndarray:
+        """شماره ردیف‌هایی که خود واژه term را دارند"""
+        return self._array(term) if term in self._postings else np.empty(0, dtype=np.int64)
+
+    @staticmethod
+    def _word_rows(alternatives, lookup) -> np.ndarray:
+        """ردیف‌هایی که همه واژه‌های حداقل یکی از حالت‌های یک واژه پرس‌وجو را دارند"""
+        result = None
+        for terms in alternatives:
+            rows = lookup(terms[0])
+            for term in terms[1:]:
+                rows = np.intersect1d(rows, lookup(term), assume_unique=True)
+            result = rows if result is None else np.union1d(result, rows)
+        return result
+
+    def search(self, query, limit=20) -> Tuple[List[Tuple[object, int]], int]:
+        """(کلید، امتیاز) بهترین نتیجه‌ها و تعداد کل؛ امتیاز هر واژه پرس‌وجو: ۲ برای تطابق کامل، ۱ برای پیشوند
+
+        نتیجه‌های هم‌امتیاز به ترتیب ردیف در شیت می‌آیند.
+        """
+        words = _query_words(query)
+        if not words:
+            return [], 0
+        matches = sorted((self._word_rows(alternatives, self._matches) for alternatives in words), key=len)
+        rows = matches[0]
+        for match in matches[1:]:
+            rows = np.intersect1d(rows, match, assume_unique=True)
+        if not len(rows):
+            return [], 0
+        scores = np.full(len(rows), len(words), dtype=np.int64)
+        for alternatives in words:
+            exact = self._word_rows(alternatives, self._exact)
+            if len(exact):
+                scores += np.isin(rows, exact, assume_unique=True)
+        top = np.lexsort((rows, -scores))[:limit]
+        return [(self._keys[row], int(score)) for row, score in zip(rows[top], scores[top])], len(rows)
+
+
+class SearchStore(MaterializedStore):
+    """ایندکس‌های جستجوی شیت‌های یک موتور ذخیره‌سازی"""
+
+    sheets = SEARCH_FIELDS
+    entry_class = SheetSearchIndex
+
+    def search(self, sheet_name, query, limit=20) -> Tuple[List[Tuple[object, int]], int]:
+        with self._lock:
+            return self.get(sheet_name).search(query, limit)
+
+
+def search_store(backend) -> SearchStore:
+    """ایندکس‌های جستجوی مشترک یک موتور ذخیره‌سازی در کل پروسه"""
+    return SearchStore.for_backend(backend)
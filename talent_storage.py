@@ -0,0 +1,1836 @@
+"""لایه ذخیره‌سازی سیستم مدیریت استعداد (بدون وابستگی به Streamlit)"""
+import json
+import logging
+import math
+import numbers
+import os
+import random
+import re
+import sqlite3
+import stat
+import struct
+import tempfile
+import threading
+import time
+import zipfile
+import zlib
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+from talent_schema import apply_schema
+
+try:
+    import fcntl
+except ImportError:
+    # ویندوز
+    fcntl = None
+    import msvcrt
+
+
+class WorkbookCache:
+    """کش سراسری فایل اکسل بر اساس مسیر، زمان تغییر و اندازه فایل"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[tuple, Dict[str, pd.DataFrame]]] = {}
+        # تعداد دفعات پارس کامل فایل (برای پایش و بنچمارک)
+        self.parse_count = 0
+
+    @staticmethod
+    def file_version(path) -> tuple:
+        """نسخه فایل: زمان تغییر (نانوثانیه)، اندازه و inode (هر جایگزینی اتمیک inode تازه دارد)"""
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def get_workbook(self, path) -> Dict[str, pd.DataFrame]:
+        """تمام شیت‌ها؛ فقط در صورت تغییر فایل دوباره پارس می‌شود"""
+        key = os.path.abspath(path)
+        version = self.file_version(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+            sheets = {sheet_name: apply_schema(df, sheet_name)
+                      for sheet_name, df in pd.read_excel(path, sheet_name=None).items()}
+            self.parse_count += 1
+            self._entries[key] = (version, sheets)
+            return sheets
+
+    def get_sheet(self, path, sheet_name, copy=False) -> pd.DataFrame:
+        """یک شیت از کش؛ در حالت پیش‌فرض فقط‌خواندنی است و با copy=True نسخه مستقل برمی‌گردد"""
+        sheets = self.get_workbook(path)
+        if sheet_name not in sheets:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        df = sheets[sheet_name]
+        return df.copy() if copy else df
+
+    def replace_sheets(self, path, frames: Dict[str, pd.DataFrame], base_version):
+        """به‌روزرسانی مستقیم کش پس از نوشتن چند شیت (فقط اگر کش با نسخه قبلی فایل هم‌خوان باشد)"""
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != base_version:
+                self._entries.pop(key, None)
+                return
+            sheets = dict(entry[1])
+            for sheet_name, df in frames.items():
+                sheets[sheet_name] = apply_schema(df.copy(), sheet_name)
+            self._entries[key] = (self.file_version(path), sheets)
+
+    def invalidate(self, path=None):
+        """حذف یک فایل یا کل کش"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+
+# کش مشترک در سطح پروسه (بین تمام نشست‌ها و اجراهای مجدد Streamlit)
+WORKBOOK_CACHE = WorkbookCache()
+
+
+# ---------------------------------------------------------------------------
+# نوشتن تک‌شیت: فقط بخش XML همان شیت داخل فایل zip بازنویسی می‌شود و
+# سایر بخش‌ها به صورت فشرده و بدون پارس کپی می‌شوند.
+# ---------------------------------------------------------------------------
+
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+_CENTRAL_HEADER = struct.Struct('<4s6H3L5H2L')
+_END_RECORD = struct.Struct('<4s4H2LH')
+_ZIP64_LIMIT = 0xFFFFFFFF
+_COPY_CHUNK = 1 << 20
+_XML_CHUNK_ROWS = 5000
+
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# قفل نوشتن برای جلوگیری از تداخل دو نشست داخل یک پروسه (بررسی نسخه و نوشتن زیر یک قفل)
+_WRITE_LOCK = threading.RLock()
+
+
+def _column_letter(index) -> str:
+    """تبدیل شماره ستون (از صفر) به حرف ستون اکسل"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _string_body(text) -> str:
+    text = _ILLEGAL_XML_CHARS.sub('', text)
+    space = ' xml:space="preserve"' if text != text.strip() else ''
+    return f' t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
+
+
+def _cell_body(value) -> str:
+    """بخش پس از مرجع سلول در XML؛ برای مقدار خالی رشته تهی برمی‌گرداند"""
+    if type(value) is str:
+        return _string_body(value) if value else ''
+    if value is None or value is pd.NaT or value is pd.NA:
+        return ''
+    if isinstance(value, (bool, np.bool_)):
+        return f' t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, numbers.Number) and not isinstance(value, complex):
+        if isinstance(value, numbers.Integral):
+            return f' t="n"><v>{int(value)}</v></c>'
+        value = float(value)
+        if math.isnan(value) or math.isinf(value):
+            return ''
+        return f' t="n"><v>{value!r}</v></c>'
+    if isinstance(value, (datetime, date)):
+        if isinstance(value, datetime) and (value.hour or value.minute or value.second):
+            return _string_body(value.strftime('%Y-%m-%d %H:%M:%S'))
+        return _string_body(value.strftime('%Y-%m-%d'))
+    text = str(value)
+    return _string_body(text) if text else ''
+
+
+def _column_cells(series, letter, first_row) -> List[str]:
+    """XML سلول‌های یک ستون؛ ستون‌های عددی مستقیم و بقیه با یک بار پردازش هر مقدار یکتا"""
+    rows = range(first_row, first_row + len(series))
+    kind = series.dtype.kind if isinstance(series.dtype, np.dtype) else ''
+    if kind in ('i', 'u'):
+        return [f'<c r="{letter}{r}" t="n"><v>{v}</v></c>' for r, v in zip(rows, series.tolist())]
+    if kind == 'f':
+        return ['' if v != v or math.isinf(v) else f'<c r="{letter}{r}" t="n"><v>{v!r}</v></c>'
+                for r, v in zip(rows, series.tolist())]
+    codes, uniques = pd.factorize(series)
+    # اندیس -1 (مقدار خالی) به آخرین عنصر یعنی رشته تهی اشاره می‌کند
+    bodies = [_cell_body(value) for value in uniques] + ['']
+    return [f'<c r="{letter}{r}"{bodies[c]}' if bodies[c] else '' for r, c in zip(rows, codes.tolist())]
+
+
+def iter_sheet_xml(df, chunk_rows=_XML_CHUNK_ROWS) -> Iterator[str]:
+    """تولید جریانی XML یک شیت از روی DataFrame (ردیف اول عنوان ستون‌ها)"""
+    letters = [_column_letter(i) for i in range(len(df.columns))]
+    last_ref = f"{letters[-1]}{len(df) + 1}" if letters else 'A1'
+    yield ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+           f'<worksheet xmlns="{_MAIN_NS}"><dimension ref="A1:{last_ref}"/><sheetData>')
+    header = ''.join(f'<c r="{letter}1"{_cell_body(str(column))}' for letter, column in zip(letters, df.columns))
+    yield f'<row r="1">{header}</row>'
+    # ساخت ستونی در دسته‌های چند هزار ردیفی تا حافظه محدود بماند
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        first_row = start + 2
+        columns = [_column_cells(chunk.iloc[:, i], letter, first_row) for i, letter in enumerate(letters)]
+        yield ''.join(f'<row r="{row_number}">{"".join(cells)}</row>'
+                      for row_number, cells in enumerate(zip(*columns), start=first_row))
+    yield '</sheetData></worksheet>'
+
+
+def _sheet_part_name(archive, sheet_name) -> Optional[str]:
+    """نام بخش XML مربوط به یک شیت داخل فایل xlsx (sheet_name=None یعنی اولین شیت)"""
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    rel_id = None
+    for sheet in workbook.iter(f'{{{_MAIN_NS}}}sheet'):
+        if sheet_name is None or sheet.get('name') == sheet_name:
+            rel_id = sheet.get(f'{{{_REL_NS}}}id')
+            break
+    if rel_id is None:
+        return None
+    rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    for rel in rels.iter(f'{{{_PKG_REL_NS}}}Relationship'):
+        if rel.get('Id') == rel_id:
+            target = rel.get('Target')
+            return target.lstrip('/') if target.startswith('/') else f"xl/{target}"
+    return None
+
+
+def sheet_part_version(path, sheet_name) -> Optional[tuple]:
+    """نسخه یک شیت در فایل xlsx: CRC و اندازه بخش XML آن از فهرست zip (بدون خواندن داده‌ها)"""
+    if not os.path.exists(path):
+        return None
+    with zipfile.ZipFile(path) as archive:
+        part_name = _sheet_part_name(archive, sheet_name)
+        if part_name is None:
+            return None
+        info = archive.getinfo(part_name)
+        return (info.CRC, info.file_size)
+
+
+# شناسه قالب‌های عددی داخلی اکسل که تاریخ هستند
+_BUILTIN_DATE_FORMATS = set(range(14, 23)) | set(range(27, 37)) | {45, 46, 47} | set(range(50, 59))
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+
+
+def _column_index(ref) -> int:
+    """شماره ستون (از صفر) از روی مرجع سلول مانند AB12"""
+    index = 0
+    for char in ref:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - 64
+    return index - 1
+
+
+def _shared_strings(archive) -> List[str]:
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    strings = []
+    with archive.open('xl/sharedStrings.xml') as f:
+        for _, element in ElementTree.iterparse(f):
+            if element.tag == f'{{{_MAIN_NS}}}si':
+                strings.append(''.join(t.text or '' for t in element.iter(f'{{{_MAIN_NS}}}t')))
+                element.clear()
+    return strings
+
+
+def _date_styles(archive) -> set:
+    """اندیس سبک‌هایی از سلول‌ها که قالب تاریخ دارند"""
+    if 'xl/styles.xml' not in archive.namelist():
+        return set()
+    styles = ElementTree.fromstring(archive.read('xl/styles.xml'))
+    date_formats = set(_BUILTIN_DATE_FORMATS)
+    for number_format in styles.iter(f'{{{_MAIN_NS}}}numFmt'):
+        # حذف بخش‌های نقل‌قول‌شده و [رنگ/زمان] پیش از جستجوی نشانه‌های تاریخ
+        code = re.sub(r'"[^"]*"|\[[^\]]*\]', '', number_format.get('formatCode', '')).lower()
+        if any(token in code for token in ('y', 'd', 'mm')):
+            date_formats.add(int(number_format.get('numFmtId')))
+    cell_formats = styles.find(f'{{{_MAIN_NS}}}cellXfs')
+    if cell_formats is None:
+        return set()
+    return {index for index, xf in enumerate(cell_formats)
+            if int(xf.get('numFmtId', 0)) in date_formats}
+
+
+def _serial_to_text(value) -> str:
+    moment = _EXCEL_EPOCH + timedelta(days=float(value))
+    if moment.hour or moment.minute or moment.second:
+        return moment.strftime('%Y-%m-%d %H:%M:%S')
+    return moment.strftime('%Y-%m-%d')
+
+
+def iter_xlsx_rows(source, sheet_name=None) -> Iterator[List[Optional[str]]]:
+    """خواندن جریانی ردیف‌های یک شیت xlsx به صورت فهرست رشته‌ها (بدون ساخت کل شیت در حافظه)
+
+    source مسیر فایل یا شیء فایل است؛ سلول‌های تاریخ به صورت YYYY-MM-DD برگردانده می‌شوند.
+    """
+    cell_tag, value_tag, row_tag = f'{{{_MAIN_NS}}}c', f'{{{_MAIN_NS}}}v', f'{{{_MAIN_NS}}}row'
+    text_tag = f'{{{_MAIN_NS}}}t'
+    with zipfile.ZipFile(source) as archive:
+        part_name = _sheet_part_name(archive, sheet_name)
+        if part_name is None:
+            raise ValueError(f"شیت {sheet_name} در فایل وجود ندارد")
+        shared = _shared_strings(archive)
+        date_styles = _date_styles(archive)
+        with archive.open(part_name) as f:
+            for _, element in ElementTree.iterparse(f):
+                if element.tag != row_tag:
+                    continue
+                values: List[Optional[str]] = []
+                for cell in element:
+                    if cell.tag != cell_tag:
+                        continue
+                    ref = cell.get('r')
+                    if ref:
+                        index = _column_index(ref)
+                        if index > len(values):
+                            values.extend([None] * (index - len(values)))
+                    kind = cell.get('t')
+                    if kind == 'inlineStr':
+                        value = ''.join(t.text or '' for t in cell.iter(text_tag))
+                    else:
+                        node = cell.find(value_tag)
+                        value = None if node is None else node.text
+                        if value is not None:
+                            if kind == 's':
+                                value = shared[int(value)]
+                            elif kind == 'b':
+                                value = 'TRUE' if value == '1' else 'FALSE'
+                            elif kind in (None, 'n') and date_styles and int(cell.get('s', 0)) in date_styles:
+                                value = _serial_to_text(value)
+                    values.append(value)
+                yield values
+                element.clear()
+
+
+def _dos_datetime(date_time) -> Tuple[int, int]:
+    year, month, day, hour, minute, second = date_time
+    return (hour << 11 | minute << 5 | second // 2,
+            (max(year, 1980) - 1980) << 9 | month << 5 | day)
+
+
+def _encode_name(info) -> bytes:
+    return info.filename.encode('utf-8' if info.flag_bits & 0x800 else 'cp437')
+
+
+def _write_local_header(out, info, flags, crc, compress_size, file_size):
+    dos_time, dos_date = _dos_datetime(info.date_time)
+    name = _encode_name(info)
+    out.write(_LOCAL_HEADER.pack(b'PK\x03\x04', info.extract_version, flags, info.compress_type,
+                                 dos_time, dos_date, crc, compress_size, file_size, len(name), 0))
+    out.write(name)
+
+
+def _copy_raw_entry(src, out, info):
+    """کپی بایت‌های فشرده یک بخش بدون باز کردن آن"""
+    src.seek(info.header_offset)
+    header = _LOCAL_HEADER.unpack(src.read(_LOCAL_HEADER.size))
+    src.seek(header[9] + header[10], 1)
+    _write_local_header(out, info, info.flag_bits & ~0x08, info.CRC, info.compress_size, info.file_size)
+    remaining = info.compress_size
+    while remaining:
+        chunk = src.read(min(_COPY_CHUNK, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"بخش ناقص در فایل: {info.filename}")
+        out.write(chunk)
+        remaining -= len(chunk)
+    return info.CRC, info.compress_size, info.file_size
+
+
+def _write_xml_entry(out, info, chunks):
+    """فشرده‌سازی جریانی یک بخش XML جدید"""
+    header_offset = out.tell()
+    _write_local_header(out, info, info.flag_bits & ~0x08, 0, 0, 0)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    crc = compress_size = file_size = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        crc = zlib.crc32(data, crc)
+        file_size += len(data)
+        compressed = compressor.compress(data)
+        compress_size += len(compressed)
+        out.write(compressed)
+    compressed = compressor.flush()
+    compress_size += len(compressed)
+    out.write(compressed)
+    if compress_size > _ZIP64_LIMIT or file_size > _ZIP64_LIMIT:
+        raise zipfile.LargeZipFile("شیت بزرگ‌تر از محدوده zip معمولی است")
+    end = out.tell()
+    out.seek(header_offset + 14)
+    out.write(struct.pack('<3L', crc, compress_size, file_size))
+    out.seek(end)
+    return crc, compress_size, file_size
+
+
+def _rewrite_archive(src, out, infos, parts: Dict[str, Iterator[str]]):
+    """نوشتن آرشیو جدید با جایگزینی بخش‌های داده‌شده و کپی خام بقیه بخش‌ها"""
+    central = []
+    for info in infos:
+        offset = out.tell()
+        if info.filename in parts:
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.extract_version = max(info.extract_version, 20)
+            sizes = _write_xml_entry(out, info, parts[info.filename])
+        else:
+            sizes = _copy_raw_entry(src, out, info)
+        central.append((info, offset) + sizes)
+    directory_offset = out.tell()
+    for info, offset, crc, compress_size, file_size in central:
+        dos_time, dos_date = _dos_datetime(info.date_time)
+        name = _encode_name(info)
+        out.write(_CENTRAL_HEADER.pack(
+            b'PK\x01\x02', info.create_version | info.create_system << 8,
+            info.extract_version, info.flag_bits & ~0x08, info.compress_type,
+            dos_time, dos_date, crc, compress_size, file_size,
+            len(name), 0, 0, 0, info.internal_attr, info.external_attr, offset))
+        out.write(name)
+    directory_size = out.tell() - directory_offset
+    if out.tell() >= _ZIP64_LIMIT:
+        raise zipfile.LargeZipFile("فایل بزرگ‌تر از محدوده zip معمولی است")
+    out.write(_END_RECORD.pack(b'PK\x05\x06', 0, 0, len(central), len(central),
+                               directory_size, directory_offset, 0))
+
+
+def _default_file_mode() -> int:
+    """مجوز فایل تازه طبق umask پروسه (مانند open)
+
+    os.umask فقط با تنظیم خوانده می‌شود؛ برای جلوگیری از تداخل با نخ‌های دیگر یک بار هنگام import خوانده می‌شود.
+    """
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+_NEW_FILE_MODE = _default_file_mode()
+
+
+def _commit_file(temp_path, path):
+    """جایگزینی اتمیک فایل اصلی با فایل موقت (با حفظ مجوزهای فایل اصلی)
+
+    mkstemp فایل را فقط برای مالک (0600) می‌سازد؛ اگر فایل اصلی هنوز نباشد مجوز پیش‌فرض umask داده می‌شود.
+    """
+    try:
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = _NEW_FILE_MODE
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def patch_workbook_sheets(path, frames: Dict[str, pd.DataFrame]) -> bool:
+    """بازنویسی فقط شیت‌های داده‌شده در فایل xlsx در یک نوشتن؛ اگر فایل یا یکی از شیت‌ها وجود نداشته باشد False"""
+    if not os.path.exists(path):
+        return False
+    with _WRITE_LOCK:
+        base_version = WorkbookCache.file_version(path)
+        with open(path, 'rb') as src:
+            with zipfile.ZipFile(src) as archive:
+                part_names = {sheet_name: _sheet_part_name(archive, sheet_name) for sheet_name in frames}
+                infos = archive.infolist()
+            if None in part_names.values() or len(infos) >= 0xFFFF:
+                return False
+            if any(info.compress_size >= _ZIP64_LIMIT or info.file_size >= _ZIP64_LIMIT
+                   or info.header_offset >= _ZIP64_LIMIT for info in infos):
+                return False
+
+            directory = os.path.dirname(os.path.abspath(path))
+            fd, temp_path = tempfile.mkstemp(prefix='.tms-', suffix='.xlsx', dir=directory)
+            try:
+                parts = {part_names[sheet_name]: iter_sheet_xml(df) for sheet_name, df in frames.items()}
+                with os.fdopen(fd, 'wb') as out:
+                    _rewrite_archive(src, out, infos, parts)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+        _commit_file(temp_path, path)
+        WORKBOOK_CACHE.replace_sheets(path, frames, base_version)
+    return True
+
+
+def patch_workbook_sheet(path, sheet_name, df) -> bool:
+    """بازنویسی فقط یک شیت در فایل xlsx؛ اگر شیت یا فایل وجود نداشته باشد False برمی‌گردد"""
+    return patch_workbook_sheets(path, {sheet_name: df})
+
+
+# ---------------------------------------------------------------------------
+# خروجی جریانی: فایل xlsx یا CSV بدون نگه داشتن کل محتوای متنی در حافظه
+# ---------------------------------------------------------------------------
+
+_CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '{sheets}</Types>')
+_SHEET_CONTENT_TYPE = ('<Override PartName="/xl/worksheets/sheet{index}.xml" '
+                       'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>')
+_ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<Relationships xmlns="{_PKG_REL_NS}">'
+    '<Relationship Id="rId1" Target="xl/workbook.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>')
+_STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<styleSheet xmlns="{_MAIN_NS}">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>')
+_SHEET_NAME_CHARS = re.compile(r'[\[\]:*?/\\]')
+_CSV_CHUNK_ROWS = 50_000
+
+
+def write_workbook(out, frames):
+    """نوشتن جریانی یک فایل xlsx کامل در مسیر یا شیء فایل (مثلاً BytesIO)
+
+    frames یک dict یا دنباله‌ای از (نام شیت، DataFrame) است؛ هر شیت دسته به دسته فشرده می‌شود و
+    با دادن یک generator هر شیت فقط هنگام نوشتن بارگذاری می‌شود.
+    """
+    items = frames.items() if isinstance(frames, dict) else frames
+    names: List[str] = []
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as archive:
+        for sheet_name, df in items:
+            name = _SHEET_NAME_CHARS.sub('_', str(sheet_name))[:31] or f"Sheet{len(names) + 1}"
+            names.append(name)
+            with archive.open(f"xl/worksheets/sheet{len(names)}.xml", 'w', force_zip64=True) as part:
+                for chunk in iter_sheet_xml(df):
+                    part.write(chunk.encode('utf-8'))
+        if not names:
+            # فایل xlsx بدون شیت معتبر نیست
+            names.append('Sheet1')
+            archive.writestr('xl/worksheets/sheet1.xml', ''.join(iter_sheet_xml(pd.DataFrame())))
+        sheets_xml = ''.join(f'<sheet name="{escape(name, {chr(34): "&quot;"})}" sheetId="{i}" r:id="rId{i}"/>'
+                             for i, name in enumerate(names, start=1))
+        archive.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}"><sheets>{sheets_xml}</sheets></workbook>'))
+        rels_xml = ''.join(
+            f'<Relationship Id="rId{i}" Target="worksheets/sheet{i}.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+            for i in range(1, len(names) + 1))
+        styles_id = len(names) + 1
+        archive.writestr('xl/_rels/workbook.xml.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<Relationships xmlns="{_PKG_REL_NS}">{rels_xml}'
+            f'<Relationship Id="rId{styles_id}" Target="styles.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"/>'
+            '</Relationships>'))
+        archive.writestr('xl/styles.xml', _STYLES_XML)
+        archive.writestr('_rels/.rels', _ROOT_RELS_XML)
+        archive.writestr('[Content_Types].xml', _CONTENT_TYPES_XML.format(
+            sheets=''.join(_SHEET_CONTENT_TYPE.format(index=i) for i in range(1, len(names) + 1))))
+
+
+def write_csv(out, df, chunk_rows=_CSV_CHUNK_ROWS):
+    """نوشتن CSV (UTF-8 با BOM برای نمایش درست فارسی در اکسل) به صورت دسته‌ای در شیء فایل باینری"""
+    out.write('\ufeff'.encode('utf-8'))
+    if len(df) == 0:
+        out.write(df.to_csv(index=False).encode('utf-8'))
+    for start in range(0, len(df), chunk_rows):
+        out.write(df.iloc[start:start + chunk_rows].to_csv(index=False, header=start == 0).encode('utf-8'))
+
+
+# ---------------------------------------------------------------------------
+# موتورهای ذخیره‌سازی قابل تعویض
+# ---------------------------------------------------------------------------
+
+# مسیر پیش‌فرض هر موتور
+DEFAULT_PATHS = {
+    'excel': 'complete_talent_data.xlsx',
+    'sqlite': 'complete_talent_data.db',
+    'parquet': 'complete_talent_data_parquet',
+}
+
+
+# موتورهایی که هر ذخیره در آن‌ها کل فایل شیت را بازنویسی می‌کند و به‌طور پیش‌فرض ژورنال دارند
+JOURNAL_BY_DEFAULT = ('excel', 'parquet')
+
+
+def load_storage_config() -> dict:
+    """تنظیمات ذخیره‌سازی از متغیرهای محیطی TMS_STORAGE_BACKEND، TMS_STORAGE_PATH و TMS_JOURNAL*"""
+    backend = os.environ.get('TMS_STORAGE_BACKEND', 'excel').strip().lower()
+    journal = os.environ.get('TMS_JOURNAL', '1' if backend in JOURNAL_BY_DEFAULT else '0')
+    return {
+        'backend': backend,
+        'path': os.environ.get('TMS_STORAGE_PATH') or DEFAULT_PATHS.get(backend, ''),
+        'journal': journal.strip().lower() in ('1', 'true', 'yes', 'on'),
+        'compact_threshold': int(os.environ.get('TMS_JOURNAL_THRESHOLD', 200)),
+        'compact_interval': float(os.environ.get('TMS_JOURNAL_INTERVAL', 30)),
+    }
+
+
+def project_columns(df, columns) -> pd.DataFrame:
+    """انتخاب ستون‌های درخواستی؛ ستون‌های ناموجود نادیده گرفته می‌شوند"""
+    if columns is None:
+        return df
+    return df[[column for column in columns if column in df.columns]]
+
+
+class FrameCache:
+    """کش DataFrameها به ازای نسخه هر شیت و مجموعه ستون‌های درخواستی"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # شیت -> (نسخه، {ستون‌ها: DataFrame}) ؛ کلید None یعنی تمام ستون‌ها
+        self._entries: Dict[str, Tuple[object, Dict[Optional[tuple], pd.DataFrame]]] = {}
+
+    def get(self, sheet_name, version, columns=None) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            if entry is None or entry[0] != version:
+                return None
+            frames = entry[1]
+            if columns is not None and columns not in frames and None in frames:
+                frames[columns] = project_columns(frames[None], columns)
+            return frames.get(columns)
+
+    def put(self, sheet_name, version, df, columns=None):
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            if entry is None or entry[0] != version:
+                entry = (version, {})
+                self._entries[sheet_name] = entry
+            entry[1][columns] = df
+
+    def full_frame(self, sheet_name, version) -> Optional[pd.DataFrame]:
+        """کل شیت فقط اگر با نسخه داده‌شده در کش باشد"""
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            if entry is None or entry[0] != version:
+                return None
+            return entry[1].get(None)
+
+    def drop(self, sheet_name):
+        with self._lock:
+            self._entries.pop(sheet_name, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# ---------------------------------------------------------------------------
+# تغییرات ردیفی
+# ---------------------------------------------------------------------------
+
+# ستون کلید هر شیت برای به‌روزرسانی ردیفی
+SHEET_KEYS = {
+    'Employees': 'EmployeeID',
+    'Organization': 'Code',
+    'Gaps': 'GapID',
+    'Development_Plans': 'PlanID',
+    'Training_Courses': 'CourseID',
+    'Training_Records': 'RecordID',
+    'KPI': 'KPIID',
+}
+
+
+def insert_change(sheet_name, rows: List[dict]) -> dict:
+    return {'op': 'insert', 'sheet': sheet_name, 'rows': list(rows)}
+
+
+def update_change(sheet_name, key_column, key, values: dict, expected: Optional[dict] = None) -> dict:
+    change = {'op': 'update', 'sheet': sheet_name, 'key': key_column, 'id': key, 'values': dict(values)}
+    if expected:
+        change['expected'] = dict(expected)
+    return change
+
+
+def group_changes(changes) -> Dict[str, List[dict]]:
+    """تغییرات به تفکیک شیت (با حفظ ترتیب)"""
+    grouped: Dict[str, List[dict]] = {}
+    for change in changes:
+        grouped.setdefault(change['sheet'], []).append(change)
+    return grouped
+
+
+def concat_rows(df, new_rows) -> pd.DataFrame:
+    """افزودن ردیف‌های جدید به انتهای شیت با حفظ ستون‌های موجود"""
+    if len(df) == 0:
+        columns = list(df.columns) + [column for column in new_rows.columns if column not in df.columns]
+        return new_rows.reindex(columns=columns)
+    return pd.concat([df, new_rows], ignore_index=True)
+
+
+def _set_values(df, mask, values):
+    for column, value in values.items():
+        if column not in df.columns:
+            df[column] = pd.Series(None, index=df.index, dtype=object)
+        try:
+            df.loc[mask, column] = value
+        except (TypeError, ValueError):
+            # نوع ناسازگار با ستون (مثلاً متن در ستون عددی)
+            df[column] = df[column].astype(object)
+            df.loc[mask, column] = value
+
+
+def apply_changes(df, changes, upsert=True) -> pd.DataFrame:
+    """اعمال تغییرات ردیفی به ترتیب روی نسخه‌ای از شیت؛ با upsert درج کلید تکراری به‌روزرسانی حساب می‌شود"""
+    df = df.copy()
+    pending: List[dict] = []
+    present: Dict[str, set] = {}
+
+    def flush():
+        nonlocal df
+        if pending:
+            df = concat_rows(df, pd.DataFrame(pending))
+            pending.clear()
+
+    def keys(column):
+        if column not in present:
+            present[column] = set(df[column].dropna()) if column in df.columns else set()
+        return present[column]
+
+    for change in changes:
+        if change['op'] == 'insert':
+            key_column = SHEET_KEYS.get(change['sheet']) if upsert else None
+            for row in change['rows']:
+                key = row.get(key_column) if key_column else None
+                if key is not None and key in keys(key_column):
+                    flush()
+                    _set_values(df, df[key_column] == key, row)
+                else:
+                    pending.append(row)
+                    if key is not None:
+                        keys(key_column).add(key)
+        elif change['op'] == 'update':
+            flush()
+            if change['key'] in df.columns:
+                _set_values(df, df[change['key']] == change['id'], change['values'])
+    flush()
+    # ردیف‌های جدید یا مقادیر ناهم‌نوع ممکن است نوع ستون را به object برگردانده باشند
+    return apply_schema(df, changes[0]['sheet']) if changes else df
+
+
+class VersionConflict(Exception):
+    """شیت یا ردیف پس از خواندن توسط نشست دیگری تغییر کرده است"""
+
+
+def _comparable(value) -> str:
+    # تاریخ‌ها در شیت‌های نوع‌دار Timestamp و در SQLite یا فرم‌ها رشته هستند
+    if isinstance(value, (datetime, date)):
+        if isinstance(value, datetime) and (value.hour or value.minute or value.second):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+def _same_value(current, expected) -> bool:
+    if pd.isna(current) or pd.isna(expected):
+        return bool(pd.isna(current) and pd.isna(expected))
+    return current == expected or _comparable(current) == _comparable(expected)
+
+
+def check_row(df, key_column, key, expected: Optional[dict]):
+    """بررسی اینکه ردیف هنوز همان مقادیری را دارد که نشست هنگام خواندن دیده بود"""
+    if not expected:
+        return
+    rows = df[df[key_column] == key] if key_column in df.columns else df.iloc[:0]
+    compare_row(key, None if rows.empty else rows.iloc[0], expected)
+
+
+def compare_row(key, row, expected: dict):
+    """مقایسه یک ردیف (Series یا dict؛ None یعنی ردیف حذف شده) با مقادیر مورد انتظار"""
+    if row is None:
+        raise VersionConflict(f"ردیف {key} توسط کاربر دیگری حذف شده است")
+    for column, value in expected.items():
+        if not _same_value(row.get(column), value):
+            raise VersionConflict(f"ردیف {key} همزمان توسط کاربر دیگری تغییر کرده است ({column})")
+
+
+def check_changes(df, changes):
+    """بررسی مقادیر مورد انتظار همه به‌روزرسانی‌های یک شیت"""
+    for change in changes:
+        if change['op'] == 'update' and change.get('expected'):
+            check_row(df, change['key'], change['id'], change['expected'])
+
+
+class Transaction:
+    """مجموعه تغییرات چند شیت که با هم و در یک نوشتن فیزیکی ثبت می‌شوند"""
+
+    def __init__(self):
+        self.changes: List[dict] = []
+
+    def insert(self, sheet_name, rows: List[dict]):
+        self.changes.append(insert_change(sheet_name, rows))
+        return self
+
+    def update(self, sheet_name, key_column, key, values: dict, expected: Optional[dict] = None):
+        self.changes.append(update_change(sheet_name, key_column, key, values, expected))
+        return self
+
+    def __len__(self):
+        return len(self.changes)
+
+
+# ---------------------------------------------------------------------------
+# شناسه‌های ترتیبی
+# ---------------------------------------------------------------------------
+
+# پیشوند و ستون شناسه موجودیت‌هایی که شناسه آن‌ها توسط سیستم ساخته می‌شود
+ID_SEQUENCES = {
+    'Gaps': ('GAP', 'GapID'),
+    'Development_Plans': ('PLAN', 'PlanID'),
+    'Training_Records': ('REC', 'RecordID'),
+}
+
+# تعداد ارقام شناسه‌ها (مرتب‌سازی متنی تا ۹۹۹۹۹۹ درست می‌ماند؛ داده نمونه هم با همین عرض ساخته می‌شود)
+ID_WIDTH = 6
+
+
+def format_id(prefix, number) -> str:
+    return f"{prefix}-{number:0{ID_WIDTH}d}"
+
+
+def max_id_number(df, key_column, prefix) -> int:
+    """بزرگ‌ترین شماره شناسه‌های موجود با پیشوند داده‌شده (صفر اگر شناسه‌ای نباشد)"""
+    if key_column not in df.columns or df.empty:
+        return 0
+    numbers = df[key_column].astype(str).str.extract(rf'^{re.escape(prefix)}-(\d+)$', expand=False)
+    numbers = pd.to_numeric(numbers, errors='coerce').dropna()
+    return int(numbers.max()) if not numbers.empty else 0
+
+
+@contextmanager
+def file_lock(path) -> Iterator[None]:
+    """قفل انحصاری بین پروسه‌ها روی یک فایل قفل (fcntl در لینوکس و مک، msvcrt در ویندوز)"""
+    with open(path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK پس از حدود ده ثانیه انتظار خطا می‌دهد
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class SequenceFile:
+    """شمارنده‌های شناسه در یک فایل JSON کنار داده‌ها (هر تخصیص یک نوشتن اتمیک کوچک)
+
+    خواندن، افزایش و جایگزینی فایل زیر قفل نخ‌ها و قفل فایل انجام می‌شود تا نشست‌های Streamlit و پروسه‌های
+    جداگانه (مثلاً python talent_import.py کنار برنامه) شناسه تکراری نگیرند.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = path + '.lock'
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, int]:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write(self, values):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix='.tms-', suffix='.json', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(values, f)
+                f.flush()
+                os.fsync(f.fileno())
+            _commit_file(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def allocate(self, name, count, seed, floor=0) -> int:
+        """رزرو count شماره پشت سر هم و برگرداندن اولین آن‌ها؛ seed فقط بار اول (آخرین شماره موجود) صدا زده می‌شود"""
+        with self._lock, file_lock(self.lock_path):
+            values = self._read()
+            current = max(values[name] if name in values else seed(), floor)
+            values[name] = current + count
+            self._write(values)
+            return current + 1
+
+    def reset(self):
+        with self._lock, file_lock(self.lock_path):
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class StorageBackend:
+    """رابط پایه موتورهای ذخیره‌سازی شیت‌ها"""
+
+    name = ''
+    title = ''
+    # درج ردیفی با کلید موجود به‌روزرسانی همان ردیف است (در SQLite یک INSERT ساده)
+    upsert = True
+
+    def __init__(self, path):
+        self.path = path
+        # شمارنده‌های شناسه (موتورهای دارای جدول شمارنده مانند SQLite از آن استفاده نمی‌کنند)
+        self.sequences = SequenceFile(os.path.abspath(path).rstrip(os.sep) + '.sequences.json')
+
+    def exists(self) -> bool:
+        raise NotImplementedError
+
+    def initialize(self, sheets: Dict[str, pd.DataFrame]):
+        """ایجاد ساختار اولیه با شیت‌های خالی"""
+        raise NotImplementedError
+
+    def load_sheet(self, sheet_name, columns=None, copy=False) -> pd.DataFrame:
+        """بارگذاری شیت؛ با columns فقط همان ستون‌ها خوانده می‌شوند"""
+        raise NotImplementedError
+
+    def load_rows(self, sheet_name, column, values, columns=None) -> pd.DataFrame:
+        """ردیف‌هایی از شیت که مقدار column آن‌ها در values است (به ترتیب شیت)
+
+        موتورهایی که امکانش را دارند شرط را هنگام خواندن اعمال می‌کنند و فقط همان ردیف‌ها را می‌خوانند.
+        """
+        selected = None if columns is None else list(dict.fromkeys([*columns, column]))
+        df = self.load_sheet(sheet_name, columns=selected)
+        if column not in df.columns:
+            return project_columns(df.iloc[:0], columns)
+        return project_columns(df[df[column].isin(list(values))], columns)
+
+    def sheet_version(self, sheet_name):
+        """نسخه فعلی شیت (None اگر شیت وجود نداشته باشد)؛ با هر نوشتن در آن شیت تغییر می‌کند"""
+        raise NotImplementedError
+
+    def save_sheet(self, df, sheet_name, expected_version=None):
+        """ذخیره کامل شیت؛ اگر expected_version داده شود و شیت در این فاصله تغییر کرده باشد VersionConflict"""
+        raise NotImplementedError
+
+    def save_sheets(self, frames: Dict[str, pd.DataFrame], expected_versions: Optional[dict] = None):
+        """ذخیره چند شیت؛ موتورهایی که امکانش را دارند همه را در یک نوشتن فیزیکی ثبت می‌کنند"""
+        expected_versions = expected_versions or {}
+        for sheet_name, df in frames.items():
+            self.save_sheet(df, sheet_name, expected_version=expected_versions.get(sheet_name))
+
+    def modify_sheet(self, sheet_name, func, retries=20):
+        """خواندن، تغییر با func و ذخیره با کنترل نسخه؛ در صورت تداخل با داده تازه دوباره تلاش می‌شود"""
+        for attempt in range(retries + 1):
+            version = self.sheet_version(sheet_name)
+            df = func(self.load_sheet(sheet_name))
+            try:
+                self.save_sheet(df, sheet_name, expected_version=version)
+                return df
+            except VersionConflict:
+                if attempt == retries:
+                    raise
+            # تأخیر تصادفی نمایی تا نشست‌های رقیب هم‌زمان دوباره تلاش نکنند
+            time.sleep(random.uniform(0, 0.005 * 2 ** min(attempt, 6)))
+
+    def apply(self, changes: List[dict], retries=20):
+        """ثبت اتمیک تغییرات ردیفی یک یا چند شیت؛ پیاده‌سازی پیش‌فرض شیت‌های درگیر را با کنترل نسخه
+        بازنویسی می‌کند و در صورت تداخل در سطح شیت دوباره تلاش می‌شود (تداخل ردیف‌ها خطا است)
+        """
+        grouped = group_changes(changes)
+        for attempt in range(retries + 1):
+            versions, frames = {}, {}
+            for sheet_name, sheet_changes in grouped.items():
+                versions[sheet_name] = self.sheet_version(sheet_name)
+                df = self.load_sheet(sheet_name)
+                check_changes(df, sheet_changes)
+                frames[sheet_name] = apply_changes(df, sheet_changes, upsert=self.upsert)
+            try:
+                self.save_sheets(frames, expected_versions=versions)
+                return
+            except VersionConflict:
+                if attempt == retries:
+                    raise
+            time.sleep(random.uniform(0, 0.005 * 2 ** min(attempt, 6)))
+
+    def commit(self, transaction: Transaction):
+        if len(transaction):
+            self.apply(transaction.changes)
+
+    @contextmanager
+    def transaction(self) -> Iterator[Transaction]:
+        """with backend.transaction() as tx: ... ؛ در پایان بلوک (بدون خطا) همه تغییرات یکجا ثبت می‌شوند"""
+        transaction = Transaction()
+        yield transaction
+        self.commit(transaction)
+
+    def append_rows(self, sheet_name, rows: List[dict]):
+        """افزودن چند ردیف"""
+        self.apply([insert_change(sheet_name, rows)])
+
+    def update_rows(self, sheet_name, key_column, key, values: dict, expected: Optional[dict] = None):
+        """به‌روزرسانی چند ستون از ردیف(های) دارای کلید داده‌شده
+
+        expected: مقادیری که نشست هنگام خواندن دیده بود؛ اگر ردیف در این فاصله تغییر کرده باشد
+        VersionConflict رخ می‌دهد و هیچ تغییری ذخیره نمی‌شود.
+        """
+        self.apply([update_change(sheet_name, key_column, key, values, expected)])
+
+    def _allocate(self, name, count, seed, floor=0) -> int:
+        return self.sequences.allocate(name, count, seed, floor)
+
+    def allocate_ids(self, sheet_name, count=1, floor=0) -> List[str]:
+        """رزرو اتمیک count شناسه جدید برای یک موجودیت بدون بارگذاری شیت (بلوک پشت سر هم برای ورود انبوه)
+
+        floor: شماره‌ای که شناسه‌های جدید باید بعد از آن باشند (مثلاً بزرگ‌ترین شناسه آمده در فایل ورودی)
+        """
+        prefix, key_column = ID_SEQUENCES[sheet_name]
+
+        def seed():
+            # فقط بار اول: آخرین شماره موجود در داده‌ها
+            try:
+                return max_id_number(self.load_sheet(sheet_name, columns=[key_column]), key_column, prefix)
+            except (ValueError, OSError, sqlite3.Error):
+                # شیت یا فایل هنوز ساخته نشده است
+                return 0
+
+        first = self._allocate(sheet_name, count, seed, floor)
+        return [format_id(prefix, number) for number in range(first, first + count)]
+
+    def sync_sequences(self, sheet_names=None, frames=None):
+        """هم‌سطح کردن شمارنده‌ها با بزرگ‌ترین شناسه موجود (پس از جایگزینی کامل شیت‌ها از بیرون)
+
+        frames: شیت‌هایی که همین حالا ذخیره شده‌اند و در حافظه موجودند (بدون بارگذاری دوباره)
+        """
+        frames = frames or {}
+        for sheet_name in sheet_names or list(ID_SEQUENCES):
+            if sheet_name not in ID_SEQUENCES:
+                continue
+            prefix, key_column = ID_SEQUENCES[sheet_name]
+            try:
+                df = frames[sheet_name] if sheet_name in frames else self.load_sheet(sheet_name, columns=[key_column])
+                floor = max_id_number(df, key_column, prefix)
+            except (ValueError, OSError, sqlite3.Error):
+                continue
+            self._allocate(sheet_name, 0, lambda: floor, floor)
+
+    def import_workbook(self, source) -> List[str]:
+        """ورود تمام شیت‌های یک فایل اکسل به موتور فعلی"""
+        sheets = pd.read_excel(source, sheet_name=None)
+        for sheet_name, df in sheets.items():
+            self.save_sheet(df, sheet_name)
+        self.sync_sequences(list(sheets))
+        return list(sheets)
+
+    def clear_cache(self):
+        """پاک کردن کش داخلی (برای بنچمارک و بارگذاری مجدد)"""
+
+    def reset(self):
+        """حذف کامل داده‌ها"""
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return f"{self.title} ({self.path})"
+
+
+# سقف ردیف‌های یک شیت اکسل (به همراه ردیف سرستون)
+EXCEL_MAX_ROWS = 1_048_576
+
+
+class ExcelBackend(StorageBackend):
+    """ذخیره‌سازی در یک فایل اکسل با کش پارس و نوشتن تک‌شیت"""
+
+    name = 'excel'
+    title = 'فایل اکسل'
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def initialize(self, sheets):
+        self._write_workbook(sheets)
+
+    def load_sheet(self, sheet_name, columns=None, copy=False):
+        df = WORKBOOK_CACHE.get_sheet(self.path, sheet_name)
+        if columns is not None:
+            df = project_columns(df, columns)
+        return df.copy() if copy else df
+
+    def sheet_version(self, sheet_name):
+        return sheet_part_version(self.path, sheet_name)
+
+    def save_sheet(self, df, sheet_name, expected_version=None):
+        self.save_sheets({sheet_name: df}, {sheet_name: expected_version})
+
+    def save_sheets(self, frames, expected_versions=None):
+        for sheet_name, df in frames.items():
+            if len(df) >= EXCEL_MAX_ROWS:
+                raise ValueError(f"شیت {sheet_name} با {len(df):,} ردیف از سقف ردیف‌های اکسل بیشتر است؛ "
+                                 "برای این حجم از sqlite یا parquet استفاده کنید")
+        with _WRITE_LOCK:
+            for sheet_name, expected_version in (expected_versions or {}).items():
+                if expected_version is not None and self.sheet_version(sheet_name) != expected_version:
+                    raise VersionConflict(f"شیت {sheet_name} همزمان توسط کاربر دیگری تغییر کرده است")
+            # همه شیت‌ها در یک بازنویسی فایل zip
+            if patch_workbook_sheets(self.path, frames):
+                return
+            # شیت جدید یا فایل ناموجود: بازنویسی کامل فایل
+            existing_data = {}
+            if self.exists():
+                existing_data = dict(WORKBOOK_CACHE.get_workbook(self.path))
+            existing_data.update(frames)
+            self._write_workbook(existing_data)
+
+    def _write_workbook(self, sheets):
+        """نوشتن کامل فایل در یک فایل موقت و جایگزینی اتمیک"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix='.tms-', suffix='.xlsx', dir=directory)
+        os.close(fd)
+        try:
+            with _WRITE_LOCK:
+                try:
+                    write_workbook(temp_path, sheets)
+                except BaseException:
+                    os.remove(temp_path)
+                    raise
+                _commit_file(temp_path, self.path)
+        finally:
+            WORKBOOK_CACHE.invalidate(self.path)
+
+    def clear_cache(self):
+        WORKBOOK_CACHE.invalidate(self.path)
+
+    def reset(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        WORKBOOK_CACHE.invalidate(self.path)
+        self.sequences.reset()
+
+
+def _quote(identifier) -> str:
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _sql_rows(df) -> Iterator[tuple]:
+    """تبدیل DataFrame به ردیف‌هایی با انواع پایه پایتون برای SQLite"""
+    columns = []
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            series = series.dt.strftime('%Y-%m-%d')
+        values = series.astype(object)
+        columns.append(values.where(series.notna(), None).tolist())
+    return zip(*columns)
+
+
+# تبدیل انواع numpy و pandas که sqlite3 به صورت پیش‌فرض نمی‌شناسد
+for _numpy_type in (np.int8, np.int16, np.int32, np.int64, np.uint8, np.uint16, np.uint32, np.uint64):
+    sqlite3.register_adapter(_numpy_type, int)
+for _numpy_type in (np.float16, np.float32):
+    sqlite3.register_adapter(_numpy_type, float)
+sqlite3.register_adapter(np.bool_, bool)
+sqlite3.register_adapter(pd.Timestamp, lambda value: value.strftime('%Y-%m-%d'))
+sqlite3.register_adapter(date, lambda value: value.strftime('%Y-%m-%d'))
+
+
+class SQLiteBackend(StorageBackend):
+    """ذخیره‌سازی در پایگاه داده SQLite؛ هر شیت یک جدول با ایندکس روی ستون‌های کلیدی"""
+
+    name = 'sqlite'
+    title = 'پایگاه داده SQLite'
+    upsert = False
+    INDEXED_COLUMNS = ('EmployeeID', 'GapID', 'PlanID', 'Unit', 'Status')
+    VERSIONS_TABLE = '_sheet_versions'
+    SEQUENCES_TABLE = '_sequences'
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._local = threading.local()
+        self._frames = FrameCache()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """اتصال جداگانه برای هر نخ (هر نشست Streamlit در نخ خودش اجرا می‌شود)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def exists(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        row = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (self.VERSIONS_TABLE,)).fetchone()
+        return row is not None
+
+    def initialize(self, sheets):
+        conn = self.connection
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(f'CREATE TABLE IF NOT EXISTS {_quote(self.VERSIONS_TABLE)} '
+                         '(sheet TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+            for sheet_name, df in sheets.items():
+                self._ensure_table(conn, sheet_name, list(df.columns))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _table_columns(self, conn, sheet_name) -> List[str]:
+        return [row[1] for row in conn.execute(f'PRAGMA table_info({_quote(sheet_name)})')]
+
+    def _ensure_table(self, conn, sheet_name, columns) -> List[str]:
+        """ایجاد جدول یا افزودن ستون‌های جدید؛ ستون‌های نهایی جدول را برمی‌گرداند"""
+        existing = self._table_columns(conn, sheet_name)
+        if not existing:
+            column_sql = ', '.join(_quote(column) for column in columns)
+            conn.execute(f'CREATE TABLE {_quote(sheet_name)} ({column_sql})')
+            conn.execute(f'INSERT OR IGNORE INTO {_quote(self.VERSIONS_TABLE)} VALUES (?, 0)', (sheet_name,))
+            existing = list(columns)
+        else:
+            for column in columns:
+                if column not in existing:
+                    conn.execute(f'ALTER TABLE {_quote(sheet_name)} ADD COLUMN {_quote(column)}')
+                    existing.append(column)
+        for column in self.INDEXED_COLUMNS:
+            if column in existing:
+                conn.execute(f'CREATE INDEX IF NOT EXISTS {_quote(f"ix_{sheet_name}_{column}")} '
+                             f'ON {_quote(sheet_name)} ({_quote(column)})')
+        return existing
+
+    def _version(self, conn, sheet_name) -> Optional[int]:
+        row = conn.execute(f'SELECT version FROM {_quote(self.VERSIONS_TABLE)} WHERE sheet=?',
+                           (sheet_name,)).fetchone()
+        return None if row is None else row[0]
+
+    def _bump_version(self, conn, sheet_name) -> int:
+        conn.execute(f'UPDATE {_quote(self.VERSIONS_TABLE)} SET version = version + 1 WHERE sheet=?',
+                     (sheet_name,))
+        return self._version(conn, sheet_name)
+
+    def sheet_version(self, sheet_name):
+        return self._version(self.connection, sheet_name)
+
+    def load_sheet(self, sheet_name, columns=None, copy=False):
+        conn = self.connection
+        version = self._version(conn, sheet_name)
+        if version is None:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        key = None if columns is None else tuple(columns)
+        df = self._frames.get(sheet_name, version, key)
+        if df is None:
+            table_columns = self._table_columns(conn, sheet_name)
+            selected = table_columns if key is None else [c for c in key if c in table_columns]
+            column_sql = ', '.join(_quote(column) for column in selected) or 'NULL'
+            df = pd.read_sql_query(f'SELECT {column_sql} FROM {_quote(sheet_name)} ORDER BY rowid', conn)
+            if not selected:
+                df = df.iloc[:, :0]
+            df = apply_schema(df, sheet_name)
+            self._frames.put(sheet_name, version, df, key)
+        return df.copy() if copy else df
+
+    def load_rows(self, sheet_name, column, values, columns=None):
+        """شرط IN در خود پرس‌وجو (با ایندکس ستون‌های INDEXED_COLUMNS)؛ مقدارها یک پارامتر JSON هستند"""
+        conn = self.connection
+        if self._version(conn, sheet_name) is None:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        table_columns = self._table_columns(conn, sheet_name)
+        selected = table_columns if columns is None else [c for c in columns if c in table_columns]
+        values = [value for value in np.asarray(list(values), dtype=object).tolist() if not pd.isna(value)]
+        column_sql = ', '.join(_quote(column) for column in selected) or 'NULL'
+        where = (f'{_quote(column)} IN (SELECT value FROM json_each(?))' if column in table_columns and values
+                 else '0')
+        df = pd.read_sql_query(f'SELECT {column_sql} FROM {_quote(sheet_name)} WHERE {where} ORDER BY rowid', conn,
+                               params=(json.dumps(values, default=str),) if where != '0' else None)
+        if not selected:
+            df = df.iloc[:, :0]
+        return apply_schema(df, sheet_name)
+
+    def _check_version(self, conn, sheet_name, expected_version):
+        if expected_version is not None and self._version(conn, sheet_name) != expected_version:
+            raise VersionConflict(f"شیت {sheet_name} همزمان توسط کاربر دیگری تغییر کرده است")
+
+    def _insert(self, conn, sheet_name, df):
+        if len(df.columns) and len(df):
+            column_sql = ', '.join(_quote(column) for column in df.columns)
+            placeholders = ', '.join('?' for _ in df.columns)
+            conn.executemany(f'INSERT INTO {_quote(sheet_name)} ({column_sql}) VALUES ({placeholders})',
+                             _sql_rows(df))
+
+    def save_sheet(self, df, sheet_name, expected_version=None):
+        self.save_sheets({sheet_name: df}, {sheet_name: expected_version})
+
+    def save_sheets(self, frames, expected_versions=None):
+        """بازنویسی چند جدول و افزایش نسخه آن‌ها در یک تراکنش"""
+        expected_versions = expected_versions or {}
+        conn = self.connection
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            versions = {}
+            for sheet_name, df in frames.items():
+                self._check_version(conn, sheet_name, expected_versions.get(sheet_name))
+                self._ensure_table(conn, sheet_name, list(df.columns))
+                conn.execute(f'DELETE FROM {_quote(sheet_name)}')
+                self._insert(conn, sheet_name, df)
+                versions[sheet_name] = self._bump_version(conn, sheet_name)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        for sheet_name, df in frames.items():
+            self._frames.put(sheet_name, versions[sheet_name], apply_schema(df.copy(), sheet_name))
+
+    def _allocate(self, name, count, seed, floor=0):
+        """شمارنده شناسه در جدول _sequences داخل یک تراکنش"""
+        conn = self.connection
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {_quote(self.SEQUENCES_TABLE)} '
+                     '(name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(f'SELECT value FROM {_quote(self.SEQUENCES_TABLE)} WHERE name=?', (name,)).fetchone()
+            current = max(row[0] if row is not None else seed(), floor)
+            conn.execute(f'INSERT OR REPLACE INTO {_quote(self.SEQUENCES_TABLE)} VALUES (?, ?)', (name, current + count))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return current + 1
+
+    def _check_row(self, conn, sheet_name, key_column, key, expected):
+        """مقایسه ردیف فعلی با مقادیر مورد انتظار داخل همان تراکنش نوشتن"""
+        if not expected:
+            return
+        table_columns = self._table_columns(conn, sheet_name)
+        columns = [column for column in expected if column in table_columns]
+        column_sql = ', '.join(_quote(column) for column in columns) or 'NULL'
+        row = conn.execute(f'SELECT {column_sql} FROM {_quote(sheet_name)} WHERE {_quote(key_column)} = ? LIMIT 1',
+                           (key,)).fetchone()
+        compare_row(key, None if row is None else dict(zip(columns, row)), expected)
+
+    def apply(self, changes, retries=20):
+        """همه تغییرات در یک تراکنش SQLite؛ فقط ردیف‌های درگیر نوشته می‌شوند"""
+        conn = self.connection
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            base_versions = {}
+            for change in changes:
+                sheet_name = change['sheet']
+                if change['op'] == 'insert':
+                    rows = pd.DataFrame(change['rows'])
+                    self._ensure_table(conn, sheet_name, list(rows.columns))
+                    base_versions.setdefault(sheet_name, self._version(conn, sheet_name))
+                    self._insert(conn, sheet_name, rows)
+                else:
+                    values = change['values']
+                    self._check_row(conn, sheet_name, change['key'], change['id'], change.get('expected'))
+                    self._ensure_table(conn, sheet_name, [change['key']] + list(values))
+                    base_versions.setdefault(sheet_name, self._version(conn, sheet_name))
+                    assignments = ', '.join(f'{_quote(column)} = ?' for column in values)
+                    conn.execute(f'UPDATE {_quote(sheet_name)} SET {assignments} WHERE {_quote(change["key"])} = ?',
+                                 [*values.values(), change['id']])
+            versions = {sheet_name: self._bump_version(conn, sheet_name) for sheet_name in base_versions}
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        # به‌روزرسانی کش به جای خواندن دوباره کل جدول
+        for sheet_name, sheet_changes in group_changes(changes).items():
+            cached = self._frames.full_frame(sheet_name, base_versions[sheet_name])
+            self._frames.drop(sheet_name)
+            if cached is not None:
+                self._frames.put(sheet_name, versions[sheet_name],
+                                 apply_changes(cached, sheet_changes, upsert=self.upsert))
+
+    def clear_cache(self):
+        self._frames.clear()
+
+    def reset(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+        self.clear_cache()
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("برای موتور Parquet بسته pyarrow را نصب کنید: pip install pyarrow") from e
+    return pyarrow
+
+
+class ParquetBackend(StorageBackend):
+    """ذخیره‌سازی ستونی: هر شیت یک فایل Parquet با خواندن memory-mapped و انتخاب ستون"""
+
+    name = 'parquet'
+    title = 'فایل‌های ستونی Parquet'
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._frames = FrameCache()
+        # قفل نوشتن جداگانه برای هر شیت تا نوشتن شیت‌های مختلف موازی انجام شود
+        self._locks_guard = threading.Lock()
+        self._sheet_locks: Dict[str, threading.Lock] = {}
+
+    def _sheet_path(self, sheet_name) -> str:
+        return os.path.join(self.path, f"{sheet_name}.parquet")
+
+    def _sheet_lock(self, sheet_name) -> threading.Lock:
+        with self._locks_guard:
+            return self._sheet_locks.setdefault(sheet_name, threading.Lock())
+
+    def _sheet_version(self, sheet_name) -> tuple:
+        try:
+            return WorkbookCache.file_version(self._sheet_path(sheet_name))
+        except FileNotFoundError:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found") from None
+
+    def sheet_version(self, sheet_name):
+        try:
+            return self._sheet_version(sheet_name)
+        except ValueError:
+            return None
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.path) and any(name.endswith('.parquet') for name in os.listdir(self.path))
+
+    def initialize(self, sheets):
+        os.makedirs(self.path, exist_ok=True)
+        for sheet_name, df in sheets.items():
+            self.save_sheet(df, sheet_name)
+
+    def load_sheet(self, sheet_name, columns=None, copy=False):
+        pyarrow = _import_pyarrow()
+        version = self._sheet_version(sheet_name)
+        key = None if columns is None else tuple(columns)
+        df = self._frames.get(sheet_name, version, key)
+        if df is None:
+            path = self._sheet_path(sheet_name)
+            selected = None
+            if key is not None:
+                names = pyarrow.parquet.read_schema(path, memory_map=True).names
+                selected = [column for column in key if column in names]
+            table = pyarrow.parquet.read_table(path, columns=selected, memory_map=True)
+            df = apply_schema(table.to_pandas(), sheet_name)
+            self._frames.put(sheet_name, version, df, key)
+        return df.copy() if copy else df
+
+    def load_rows(self, sheet_name, column, values, columns=None):
+        """شرط IN هنگام خواندن فایل (گروه‌های ردیفی بی‌ربط خوانده نمی‌شوند)"""
+        pyarrow = _import_pyarrow()
+        self._sheet_version(sheet_name)
+        path = self._sheet_path(sheet_name)
+        names = pyarrow.parquet.read_schema(path, memory_map=True).names
+        selected = names if columns is None else [c for c in columns if c in names]
+        values = [value for value in np.asarray(list(values), dtype=object).tolist() if not pd.isna(value)]
+        if column not in names or not values:
+            table = pyarrow.parquet.read_table(path, columns=selected, memory_map=True).slice(0, 0)
+        else:
+            try:
+                table = pyarrow.parquet.read_table(path, columns=selected, memory_map=True,
+                                                   filters=[(column, 'in', values)])
+            except (pyarrow.ArrowTypeError, pyarrow.ArrowInvalid, pyarrow.ArrowNotImplementedError):
+                # نوع مقدارها با نوع ستون فایل سازگار نیست
+                return super().load_rows(sheet_name, column, values, columns)
+        return apply_schema(table.to_pandas(), sheet_name)
+
+    @staticmethod
+    def _to_table(pyarrow, df):
+        try:
+            return pyarrow.Table.from_pandas(df, preserve_index=False)
+        except (pyarrow.ArrowTypeError, pyarrow.ArrowInvalid):
+            # ستون‌های متنی با انواع مخلوط (مثلاً عدد و رشته) به رشته تبدیل می‌شوند
+            df = df.copy()
+            for column in df.columns:
+                if df[column].dtype == object:
+                    df[column] = df[column].map(lambda value: value if pd.isna(value) else str(value))
+            return pyarrow.Table.from_pandas(df, preserve_index=False)
+
+    def save_sheet(self, df, sheet_name, expected_version=None):
+        pyarrow = _import_pyarrow()
+        os.makedirs(self.path, exist_ok=True)
+        table = self._to_table(pyarrow, df)
+        path = self._sheet_path(sheet_name)
+        fd, temp_path = tempfile.mkstemp(prefix='.tms-', suffix='.parquet', dir=self.path)
+        os.close(fd)
+        try:
+            pyarrow.parquet.write_table(table, temp_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        with self._sheet_lock(sheet_name):
+            if expected_version is not None and self.sheet_version(sheet_name) != expected_version:
+                os.remove(temp_path)
+                raise VersionConflict(f"شیت {sheet_name} همزمان توسط کاربر دیگری تغییر کرده است")
+            _commit_file(temp_path, path)
+        self._frames.drop(sheet_name)
+
+    def clear_cache(self):
+        self._frames.clear()
+
+    def reset(self):
+        if os.path.isdir(self.path):
+            for name in os.listdir(self.path):
+                if name.endswith('.parquet'):
+                    os.remove(os.path.join(self.path, name))
+        self.clear_cache()
+        self.sequences.reset()
+
+
+STORAGE_BACKENDS = {
+    ExcelBackend.name: ExcelBackend,
+    SQLiteBackend.name: SQLiteBackend,
+    ParquetBackend.name: ParquetBackend,
+}
+
+
+# ---------------------------------------------------------------------------
+# ژورنال فقط‌افزودنی و ادغام در پس‌زمینه
+# ---------------------------------------------------------------------------
+
+def _json_default(value):
+    if value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+class JournaledBackend(StorageBackend):
+    """ثبت تغییرات ردیفی در یک ژورنال فقط‌افزودنی روی موتور پایه و ادغام دوره‌ای آن در پس‌زمینه
+
+    خواندن‌ها نمای ادغام‌شده (موتور پایه + تغییرات ژورنال) را می‌بینند؛ پس از قطع برنامه
+    تغییرات ادغام‌نشده از روی فایل ژورنال بازیابی می‌شوند. فقط تغییراتی به ژورنال می‌روند که اعمال دوباره‌شان
+    بی‌اثر است (درج با کلید SHEET_KEYS و به‌روزرسانی با کلید)، چون پس از ذخیره در موتور پایه و پیش از ثبت
+    نشانگر ادغام (فایل .compacted) ممکن است همان تغییرات دوباره روی موتور پایه اعمال شوند.
+    """
+
+    # تغییراتی با این تعداد ردیف درج یا بیشتر از ژورنال عبور نمی‌کنند
+    bulk_rows = 1000
+
+    def __init__(self, base: StorageBackend, compact_threshold=200, compact_interval=30.0):
+        super().__init__(base.path)
+        self.base = base
+        self.name = base.name
+        self.title = base.title
+        self.compact_threshold = compact_threshold
+        self.compact_interval = compact_interval
+        self.journal_path = os.path.abspath(base.path).rstrip(os.sep) + '.journal.jsonl'
+        self.compacting_path = self.journal_path + '.compacting'
+        # آخرین شماره ادغام‌شده در موتور پایه؛ خط‌های تا این شماره هنگام بازیابی نادیده گرفته می‌شوند
+        self.compacted_path = self.journal_path + '.compacted'
+        # قفل ژورنال و وضعیت حافظه؛ قفل ادغام برای نوشتن در موتور پایه
+        self._lock = threading.RLock()
+        self._compact_lock = threading.RLock()
+        self._pending: Dict[str, List[dict]] = {}
+        self._pending_count = 0
+        self._seq = 0
+        # شیت -> (DataFrame پایه، آخرین شماره اعمال‌شده، DataFrame ادغام‌شده)
+        self._merged: Dict[str, Tuple[pd.DataFrame, int, pd.DataFrame]] = {}
+        self._wake = threading.Event()
+        self._worker = None
+        self._recover()
+
+    # --- ژورنال -----------------------------------------------------------
+
+    def _read_journal(self, path) -> List[dict]:
+        entries = []
+        if not os.path.exists(path):
+            return entries
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # خط ناقص انتهای فایل (قطع برق حین نوشتن)
+                    break
+        return entries
+
+    def _read_compacted(self) -> int:
+        try:
+            with open(self.compacted_path, 'r', encoding='utf-8') as f:
+                return int(json.load(f)['upto'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0
+
+    def _write_compacted(self, upto):
+        directory = os.path.dirname(self.compacted_path)
+        fd, temp_path = tempfile.mkstemp(prefix='.tms-', suffix='.json', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'upto': upto}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            _commit_file(temp_path, self.compacted_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _recover(self):
+        """بازسازی تغییرات ادغام‌نشده از فایل‌های ژورنال"""
+        # شماره‌ها پس از آخرین ادغام ادامه پیدا می‌کنند (حتی اگر فایل‌های ژورنال حذف شده باشند)
+        compacted = self._seq = self._read_compacted()
+        entries = []
+        for line in self._read_journal(self.compacting_path) + self._read_journal(self.journal_path):
+            if line['op'] == 'batch':
+                # تراکنش چند شیتی: یک خط با یک شماره
+                entries.extend({**change, 'seq': line['seq']} for change in line['changes'])
+            else:
+                entries.append(line)
+        replaced: Dict[str, int] = {}
+        for entry in entries:
+            self._seq = max(self._seq, entry['seq'])
+            if entry['op'] == 'replace':
+                replaced[entry['sheet']] = max(replaced.get(entry['sheet'], 0), entry['upto'])
+        for entry in entries:
+            if entry['op'] != 'replace' and entry['seq'] > max(compacted, replaced.get(entry['sheet'], 0)):
+                self._pending.setdefault(entry['sheet'], []).append(entry)
+                self._pending_count += 1
+        if self._pending_count:
+            self._start_worker()
+
+    def _write_line(self, entry: dict):
+        line = json.dumps(entry, ensure_ascii=False, default=_json_default) + '\n'
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _record(self, changes: List[dict]):
+        """افزودن تغییرات به ژورنال در یک خط (O(1) نسبت به اندازه شیت؛ خط ناقص کل تراکنش را کنار می‌گذارد)"""
+        changes = [{key: value for key, value in change.items() if key != 'expected'} for change in changes]
+        with self._lock:
+            self._seq += 1
+            if len(changes) == 1:
+                self._write_line({**changes[0], 'seq': self._seq})
+            else:
+                self._write_line({'op': 'batch', 'seq': self._seq, 'changes': changes})
+            for change in changes:
+                self._pending.setdefault(change['sheet'], []).append({**change, 'seq': self._seq})
+            self._pending_count += len(changes)
+            count = self._pending_count
+        self._start_worker()
+        if count >= self.compact_threshold:
+            self._wake.set()
+
+    @property
+    def pending_count(self) -> int:
+        return self._pending_count
+
+    # --- ادغام در پس‌زمینه ----------------------------------------------------
+
+    def _start_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run_compactor, name='tms-journal-compactor',
+                                                daemon=True)
+                self._worker.start()
+
+    def _run_compactor(self):
+        while True:
+            self._wake.wait(self.compact_interval)
+            self._wake.clear()
+            try:
+                self.compact()
+            except Exception:
+                # در دور بعد دوباره تلاش می‌شود؛ تغییرات در ژورنال باقی می‌مانند
+                logging.getLogger(__name__).exception("ادغام ژورنال ناموفق بود")
+
+    def compact(self) -> int:
+        """ادغام تغییرات ژورنال در موتور پایه؛ تعداد تغییرات ادغام‌شده را برمی‌گرداند"""
+        with self._compact_lock:
+            with self._lock:
+                if not self._pending_count:
+                    return 0
+                if os.path.exists(self.journal_path):
+                    if os.path.exists(self.compacting_path):
+                        # ادغام ناتمام قبلی: ژورنال جاری به همان فایل اضافه می‌شود
+                        with open(self.journal_path, 'rb') as src, open(self.compacting_path, 'ab') as dst:
+                            dst.write(src.read())
+                            dst.flush()
+                            os.fsync(dst.fileno())
+                        os.remove(self.journal_path)
+                    else:
+                        os.replace(self.journal_path, self.compacting_path)
+                snapshot = {sheet: list(entries) for sheet, entries in self._pending.items() if entries}
+                upto = self._seq
+            # همه شیت‌ها در یک نوشتن فیزیکی موتور پایه
+            self.base.save_sheets({sheet_name: apply_changes(self.base.load_sheet(sheet_name), entries)
+                                   for sheet_name, entries in snapshot.items()})
+            # پیش از حذف ژورنال: بازیابی بعدی این تغییرات را دوباره اعمال نمی‌کند
+            self._write_compacted(upto)
+            with self._lock:
+                self._drop_pending(upto)
+                if os.path.exists(self.compacting_path):
+                    os.remove(self.compacting_path)
+            return sum(len(entries) for entries in snapshot.values())
+
+    def _drop_pending(self, upto, sheet_name=None):
+        for sheet in ([sheet_name] if sheet_name is not None else list(self._pending)):
+            entries = self._pending.get(sheet, [])
+            remaining = [entry for entry in entries if entry['seq'] > upto]
+            self._pending_count -= len(entries) - len(remaining)
+            if remaining:
+                self._pending[sheet] = remaining
+            else:
+                self._pending.pop(sheet, None)
+
+    # --- رابط موتور ذخیره‌سازی ----------------------------------------------
+
+    def exists(self) -> bool:
+        return self.base.exists()
+
+    def _allocate(self, name, count, seed, floor=0):
+        # شمارنده در موتور پایه؛ مقدار اولیه از نمای ادغام‌شده (شامل ردیف‌های ژورنال)
+        return self.base._allocate(name, count, seed, floor)
+
+    def initialize(self, sheets):
+        self.base.initialize(sheets)
+
+    def load_sheet(self, sheet_name, columns=None, copy=False):
+        with self._lock:
+            entries = list(self._pending.get(sheet_name, []))
+        if not entries:
+            return self.base.load_sheet(sheet_name, columns, copy)
+        base_df = self.base.load_sheet(sheet_name)
+        last_seq = entries[-1]['seq']
+        with self._lock:
+            cached = self._merged.get(sheet_name)
+        if cached is not None and cached[0] is base_df and cached[1] == last_seq:
+            df = cached[2]
+        else:
+            if cached is not None and cached[0] is base_df and cached[1] < last_seq:
+                df = apply_changes(cached[2], [entry for entry in entries if entry['seq'] > cached[1]])
+            else:
+                df = apply_changes(base_df, entries)
+            with self._lock:
+                self._merged[sheet_name] = (base_df, last_seq, df)
+        if columns is not None:
+            df = project_columns(df, columns)
+        return df.copy() if copy else df
+
+    def sheet_version(self, sheet_name):
+        with self._lock:
+            entries = self._pending.get(sheet_name)
+            last_seq = entries[-1]['seq'] if entries else 0
+        return (self.base.sheet_version(sheet_name), last_seq)
+
+    def save_sheet(self, df, sheet_name, expected_version=None):
+        self.save_sheets({sheet_name: df}, {sheet_name: expected_version})
+
+    def save_sheets(self, frames, expected_versions=None):
+        """ذخیره کامل چند شیت در یک نوشتن موتور پایه؛ تغییرات ژورنال قبلی همان شیت‌ها کنار گذاشته می‌شوند"""
+        with self._compact_lock:
+            with self._lock:
+                for sheet_name, expected_version in (expected_versions or {}).items():
+                    if expected_version is not None and self.sheet_version(sheet_name) != expected_version:
+                        raise VersionConflict(f"شیت {sheet_name} همزمان توسط کاربر دیگری تغییر کرده است")
+                upto = self._seq
+            self.base.save_sheets(frames)
+            with self._lock:
+                for sheet_name in frames:
+                    if sheet_name in self._pending:
+                        self._seq += 1
+                        self._write_line({'op': 'replace', 'sheet': sheet_name, 'seq': self._seq, 'upto': upto})
+                        self._drop_pending(upto, sheet_name)
+                    self._merged.pop(sheet_name, None)
+
+    @staticmethod
+    def _replayable(changes) -> bool:
+        """اعمال دوباره تغییرات بی‌اثر است: هر ردیف درج کلید دارد و درج تکراری به‌روزرسانی همان ردیف است"""
+        for change in changes:
+            if change['op'] == 'insert':
+                key_column = SHEET_KEYS.get(change['sheet'])
+                if key_column is None or any(pd.isna(row.get(key_column)) for row in change['rows']):
+                    return False
+        return True
+
+    def apply(self, changes, retries=20):
+        if (sum(len(change.get('rows', ())) for change in changes) >= self.bulk_rows
+                or not self._replayable(changes)):
+            # ورود انبوه (به جای یک خط بسیار بزرگ در ژورنال) یا درج بدون کلید (مثلاً Competencies):
+            # پس از ادغام ژورنال مستقیم در موتور پایه نوشته می‌شود
+            with self._compact_lock:
+                self.compact()
+                self.base.apply(changes, retries)
+            return
+        with self._lock:
+            # بررسی روی نمای ادغام‌شده و ثبت در ژورنال زیر یک قفل انجام می‌شود
+            for sheet_name, sheet_changes in group_changes(changes).items():
+                if any(change.get('expected') for change in sheet_changes):
+                    check_changes(self.load_sheet(sheet_name), sheet_changes)
+            self._record(changes)
+
+    def clear_cache(self):
+        with self._lock:
+            self._merged.clear()
+        self.base.clear_cache()
+
+    def reset(self):
+        with self._compact_lock, self._lock:
+            self._pending.clear()
+            self._pending_count = 0
+            self._merged.clear()
+            for path in (self.journal_path, self.compacting_path, self.compacted_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.base.reset()
+
+    def describe(self) -> str:
+        return f"{self.base.describe()} + ژورنال ({self._pending_count} تغییر ادغام‌نشده)"
+
+
+_BACKENDS: Dict[tuple, StorageBackend] = {}
+_BACKENDS_LOCK = threading.Lock()
+
+
+def create_backend(config: dict) -> StorageBackend:
+    """موتور ذخیره‌سازی بر اساس تنظیمات؛ برای هر مسیر یک نمونه مشترک در کل پروسه ساخته می‌شود"""
+    backend = config.get('backend', 'excel')
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"موتور ذخیره‌سازی ناشناخته: {backend}")
+    path = config.get('path') or DEFAULT_PATHS.get(backend, '')
+    journal = bool(config.get('journal', False))
+    key = (backend, os.path.abspath(path), journal)
+    with _BACKENDS_LOCK:
+        if key not in _BACKENDS:
+            instance = STORAGE_BACKENDS[backend](path)
+            if journal:
+                instance = JournaledBackend(instance, config.get('compact_threshold', 200),
+                                            config.get('compact_interval', 30.0))
+            _BACKENDS[key] = instance
+        return _BACKENDS[key]
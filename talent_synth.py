@@ -0,0 +1,388 @@
+"""تولید داده ساختگی واقع‌نما برای سازمان‌هایی با ۱ هزار تا ۱ میلیون کارمند (با seed ثابت)
+
+اجرا:
+    python talent_synth.py --size 10k
+    python talent_synth.py --employees 250000 --seed 7 --backend sqlite --path big.db
+"""
+import argparse
+import math
+import time
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from talent_schema import SHEET_SCHEMAS, apply_schema
+from talent_storage import STORAGE_BACKENDS, create_backend, format_id, load_storage_config
+
+ORG_SIZES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1M': 1_000_000}
+
+UNIT_SIZE = 25          # میانگین کارکنان هر واحد
+DEPARTMENT_UNITS = 20   # تعداد واحدهای هر معاونت
+COMPETENCIES_PER_JOB = 4
+
+# مشاغل: (کد، عنوان)؛ سه شغل آخر فقط برای مدیران
+JOBS = [
+    ('J-DEV-SR', 'توسعه‌دهنده ارشد'), ('J-DEV-JR', 'توسعه‌دهنده'), ('J-NET-AD', 'مدیر شبکه'),
+    ('J-QA-EN', 'مهندس تضمین کیفیت'), ('J-DATA-AN', 'تحلیلگر داده'), ('J-HR-SP', 'کارشناس منابع انسانی'),
+    ('J-FIN-AN', 'کارشناس مالی'), ('J-MKT-SP', 'کارشناس بازاریابی'), ('J-SALE-RP', 'نماینده فروش'),
+    ('J-SUP-TE', 'کارشناس پشتیبانی'), ('J-PM-MG', 'مدیر پروژه'), ('J-OPS-SP', 'کارشناس عملیات'),
+    ('J-MGR-UN', 'مدیر واحد'), ('J-MGR-DP', 'معاون'), ('J-CEO', 'مدیرعامل'),
+]
+STAFF_JOBS = len(JOBS) - 3
+
+# شایستگی‌ها: (دسته، نام)
+COMPETENCIES = [
+    ('فنی', 'برنامه‌نویسی پیشرفته پایتون'), ('فنی', 'طراحی معماری'), ('فنی', 'امنیت شبکه'),
+    ('فنی', 'تحلیل داده'), ('فنی', 'آزمون نرم‌افزار'), ('فنی', 'مدیریت پایگاه داده'),
+    ('فنی', 'رایانش ابری'), ('فنی', 'مدیریت شبکه‌های پیشرفته'),
+    ('رفتاری', 'ارائه مؤثر'), ('رفتاری', 'کار تیمی'), ('رفتاری', 'حل مسئله'), ('رفتاری', 'مذاکره'),
+    ('رفتاری', 'مدیریت زمان'), ('رفتاری', 'ارتباط با مشتری'),
+    ('مدیریتی', 'رهبری فنی'), ('مدیریتی', 'مدیریت پروژه'), ('مدیریتی', 'برنامه‌ریزی راهبردی'),
+    ('مدیریتی', 'مربیگری'),
+    ('سازمانی', 'آشنایی با فرایندها'), ('سازمانی', 'قوانین و مقررات'), ('سازمانی', 'گزارش‌نویسی'),
+]
+# نوع شکاف بر اساس دسته شایستگی
+GAP_TYPE_BY_CATEGORY = {'فنی': 'مهارتی', 'رفتاری': 'رفتاری', 'مدیریتی': 'مهارتی', 'سازمانی': 'فرهنگی'}
+
+LEVELS = ['کم', 'متوسط', 'زیاد']
+GAP_STATUSES = ['جدید', 'در دست اقدام', 'در حال پیگیری', 'حل شده']
+ROOT_CAUSES = ['عدم آموزش', 'عدم تجربه', 'عدم علاقه', 'مشکل انگیزشی', 'فقدان راهنمایی', 'سایر']
+PLAN_TYPES = ['آموزش', 'منتورینگ', 'پروژه', 'مطالعه', 'کارگاه']
+PROVIDERS = ['آکادمی داخلی', 'مؤسسه بیرونی', 'دانشگاه', 'پلتفرم آنلاین', 'مربی داخلی']
+EVALUATION_METHODS = ['آزمون عملی', 'ارائه', 'پروژه', 'ارزیابی ۳۶۰ درجه']
+EDUCATION_LEVELS = ['دیپلم', 'کاردانی', 'کارشناسی', 'کارشناسی ارشد', 'دکتری']
+MAJORS = ['مهندسی نرم‌افزار', 'مهندسی کامپیوتر', 'مدیریت', 'حسابداری', 'اقتصاد', 'روانشناسی', 'آمار']
+CAREER_STAGES = ['تازه‌کار', 'در حال توسعه', 'حرفه‌ای', 'ارشد', 'کارشناس']
+PERSONALITY_TYPES = [a + b + c + d for a in 'EI' for b in 'SN' for c in 'TF' for d in 'JP']
+LEARNING_PREFERENCES = ['آموزش آنلاین', 'کارگاه حضوری', 'منتورینگ', 'مطالعه فردی']
+KPI_NAMES = ['تحویل به موقع وظایف', 'کیفیت خروجی', 'رضایت مشتری', 'تعداد باگ در تولید', 'بهره‌وری']
+
+# بازه تاریخ‌ها ثابت است تا خروجی با seed یکسان همیشه یکسان باشد
+REFERENCE_DATE = np.datetime64('2025-06-30')
+
+
+def _pick(rng, values, size, p=None) -> pd.Categorical:
+    """انتخاب تصادفی از یک فهرست کوچک مستقیم به صورت category (بدون ساخت رشته برای هر ردیف)"""
+    return pd.Categorical.from_codes(rng.choice(len(values), size=size, p=p), categories=values)
+
+
+def _ids(prefix, count, start=1) -> list:
+    return [format_id(prefix, number) for number in range(start, start + count)]
+
+
+def _dates(rng, start, days, size) -> np.ndarray:
+    return (np.datetime64(start) + rng.integers(0, days, size).astype('timedelta64[D]')).astype('datetime64[ns]')
+
+
+def _frame(sheet_name, columns: dict) -> pd.DataFrame:
+    """DataFrame با ترتیب ستون‌های ثبت‌شده در schema و نوع‌های همان schema"""
+    df = pd.DataFrame(columns)
+    return apply_schema(df.reindex(columns=list(SHEET_SCHEMAS[sheet_name])), sheet_name)
+
+
+def _organization(n_departments, n_units, unit_of_employee, heads) -> pd.DataFrame:
+    unit_width = max(2, len(str(n_units)))
+    department_codes = [f"DEP{i:02d}" for i in range(1, n_departments + 1)]
+    unit_codes = [f"UNIT{i:0{unit_width}d}" for i in range(1, n_units + 1)]
+    unit_department = np.arange(n_units) // DEPARTMENT_UNITS
+    unit_counts = np.bincount(unit_of_employee[unit_of_employee >= 0], minlength=n_units)
+    department_counts = np.bincount(unit_department, weights=unit_counts, minlength=n_departments).astype(int)
+    return _frame('Organization', {
+        'Level': [1] + [2] * n_departments + [3] * n_units,
+        'Code': ['ORG'] + department_codes + unit_codes,
+        'Title': (['سازمان'] + [f"معاونت {i}" for i in range(1, n_departments + 1)]
+                  + [f"واحد {i}" for i in range(1, n_units + 1)]),
+        'ParentCode': [''] + ['ORG'] * n_departments + [department_codes[d] for d in unit_department],
+        'ResponsibilityLevel': ['سازمان'] + ['معاونت'] * n_departments + ['واحد'] * n_units,
+        'UnitHead': heads,
+        'NumberOfEmployees': [len(unit_of_employee)] + department_counts.tolist() + unit_counts.tolist(),
+        'DepartmentKPIs': '',
+    })
+
+
+def generate_org(employees=1_000, seed=0, gaps_per_employee=1.5, new_gap_plan_share=0.1,
+                 trainings_per_employee=2.0, kpi_months=3) -> Dict[str, pd.DataFrame]:
+    """هر هشت شیت یک سازمان ساختگی با سلسله‌مراتب مدیریتی کامل
+
+    ساختار: یک مدیرعامل، معاونت‌ها (هر کدام DEPARTMENT_UNITS واحد) و واحدهایی با حدود UNIT_SIZE نفر؛
+    مدیر هر کارمند رئیس واحد او، رئیس واحد زیر نظر معاون و معاون زیر نظر مدیرعامل است.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(employees)
+    n_units = max(1, math.ceil(n / UNIT_SIZE))
+    n_departments = max(1, math.ceil(n_units / DEPARTMENT_UNITS))
+    if n < 1 + n_departments + n_units:
+        raise ValueError(f"تعداد کارکنان برای ساختار سازمانی کافی نیست (حداقل {1 + n_departments + n_units})")
+    unit_width = max(2, len(str(n_units)))
+    unit_codes = ['ORG'] + [f"DEP{i:02d}" for i in range(1, n_departments + 1)] + \
+                 [f"UNIT{i:0{unit_width}d}" for i in range(1, n_units + 1)]
+
+    # --- کارکنان و سلسله‌مراتب ---------------------------------------------
+    employee_ids = np.asarray(_ids('EMP', n), dtype=object)
+    first_unit_head = 1 + n_departments
+    first_staff = first_unit_head + n_units
+    # واحد هر کارمند (اندیس در unit_codes پس از ORG و معاونت‌ها)؛ -1 برای مدیرعامل و معاونان
+    unit_of_employee = np.full(n, -1)
+    unit_of_employee[first_unit_head:first_staff] = np.arange(n_units)
+    unit_of_employee[first_staff:] = rng.permutation(np.arange(n - first_staff) % n_units)
+    unit_department = np.arange(n_units) // DEPARTMENT_UNITS
+
+    org_unit = np.empty(n, dtype=np.int64)
+    org_unit[0] = 0
+    org_unit[1:first_unit_head] = np.arange(1, first_unit_head)
+    org_unit[first_unit_head:] = 1 + n_departments + unit_of_employee[first_unit_head:]
+    manager = np.empty(n, dtype=np.int64)
+    manager[0] = -1
+    manager[1:first_unit_head] = 0
+    manager[first_unit_head:first_staff] = 1 + unit_department
+    manager[first_staff:] = first_unit_head + unit_of_employee[first_staff:]
+    manager_ids = np.where(manager >= 0, employee_ids[np.maximum(manager, 0)], '')
+
+    job = np.empty(n, dtype=np.int64)
+    job[0] = len(JOBS) - 1
+    job[1:first_unit_head] = len(JOBS) - 2
+    job[first_unit_head:first_staff] = len(JOBS) - 3
+    job[first_staff:] = rng.integers(0, STAFF_JOBS, n - first_staff)
+    job_codes = [code for code, _ in JOBS]
+    job_titles = [title for _, title in JOBS]
+
+    birth = _dates(rng, '1965-01-01', 365 * 37, n)
+    # استخدام در فاصله ۲۲ سالگی تا تاریخ مرجع
+    adult = birth + np.timedelta64(22 * 365, 'D')
+    working_days = (REFERENCE_DATE - adult).astype('timedelta64[D]').astype(np.int64)
+    hire = adult + (rng.random(n) * working_days).astype('timedelta64[D]')
+    succession = np.where(rng.random(n) < 0.1, np.asarray(['لید تیم', 'مدیر واحد'], dtype=object)[
+        rng.integers(0, 2, n)], '')
+    employees_df = _frame('Employees', {
+        'EmployeeID': employee_ids,
+        'FullName': np.asarray([f"کارمند {i}" for i in range(1, n + 1)], dtype=object),
+        'Gender': _pick(rng, ['مرد', 'زن'], n, p=[0.55, 0.45]),
+        'BirthDate': birth,
+        'HireDate': hire,
+        'JobCode': pd.Categorical.from_codes(job, categories=job_codes),
+        'JobTitle': pd.Categorical.from_codes(job, categories=job_titles),
+        'Unit': pd.Categorical.from_codes(org_unit, categories=unit_codes),
+        'ManagerID': manager_ids,
+        'EducationLevel': _pick(rng, EDUCATION_LEVELS, n, p=[0.05, 0.1, 0.5, 0.3, 0.05]),
+        'Major': _pick(rng, MAJORS, n),
+        'Specialization': '',
+        'PersonalityType': _pick(rng, PERSONALITY_TYPES, n),
+        'InterviewScore': rng.normal(72, 10, n).clip(40, 100).round(),
+        'SelfAssessmentScore': rng.uniform(1, 5, n).round(1),
+        'CareerStage': _pick(rng, CAREER_STAGES, n, p=[0.15, 0.3, 0.3, 0.15, 0.1]),
+        'CareerStrategy': '',
+        'RoleResponsibilities': '',
+        'KPITargets': '',
+        'LearningPreferences': _pick(rng, LEARNING_PREFERENCES, n).astype(object),
+        'MotivationScore': rng.integers(1, 11, n).astype(float),
+        'SuccessionPool': succession,
+    })
+    heads = [employee_ids[0]] + list(employee_ids[1:first_unit_head]) + list(employee_ids[first_unit_head:first_staff])
+    organization_df = _organization(n_departments, n_units, unit_of_employee, heads)
+
+    # --- شایستگی‌ها و دوره‌ها --------------------------------------------------
+    job_competencies = np.stack([rng.choice(len(COMPETENCIES), COMPETENCIES_PER_JOB, replace=False)
+                                 for _ in JOBS])
+    competency_levels = rng.integers(3, 6, job_competencies.shape)
+    competency_names = [name for _, name in COMPETENCIES]
+    competency_categories = [category for category, _ in COMPETENCIES]
+    # دو دوره برای هر شایستگی: دوره اصلی و کارگاه تکمیلی
+    course_competency = np.repeat(np.arange(len(COMPETENCIES)), 2)
+    n_courses = len(course_competency)
+    course_ids = [f"C-{i:04d}" for i in range(1, n_courses + 1)]
+    course_hours = rng.choice([8, 16, 24, 40], n_courses)
+    courses_df = _frame('Training_Courses', {
+        'CourseID': course_ids,
+        'CourseName': [("دوره " if i % 2 == 0 else "کارگاه ") + competency_names[c]
+                       for i, c in enumerate(course_competency)],
+        'CourseType': _pick(rng, ['حضوری', 'آنلاین', 'ترکیبی'], n_courses),
+        'Provider': _pick(rng, PROVIDERS, n_courses),
+        'DurationHours': course_hours,
+        'Cost': course_hours * rng.integers(5, 20, n_courses) * 10_000,
+        'LinkedCompetency': [competency_names[c] for c in course_competency],
+        'DeliveryType': _pick(rng, ['کلاسی', 'کارگاهی', 'خودآموز', 'آزمایشگاهی'], n_courses),
+        'LevelExpectation': rng.integers(3, 6, n_courses),
+        'LevelAchieved': 0,
+    })
+    rows = [(job_codes[j], competency_categories[c], competency_names[c],
+             f"نشان دادن تسلط بر {competency_names[c]} در کار روزانه", competency_levels[j, k],
+             EVALUATION_METHODS[(j + k) % len(EVALUATION_METHODS)], f"{course_ids[2 * c]}; {course_ids[2 * c + 1]}",
+             LEVELS[(j + k) % len(LEVELS)])
+            for j in range(len(JOBS)) for k, c in enumerate(job_competencies[j])]
+    competencies_df = _frame('Competencies', dict(zip(
+        ['JobCode', 'CompetencyCategory', 'CompetencyName', 'BehavioralIndicators', 'RequiredLevel',
+         'AssessmentMethod', 'LinkedCourses', 'Priority'], map(list, zip(*rows)))))
+
+    # --- شکاف‌ها -----------------------------------------------------------
+    gap_counts = rng.poisson(gaps_per_employee, n)
+    gap_employee = np.repeat(np.arange(n), gap_counts)
+    m = len(gap_employee)
+    slot = rng.integers(0, COMPETENCIES_PER_JOB, m)
+    gap_competency = job_competencies[job[gap_employee], slot]
+    required = competency_levels[job[gap_employee], slot]
+    current = rng.integers(1, required)
+    gap_size = required - current
+    gap_type_names = list(dict.fromkeys(GAP_TYPE_BY_CATEGORY.values())) + ['انگیزشی']
+    gap_type = np.asarray([gap_type_names.index(GAP_TYPE_BY_CATEGORY[category])
+                           for category in competency_categories])[gap_competency]
+    gap_type = np.where(rng.random(m) < 0.05, len(gap_type_names) - 1, gap_type)
+    # شکاف بزرگ‌تر معمولاً فوری‌تر است
+    urgency = np.clip(gap_size - 1 + rng.integers(-1, 2, m), 0, 2)
+    gap_status = rng.choice(len(GAP_STATUSES), m, p=[0.35, 0.3, 0.15, 0.2])
+    gap_names = np.asarray(competency_names, dtype=object)
+    gap_ids = np.asarray(_ids('GAP', m), dtype=object)
+    employee_jobs, employee_units = employees_df['JobCode'].array, employees_df['Unit'].array
+    gaps_df = _frame('Gaps', {
+        'GapID': gap_ids,
+        'EmployeeID': employee_ids[gap_employee],
+        'JobCode': employee_jobs.take(gap_employee),
+        'Unit': employee_units.take(gap_employee),
+        'GapType': pd.Categorical.from_codes(gap_type, categories=gap_type_names),
+        'GapName': pd.Categorical.from_codes(gap_competency, categories=competency_names),
+        'Description': np.asarray([f"شکاف در {name}" for name in competency_names], dtype=object)[gap_competency],
+        'RequiredLevel': required,
+        'CurrentLevel': current,
+        'GapSize': gap_size,
+        'Urgency': pd.Categorical.from_codes(urgency, categories=LEVELS),
+        'ImpactOnTeam': _pick(rng, LEVELS, m),
+        'ImpactOnOrg': _pick(rng, LEVELS, m, p=[0.5, 0.35, 0.15]),
+        'CostEstimate': (gap_size * rng.integers(1, 6, m) * 1_000_000).astype(float),
+        'RootCause': _pick(rng, ROOT_CAUSES, m),
+        'Dependencies': '',
+        'Owner': manager_ids[gap_employee],
+        'SuccessMetric': np.asarray([f"رسیدن به سطح {level}" for level in range(6)], dtype=object)[required],
+        'Status': pd.Categorical.from_codes(gap_status, categories=GAP_STATUSES),
+    })
+
+    # --- برنامه‌های توسعه: برای شکاف‌های در حال اقدام، پیگیری یا حل‌شده و بخشی از شکاف‌های جدید
+    has_plan = (gap_status > 0) | (rng.random(m) < new_gap_plan_share)
+    planned = np.flatnonzero(has_plan)
+    k = len(planned)
+    start = _dates(rng, '2024-01-01', 540, k)
+    solved = gap_status[planned] == GAP_STATUSES.index('حل شده')
+    progress = np.where(solved, 100, rng.integers(0, 10, k) * 10)
+    plan_status = np.where(solved, 2, np.where(progress > 0, 1, 0))
+    plan_hours = rng.choice([8, 16, 24, 40, 60], k)
+    development_df = _frame('Development_Plans', {
+        'PlanID': _ids('PLAN', k),
+        'GapID': gap_ids[planned],
+        'PlanName': np.asarray([f"برنامه ارتقای {name}" for name in competency_names],
+                               dtype=object)[gap_competency[planned]],
+        'PlanType': _pick(rng, PLAN_TYPES, k),
+        'Provider': _pick(rng, PROVIDERS, k),
+        'StartDate': start,
+        'EndDate': start + rng.integers(14, 120, k).astype('timedelta64[D]'),
+        'EstimatedHours': plan_hours,
+        'Cost': plan_hours * rng.integers(5, 30, k) * 10_000,
+        'Owner': manager_ids[gap_employee[planned]],
+        'TargetOutcome': gaps_df['SuccessMetric'].to_numpy()[planned],
+        'EvaluationMethod': _pick(rng, EVALUATION_METHODS, k).astype(object),
+        'Progress': progress,
+        'Status': pd.Categorical.from_codes(plan_status, categories=['برنامه‌ریزی شده', 'در جریان', 'تکمیل شده']),
+    })
+
+    # --- سوابق آموزشی: دوره‌های مرتبط با شایستگی‌های شغل هر کارمند ------------------
+    training_counts = rng.poisson(trainings_per_employee, n)
+    record_employee = np.repeat(np.arange(n), training_counts)
+    r = len(record_employee)
+    record_competency = job_competencies[job[record_employee], rng.integers(0, COMPETENCIES_PER_JOB, r)]
+    record_course = 2 * record_competency + rng.integers(0, 2, r)
+    pre = rng.integers(30, 71, r)
+    post = np.minimum(pre + rng.integers(0, 31, r), 100)
+    training_df = _frame('Training_Records', {
+        'RecordID': _ids('REC', r),
+        'EmployeeID': employee_ids[record_employee],
+        'CourseID': pd.Categorical.from_codes(record_course, categories=course_ids),
+        'AttendanceDate': _dates(rng, '2023-01-01', 900, r),
+        'PreTestScore': pre,
+        'PostTestScore': post,
+        'Improvement': post - pre,
+        'Status': _pick(rng, ['تکمیل شده', 'در حال برگزاری', 'انصراف'], r, p=[0.8, 0.1, 0.1]),
+    })
+
+    # --- تاریخچه KPI: یک شاخص ماهانه برای هر کارمند در kpi_months ماه اخیر -----------
+    kpi_employee = np.tile(np.arange(n), kpi_months)
+    month = np.repeat(np.arange(kpi_months), n)
+    q = len(kpi_employee)
+    kpi_name = rng.integers(0, len(KPI_NAMES), n)[kpi_employee]
+    target = np.full(q, 100.0)
+    value = (target * rng.normal(0.95, 0.08, q)).round(1)
+    ratio = value / target
+    kpi_status = np.where(ratio >= 1, 0, np.where(ratio >= 0.9, 1, 2))
+    # اولین شکاف هر کارمند (در صورت وجود) به شاخص او پیوند می‌خورد
+    linked_gap = np.full(n, '', dtype=object)
+    with_gaps, first_gap = np.unique(gap_employee, return_index=True)
+    linked_gap[with_gaps] = gap_ids[first_gap]
+    months = (REFERENCE_DATE.astype('datetime64[M]') - (kpi_months - 1) + month).astype('datetime64[ns]')
+    kpi_df = _frame('KPI', {
+        'KPIID': _ids('KPI', q),
+        'EmployeeID': employee_ids[kpi_employee],
+        'KPIName': pd.Categorical.from_codes(kpi_name, categories=KPI_NAMES),
+        'Date': months,
+        'Value': value,
+        'Target': target,
+        'Variance': (value - target).round(1),
+        'Status': pd.Categorical.from_codes(kpi_status, categories=['سبز', 'زرد', 'قرمز']),
+        'LinkedCompetency': np.asarray(competency_names, dtype=object)[
+            job_competencies[job[kpi_employee], 0]],
+        'LinkedGapID': linked_gap[kpi_employee],
+        'UnitLevelAggregation': '',
+    })
+
+    return {
+        'Employees': employees_df,
+        'Organization': organization_df,
+        'Competencies': competencies_df,
+        'Gaps': gaps_df,
+        'Development_Plans': development_df,
+        'Training_Courses': courses_df,
+        'Training_Records': training_df,
+        'KPI': kpi_df,
+    }
+
+
+def seed_backend(backend, sheets: Dict[str, pd.DataFrame]):
+    """جایگزینی همه شیت‌ها در یک نوشتن و هم‌سطح کردن شمارنده شناسه‌ها"""
+    if not backend.exists():
+        backend.initialize({sheet_name: df.iloc[:0] for sheet_name, df in sheets.items()})
+    backend.save_sheets(sheets)
+    backend.sync_sequences(list(sheets), frames=sheets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="تولید سازمان ساختگی برای سیستم مدیریت استعداد")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument('--size', choices=list(ORG_SIZES), default='1k')
+    size.add_argument('--employees', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--kpi-months', type=int, default=3)
+    parser.add_argument('--backend', choices=list(STORAGE_BACKENDS), help="پیش‌فرض: TMS_STORAGE_BACKEND")
+    parser.add_argument('--path', help="مسیر فایل یا پوشه داده")
+    parser.add_argument('--dry-run', action='store_true', help="فقط تولید و نمایش تعداد ردیف‌ها")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sheets = generate_org(args.employees or ORG_SIZES[args.size], seed=args.seed, kpi_months=args.kpi_months)
+    generated = time.perf_counter() - start
+    for sheet_name, df in sheets.items():
+        print(f"{sheet_name}: {len(df):,} ردیف، {df.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+    print(f"تولید: {generated:.1f} ثانیه")
+    if args.dry_run:
+        return
+
+    config = load_storage_config()
+    if args.backend:
+        config['backend'] = args.backend
+        if not args.path:
+            config.pop('path', None)
+    if args.path:
+        config['path'] = args.path
+    backend = create_backend(config)
+    start = time.perf_counter()
+    seed_backend(backend, sheets)
+    print(f"ذخیره در {backend.describe()}: {time.perf_counter() - start:.1f} ثانیه")
+
+
+if __name__ == '__main__':
+    main()
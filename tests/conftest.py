@@ -0,0 +1,38 @@
+"""فیکسچرهای مشترک: هر آزمون روی یک موتور ذخیره‌سازی تازه از هر سه نوع در پوشه موقت اجرا می‌شود"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from talent_schema import empty_sheets  # noqa: E402
+from talent_storage import STORAGE_BACKENDS, JournaledBackend  # noqa: E402
+from talent_synth import generate_org, seed_backend  # noqa: E402
+
+BACKEND_PATHS = {'excel': 'talent.xlsx', 'sqlite': 'talent.db', 'parquet': 'talent_parquet'}
+
+
+def make_backend(name, path, journal=False):
+    """نمونه جدید موتور (بدون نمونه مشترک create_backend)؛ ادغام ژورنال فقط با compact صریح"""
+    backend = STORAGE_BACKENDS[name](path)
+    if journal:
+        backend = JournaledBackend(backend, compact_threshold=10 ** 6, compact_interval=3600)
+    return backend
+
+
+@pytest.fixture(params=list(BACKEND_PATHS))
+def backend_path(request, tmp_path):
+    """(نام موتور، مسیر داده) با یک سازمان ساختگی کوچک"""
+    name = request.param
+    path = str(tmp_path / BACKEND_PATHS[name])
+    backend = make_backend(name, path)
+    backend.initialize(empty_sheets())
+    seed_backend(backend, generate_org(30, seed=1))
+    return name, path
+
+
+@pytest.fixture
+def backend(backend_path):
+    return make_backend(*backend_path)
@@ -0,0 +1,60 @@
+"""تجمیع‌های افزایشی داشبورد پس از هر نوشتن با محاسبه کامل از روی شیت‌ها برابرند"""
+import pytest
+
+import talent_analytics as analytics
+from conftest import make_backend
+from talent_aggregates import AggregateStore, dashboard_metrics
+from talent_storage import insert_change, update_change
+
+
+def fresh_metrics(backend_path, journal):
+    backend = make_backend(*backend_path, journal=journal)
+    return analytics.dashboard_metrics(backend.load_sheet('Employees'), backend.load_sheet('Gaps'),
+                                       backend.load_sheet('Development_Plans'))
+
+
+def assert_matches(store, backend_path, journal):
+    metrics, expected = dashboard_metrics(store), fresh_metrics(backend_path, journal)
+    assert metrics == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('journal', [False, True])
+def test_incremental_metrics_match_recompute(backend_path, journal):
+    backend = make_backend(*backend_path, journal=journal)
+    store = AggregateStore(backend)
+    assert_matches(store, backend_path, journal)
+    rebuilds = store.rebuilds
+
+    gaps = backend.load_sheet('Gaps')
+    plans = backend.load_sheet('Development_Plans')
+    employee_id = gaps['EmployeeID'].iloc[0]
+    writes = [
+        [insert_change('Gaps', [{'GapID': 'GAP-900001', 'EmployeeID': employee_id, 'GapSize': 3}])],
+        [update_change('Gaps', 'GapID', gaps['GapID'].iloc[0], {'GapSize': 3, 'Status': analytics.GAP_SOLVED})],
+        [update_change('Gaps', 'GapID', 'GAP-900001', {'GapSize': 1})],
+        [update_change('Development_Plans', 'PlanID', plans['PlanID'].iloc[0], {'Status': analytics.PLAN_COMPLETED}),
+         update_change('Development_Plans', 'PlanID', plans['PlanID'].iloc[1], {'Status': analytics.PLAN_ACTIVE})],
+        [insert_change('Employees', [{'EmployeeID': 'EMP-900001', 'FullName': 'x', 'MotivationScore': 10}])],
+    ]
+    if backend.upsert:
+        # درج دوباره یک کلید موجود به‌روزرسانی همان ردیف است (در SQLite ردیف تکراری و بازسازی تجمیع)
+        writes.append([insert_change('Employees', [{'EmployeeID': 'EMP-900001', 'MotivationScore': 1}])])
+    for changes in writes:
+        store.write(changes, lambda: backend.apply(changes))
+        assert_matches(store, backend_path, journal)
+    assert store.rebuilds == rebuilds
+
+    replaced = plans.iloc[: len(plans) // 2].assign(Status=analytics.PLAN_ACTIVE)
+    store.replace({'Development_Plans': replaced}, lambda: backend.save_sheet(replaced, 'Development_Plans'))
+    assert_matches(store, backend_path, journal)
+    assert store.rebuilds == rebuilds
+
+
+def test_outside_write_triggers_rebuild(backend):
+    store = AggregateStore(backend)
+    dashboard_metrics(store)
+    rebuilds = store.rebuilds
+    gaps = backend.load_sheet('Gaps')
+    backend.save_sheet(gaps.iloc[1:], 'Gaps')
+    assert dashboard_metrics(store)['gaps'] == len(gaps) - 1
+    assert store.rebuilds == rebuilds + 1
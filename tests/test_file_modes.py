@@ -0,0 +1,49 @@
+"""فایل‌های داده تازه مجوز پیش‌فرض umask را می‌گیرند و مجوز فایل موجود پس از بازنویسی حفظ می‌شود"""
+import glob
+import os
+import stat
+
+import pytest
+
+from conftest import make_backend
+from talent_schema import empty_sheets
+
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason="مجوزهای POSIX")
+
+
+def umask_mode():
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def data_files(name, path):
+    if name == 'parquet':
+        return glob.glob(os.path.join(path, '*.parquet'))
+    return [path]
+
+
+@pytest.mark.parametrize('name, filename', [('excel', 'talent.xlsx'), ('parquet', 'talent_parquet')])
+def test_new_files_follow_umask(tmp_path, name, filename):
+    path = str(tmp_path / filename)
+    backend = make_backend(name, path)
+    backend.initialize(empty_sheets())
+    backend.allocate_ids('Gaps')
+    files = data_files(name, path) + [backend.sequences.path]
+    assert files and all(mode(file) == umask_mode() for file in files)
+
+
+@pytest.mark.parametrize('name, filename', [('excel', 'talent.xlsx'), ('parquet', 'talent_parquet')])
+def test_rewrite_keeps_existing_mode(tmp_path, name, filename):
+    path = str(tmp_path / filename)
+    backend = make_backend(name, path)
+    backend.initialize(empty_sheets())
+    for file in data_files(name, path):
+        os.chmod(file, 0o640)
+    backend.save_sheet(backend.load_sheet('Gaps'), 'Gaps')
+    backend.save_sheets({'Competencies': backend.load_sheet('Competencies')})
+    assert all(mode(file) == 0o640 for file in data_files(name, path))
@@ -0,0 +1,51 @@
+"""ورود انبوه: شناسه ردیف‌های بدون شناسه با شناسه‌های آمده در فایل و داده‌های موجود تداخل ندارد"""
+import pandas as pd
+
+from talent_import import import_file
+from talent_storage import format_id, max_id_number
+
+
+def write_gaps_csv(tmp_path, backend, gap_ids):
+    employee_id = backend.load_sheet('Employees', columns=['EmployeeID'])['EmployeeID'].iloc[0]
+    path = tmp_path / 'gaps.csv'
+    pd.DataFrame({'GapID': gap_ids, 'EmployeeID': employee_id, 'GapName': 'x',
+                  'RequiredLevel': '4', 'CurrentLevel': '2'}).to_csv(path, index=False)
+    return str(path)
+
+
+def last_gap_number(backend):
+    return max_id_number(backend.load_sheet('Gaps', columns=['GapID']), 'GapID', 'GAP')
+
+
+def test_blank_ids_skip_ids_supplied_in_file(backend, tmp_path):
+    last = last_gap_number(backend)
+    supplied = [format_id('GAP', last + 1), format_id('GAP', last + 5)]
+    path = write_gaps_csv(tmp_path, backend, [supplied[0], '', supplied[1], ''])
+    report = import_file(backend, 'Gaps', path)
+
+    assert report.committed and report.accepted == 4
+    assert report.ids == [supplied[0], format_id('GAP', last + 6), supplied[1], format_id('GAP', last + 7)]
+    gap_ids = backend.load_sheet('Gaps', columns=['GapID'])['GapID']
+    assert not gap_ids.duplicated().any()
+    assert backend.allocate_ids('Gaps') == [format_id('GAP', last + 8)]
+
+
+def test_supplied_ids_advance_the_counter(backend, tmp_path):
+    last = last_gap_number(backend)
+    backend.allocate_ids('Gaps')
+    supplied = format_id('GAP', last + 10)
+    import_file(backend, 'Gaps', write_gaps_csv(tmp_path, backend, [supplied]))
+    assert backend.allocate_ids('Gaps') == [format_id('GAP', last + 11)]
+
+
+def test_blank_ids_follow_existing_rows(backend, tmp_path):
+    last = last_gap_number(backend)
+    report = import_file(backend, 'Gaps', write_gaps_csv(tmp_path, backend, ['', '']))
+    assert report.ids == [format_id('GAP', last + 1), format_id('GAP', last + 2)]
+
+
+def test_dry_run_writes_nothing(backend, tmp_path):
+    before = len(backend.load_sheet('Gaps'))
+    report = import_file(backend, 'Gaps', write_gaps_csv(tmp_path, backend, ['', '']), dry_run=True)
+    assert report.accepted == 2 and not report.committed
+    assert len(backend.load_sheet('Gaps')) == before
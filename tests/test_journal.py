@@ -0,0 +1,89 @@
+"""ژورنال تغییرات: بازیابی پس از قطع برنامه و ادغام بدون اعمال دوباره تغییرات"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT, make_backend
+from talent_storage import insert_change, update_change
+
+GAP_ID = 'GAP-900001'
+
+# پروسه جداگانه: دو تغییر در ژورنال، سپس ادغام و خروج ناگهانی در نقطه داده‌شده
+CRASH_SCRIPT = '''
+import os, sys
+sys.path.insert(0, sys.argv[1])
+sys.path.insert(0, os.path.join(sys.argv[1], 'tests'))
+from conftest import make_backend
+from talent_storage import insert_change, update_change
+
+name, path, point = sys.argv[2:5]
+backend = make_backend(name, path, journal=True)
+backend.apply([insert_change('Gaps', [{'GapID': 'GAP-900001', 'EmployeeID': 'EMP-000001', 'GapName': 'x'}])])
+backend.apply([update_change('Gaps', 'GapID', 'GAP-900001', {'Status': 'حل شده'})])
+
+
+def crash_after(func):
+    def wrapper(*args, **kwargs):
+        func(*args, **kwargs)
+        os._exit(3)
+    return wrapper
+
+
+if point == 'base_saved':
+    backend.base.save_sheets = crash_after(backend.base.save_sheets)
+else:
+    backend._write_compacted = crash_after(backend._write_compacted)
+backend.compact()
+'''
+
+
+def gap_rows(backend):
+    gaps = backend.load_sheet('Gaps')
+    return gaps[gaps['GapID'] == GAP_ID]
+
+
+def test_pending_changes_survive_restart(backend_path):
+    backend = make_backend(*backend_path, journal=True)
+    backend.apply([insert_change('Gaps', [{'GapID': GAP_ID, 'EmployeeID': 'EMP-000001', 'GapName': 'x'}])])
+    assert backend.pending_count == 1
+    assert len(gap_rows(backend.base)) == 0
+
+    restarted = make_backend(*backend_path, journal=True)
+    assert restarted.pending_count == 1
+    assert len(gap_rows(restarted)) == 1
+    assert restarted.compact() == 1
+    assert len(gap_rows(make_backend(*backend_path))) == 1
+
+
+@pytest.mark.parametrize('point', ['base_saved', 'marker_written'])
+def test_crash_during_compaction_applies_changes_once(backend_path, point):
+    name, path = backend_path
+    result = subprocess.run([sys.executable, '-c', CRASH_SCRIPT, ROOT, name, path, point])
+    assert result.returncode == 3
+    journal = make_backend(name, path, journal=True)
+    assert os.path.exists(journal.compacting_path)
+
+    # پس از ثبت نشانگر چیزی برای بازیابی نمی‌ماند؛ پیش از آن بازپخش درج کلیددار بی‌اثر است
+    assert journal.pending_count == (2 if point == 'base_saved' else 0)
+    rows = gap_rows(journal)
+    assert len(rows) == 1 and rows['Status'].iloc[0] == 'حل شده'
+    journal.compact()
+    rows = gap_rows(make_backend(name, path))
+    assert len(rows) == 1 and rows['Status'].iloc[0] == 'حل شده'
+
+    # شماره‌های جدید بعد از شماره ادغام‌شده ادامه پیدا می‌کنند
+    journal.apply([update_change('Gaps', 'GapID', GAP_ID, {'Status': 'باز'})])
+    assert make_backend(name, path, journal=True).pending_count == 1
+
+
+def test_keyless_inserts_bypass_journal(backend_path):
+    backend = make_backend(*backend_path, journal=True)
+    before = len(backend.load_sheet('Competencies'))
+    backend.apply([insert_change('Competencies', [{'CompetencyName': 'x'}])])
+    assert backend.pending_count == 0
+    backend.compact()
+    restarted = make_backend(*backend_path, journal=True)
+    restarted.compact()
+    assert len(make_backend(*backend_path).load_sheet('Competencies')) == before + 1
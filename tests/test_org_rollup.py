@@ -0,0 +1,72 @@
+"""درخت سازمانی و تجمیع زیردرخت‌ها: برابری با جمع مستقیم و تحمل حلقه، واحد بی‌والد و درخت عمیق"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import talent_analytics as analytics
+from talent_hierarchy import OrgHierarchy, org_rollup
+from talent_synth import generate_org
+
+
+@pytest.fixture(scope='module')
+def org():
+    sheets = generate_org(600, seed=3)
+    facts = analytics.gap_facts(sheets['Gaps'], sheets['Employees'], sheets['Development_Plans'])
+    rollup = org_rollup(sheets['Organization'], facts, sheets['Employees'], sheets['KPI'],
+                        sheets['Development_Plans'])
+    return sheets, facts, rollup
+
+
+def direct_totals(sheets, facts, units):
+    employees, kpi, plans = sheets['Employees'], sheets['KPI'], sheets['Development_Plans']
+    in_units = facts['Unit'].isin(units)
+    employee_units = employees.set_index('EmployeeID')['Unit']
+    kpi_rows = employee_units.reindex(kpi['EmployeeID']).isin(units).to_numpy()
+    return {
+        'headcount': int(employees['Unit'].isin(units).sum()),
+        'gaps': int(in_units.sum()),
+        'open_gaps': int((in_units & (facts['Status'] != analytics.GAP_SOLVED)).sum()),
+        'critical_gaps': int((in_units & (facts['GapSize'] >= analytics.CRITICAL_GAP_SIZE)).sum()),
+        'gap_cost': facts.loc[in_units, 'CostEstimate'].sum(),
+        'plan_cost': plans.loc[plans['GapID'].isin(facts.loc[in_units, 'GapID']), 'Cost'].sum(),
+        'kpi_variance': kpi.loc[kpi_rows, 'Variance'].mean(),
+    }
+
+
+def test_subtree_totals_match_direct_sums(org):
+    sheets, facts, rollup = org
+    hierarchy = rollup.hierarchy
+    for code in hierarchy.codes:
+        assert rollup.totals(code) == pytest.approx(direct_totals(sheets, facts, set(hierarchy.descendants(code))))
+    everything = rollup.totals()
+    assert everything['headcount'] == len(sheets['Employees']) and everything['gaps'] == len(facts)
+
+
+def test_drill_lists_direct_children(org):
+    _, _, rollup = org
+    root = rollup.hierarchy.roots[0]
+    drill = rollup.drill(root)
+    assert drill.index.tolist() == rollup.hierarchy.children(root)
+    assert drill['headcount'].sum() <= rollup.totals(root)['headcount']
+
+
+def test_cycle_orphan_and_self_parent_do_not_fail():
+    hierarchy = OrgHierarchy(pd.DataFrame({
+        'Code': ['A', 'B', 'C', 'D', 'E', 'S'],
+        'ParentCode': ['B', 'A', 'A', 'ZZ', 'D', 'S'],
+        'Title': list('abcdes'),
+    }))
+    assert sorted(hierarchy.cycles) == ['A', 'B']
+    assert hierarchy.orphans == ['D', 'S']
+    assert sorted(hierarchy.roots) == ['A', 'D', 'S']
+    assert sorted(hierarchy.descendants('A')) == ['A', 'B', 'C']
+    assert hierarchy.path('C') == ['A', 'C'] and hierarchy.path('E') == ['D', 'E']
+
+
+def test_deep_tree_without_recursion():
+    n = 50_000
+    hierarchy = OrgHierarchy(pd.DataFrame({'Code': [f"N{i}" for i in range(n)],
+                                           'ParentCode': [''] + [f"N{i}" for i in range(n - 1)]}))
+    assert hierarchy.depth.max() == n - 1
+    assert len(hierarchy.descendants('N49990')) == 10
+    assert np.array_equal(np.sort(hierarchy.order), np.arange(n))
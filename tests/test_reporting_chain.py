@@ -0,0 +1,56 @@
+"""زنجیره گزارش‌دهی: حلقه‌ها، مدیر خودارجاع و مدیر بیرونی بدون از دست رفتن اعضای تیم"""
+import pandas as pd
+
+from talent_hierarchy import ReportingChain, team_facts
+
+
+def chain(managers: dict) -> ReportingChain:
+    return ReportingChain(pd.DataFrame({'EmployeeID': list(managers), 'ManagerID': list(managers.values()),
+                                        'FullName': [f"کارمند {code}" for code in managers]}))
+
+
+def test_tail_hanging_off_a_cycle_stays_in_the_team():
+    reporting = chain({'C': 'A', 'A': 'B', 'B': 'A', 'D': 'C'})
+    assert sorted(reporting.cycles) == ['A', 'B']
+    # حلقه در گره‌ای که دنبال کردن والدهای C به آن برمی‌گردد (A) شکسته می‌شود
+    assert reporting.roots == ['A']
+    assert sorted(reporting.subordinates('A')) == ['B', 'C', 'D']
+    assert reporting.subordinates('C') == ['D']
+    assert reporting.reports_to('D', 'C') and reporting.reports_to('D', 'A')
+
+
+def test_cycles_are_reported_once_each():
+    reporting = chain({'A': 'B', 'B': 'A', 'X': 'Y', 'Y': 'Z', 'Z': 'X', 'T': 'Z', 'R': None})
+    assert sorted(reporting.cycles) == ['A', 'B', 'X', 'Y', 'Z']
+    assert len(reporting.roots) == 3
+    assert sorted(reporting.order.tolist()) == list(range(7))
+
+
+def test_self_managed_employee_becomes_a_root():
+    reporting = chain({'E': 'E', 'F': 'E', 'G': 'F'})
+    assert reporting.orphans == ['E'] and reporting.cycles == []
+    assert reporting.roots == ['E']
+    assert reporting.subordinates('E') == ['F', 'G']
+    assert reporting.subordinates('E', indirect=False) == ['F']
+
+
+def test_manager_missing_from_employees_is_an_external_root():
+    reporting = chain({'A': 'MGR-9', 'B': 'A', 'C': None})
+    assert reporting.external == ['MGR-9'] and reporting.orphans == []
+    assert sorted(reporting.roots) == ['C', 'MGR-9']
+    assert reporting.subordinates('MGR-9') == ['A', 'B']
+    assert reporting.managers == ['MGR-9', 'A']
+    assert reporting.report_count('MGR-9') == 2 and reporting.report_count('MGR-9', indirect=False) == 1
+
+
+def test_team_facts_reads_only_the_team(backend):
+    employees = backend.load_sheet('Employees')
+    reporting = ReportingChain(employees)
+    manager = reporting.managers[0]
+    team = reporting.subordinates(manager)
+    facts, plans = team_facts(backend, team)
+
+    gaps = backend.load_sheet('Gaps')
+    assert sorted(facts['GapID']) == sorted(gaps.loc[gaps['EmployeeID'].isin(team), 'GapID'])
+    all_plans = backend.load_sheet('Development_Plans')
+    assert sorted(plans['PlanID']) == sorted(all_plans.loc[all_plans['GapID'].isin(facts['GapID']), 'PlanID'])
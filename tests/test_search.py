@@ -0,0 +1,81 @@
+"""جستجوی فارسی: یکسان‌سازی نیم‌فاصله، ي/ك و ارقام، و برابری ایندکس افزایشی با ساخت کامل"""
+import pandas as pd
+import pytest
+
+from talent_search import SheetSearchIndex, normalize, search_store, tokenize
+from talent_storage import insert_change, update_change
+
+ZWNJ = '‌'
+NAMES = {
+    'EMP-1': f'می{ZWNJ}خواهم',
+    'EMP-2': 'میخواهم',
+    'EMP-3': 'می خواهم',
+    'EMP-4': 'علي كريمي',
+    'EMP-5': 'کارمند ۱۲',
+    'EMP-6': 'کارمند ١٢٣',
+    'EMP-7': 'خواهر',
+}
+
+
+@pytest.fixture
+def index():
+    employees = pd.DataFrame({'EmployeeID': list(NAMES), 'FullName': list(NAMES.values())})
+    return SheetSearchIndex('Employees', None).load(employees)
+
+
+def found(index, query):
+    results, total = index.search(query)
+    assert total == len(results)
+    return sorted(key for key, _ in results)
+
+
+def test_normalize_characters_and_digits():
+    assert normalize('علي كريمي') == 'علی کریمی'
+    assert normalize('۱۲۳ ١٢٣ 123') == '123 123 123'
+    assert normalize('مُحَمَّد') == 'محمد'
+    assert tokenize(f'می{ZWNJ}خواهم') == ('میخواهم', 'می', 'خواهم')
+
+
+def test_zwnj_query_finds_joined_and_spaced_forms(index):
+    assert found(index, f'می{ZWNJ}خواهم') == ['EMP-1', 'EMP-2', 'EMP-3']
+
+
+def test_joined_and_spaced_queries_find_zwnj_form(index):
+    assert found(index, 'میخواهم') == ['EMP-1', 'EMP-2']
+    assert found(index, 'می خواهم') == ['EMP-1', 'EMP-3']
+
+
+def test_arabic_letters_and_digits_match_persian(index):
+    assert found(index, 'علی کریمی') == ['EMP-4']
+    assert found(index, 'علي') == ['EMP-4']
+    assert found(index, 'کارمند 12') == ['EMP-5', 'EMP-6']
+    assert found(index, 'کارمند ۱۲۳') == ['EMP-6']
+
+
+def test_exact_words_rank_before_prefixes(index):
+    results, _ = index.search('کارمند 12')
+    assert [key for key, _ in results] == ['EMP-5', 'EMP-6']
+    assert results[0][1] > results[1][1]
+    # پیشوند جزء دوم: شکل چسبیده «میخواهم» با «خواه» شروع نمی‌شود
+    assert found(index, 'خواه') == ['EMP-1', 'EMP-3', 'EMP-7']
+
+
+def test_incremental_index_matches_rebuild(backend):
+    store = search_store(backend)
+    store.get('Employees')
+    rebuilds = store.rebuilds
+    employee_id = backend.load_sheet('Employees', columns=['EmployeeID'])['EmployeeID'].iloc[0]
+    writes = [
+        [update_change('Employees', 'EmployeeID', employee_id, {'FullName': f'نیلوفر می{ZWNJ}خواهد'})],
+        [insert_change('Employees', [{'EmployeeID': 'EMP-900001', 'FullName': 'علي كريمي', 'Major': 'مديريت'}])],
+        [update_change('Employees', 'EmployeeID', 'EMP-900001', {'Major': 'فضانوردی'})],
+    ]
+    for changes in writes:
+        store.write(changes, lambda: backend.apply(changes))
+    assert store.rebuilds == rebuilds
+
+    rebuilt = SheetSearchIndex('Employees', None).load(backend.load_sheet('Employees'))
+    for query in ['نیلوفر میخواهد', 'علی', 'مدیریت', 'فضانوردی', 'EMP-900001']:
+        assert store.search('Employees', query) == rebuilt.search(query)
+    assert store.search('Employees', 'فضانوردی')[0] == [('EMP-900001', 2)]
+    assert store.search('Employees', 'مدیریت')[1] == rebuilt.search('مدیریت')[1]
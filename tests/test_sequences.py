@@ -0,0 +1,45 @@
+"""تخصیص شناسه: بدون تکرار بین نخ‌ها، نمونه‌های جداگانه موتور و پروسه‌های جداگانه"""
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import ROOT, make_backend
+
+ALLOCATE_SCRIPT = '''
+import os, sys
+sys.path.insert(0, sys.argv[1])
+sys.path.insert(0, os.path.join(sys.argv[1], 'tests'))
+from conftest import make_backend
+
+backend = make_backend(sys.argv[2], sys.argv[3])
+for _ in range(40):
+    print(backend.allocate_ids('Gaps')[0])
+'''
+
+
+def existing_gap_ids(backend):
+    return set(backend.load_sheet('Gaps', columns=['GapID'])['GapID'])
+
+
+def test_concurrent_threads_never_share_an_id(backend_path):
+    # دو نمونه جداگانه موتور روی یک داده (قفل نخ مشترک ندارند) و تخصیص‌های اول همزمان
+    backends = [make_backend(*backend_path) for _ in range(2)]
+    with ThreadPoolExecutor(8) as pool:
+        batches = list(pool.map(lambda i: backends[i % 2].allocate_ids('Gaps', 1 + i % 3), range(60)))
+    ids = [gap_id for batch in batches for gap_id in batch]
+    assert len(ids) == len(set(ids))
+    assert not set(ids) & existing_gap_ids(backends[0])
+
+
+def test_concurrent_processes_never_share_an_id(backend_path):
+    name, path = backend_path
+    processes = [subprocess.Popen([sys.executable, '-c', ALLOCATE_SCRIPT, ROOT, name, path],
+                                  stdout=subprocess.PIPE, text=True) for _ in range(3)]
+    ids = []
+    for process in processes:
+        output, _ = process.communicate(timeout=120)
+        assert process.returncode == 0
+        ids.extend(output.split())
+    assert len(ids) == 120 and len(set(ids)) == 120
+    assert not set(ids) & existing_gap_ids(make_backend(name, path))
+
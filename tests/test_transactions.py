@@ -0,0 +1,49 @@
+"""تراکنش چند شیتی: یا همه تغییرات ثبت می‌شوند یا هیچ‌کدام"""
+import pytest
+
+from conftest import make_backend
+from talent_storage import VersionConflict
+
+GAP_ID = 'GAP-900001'
+PLAN_ID = 'PLAN-900001'
+
+
+def load_gaps_and_plans(backend_path, journal):
+    backend = make_backend(*backend_path, journal=journal)
+    return backend.load_sheet('Gaps'), backend.load_sheet('Development_Plans')
+
+
+def fill(tx, gaps, plans, plan_expected):
+    plan = plans.iloc[0]
+    tx.insert('Gaps', [{'GapID': GAP_ID, 'EmployeeID': gaps['EmployeeID'].iloc[0], 'GapName': 'x'}])
+    tx.insert('Development_Plans', [{'PlanID': PLAN_ID, 'GapID': GAP_ID, 'EmployeeID': gaps['EmployeeID'].iloc[0]}])
+    tx.update('Gaps', 'GapID', gaps['GapID'].iloc[0], {'Status': 'حل شده'}, expected={'Status': gaps['Status'].iloc[0]})
+    tx.update('Development_Plans', 'PlanID', plan['PlanID'], {'Progress': 100}, expected=plan_expected)
+
+
+@pytest.mark.parametrize('journal', [False, True])
+def test_conflicting_transaction_applies_nothing(backend_path, journal):
+    backend = make_backend(*backend_path, journal=journal)
+    gaps, plans = load_gaps_and_plans(backend_path, journal)
+    stale = {'Progress': plans['Progress'].iloc[0] + 1}
+
+    with pytest.raises(VersionConflict):
+        with backend.transaction() as tx:
+            fill(tx, gaps, plans, stale)
+    after_gaps, after_plans = load_gaps_and_plans(backend_path, journal)
+    assert after_gaps.equals(gaps)
+    assert after_plans.equals(plans)
+
+
+@pytest.mark.parametrize('journal', [False, True])
+def test_transaction_applies_every_change(backend_path, journal):
+    backend = make_backend(*backend_path, journal=journal)
+    gaps, plans = load_gaps_and_plans(backend_path, journal)
+
+    with backend.transaction() as tx:
+        fill(tx, gaps, plans, {'Progress': plans['Progress'].iloc[0]})
+    after_gaps, after_plans = load_gaps_and_plans(backend_path, journal)
+    assert len(after_gaps) == len(gaps) + 1 and len(after_plans) == len(plans) + 1
+    assert PLAN_ID in set(after_plans['PlanID'])
+    assert after_gaps.set_index('GapID').loc[gaps['GapID'].iloc[0], 'Status'] == 'حل شده'
+    assert after_plans.set_index('PlanID').loc[plans['PlanID'].iloc[0], 'Progress'] == 100
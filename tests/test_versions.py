@@ -0,0 +1,52 @@
+"""کنترل نسخه: نوشتن بر اساس داده کهنه VersionConflict می‌دهد و چیزی ذخیره نمی‌شود"""
+import pytest
+
+from conftest import make_backend
+from talent_storage import VersionConflict
+
+
+def first_gap(backend):
+    return backend.load_sheet('Gaps').iloc[0]
+
+
+@pytest.mark.parametrize('journal', [False, True])
+def test_stale_expected_row_raises_conflict(backend_path, journal):
+    backend = make_backend(*backend_path, journal=journal)
+    gap = first_gap(backend)
+    seen = {'Status': gap['Status'], 'GapSize': gap['GapSize']}
+    # نشست دیگر همان ردیف را پس از خواندن این نشست تغییر می‌دهد (ژورنال متعلق به یک پروسه است)
+    other = backend if journal else make_backend(*backend_path)
+    other.update_rows('Gaps', 'GapID', gap['GapID'], {'GapSize': gap['GapSize'] + 1})
+
+    with pytest.raises(VersionConflict):
+        backend.update_rows('Gaps', 'GapID', gap['GapID'], {'Status': 'حل شده'}, expected=seen)
+    current = first_gap(make_backend(*backend_path, journal=journal))
+    assert current['GapSize'] == gap['GapSize'] + 1
+    assert current['Status'] == gap['Status']
+
+    # با مقادیر تازه همان به‌روزرسانی ثبت می‌شود
+    fresh = {'Status': gap['Status'], 'GapSize': gap['GapSize'] + 1}
+    backend.update_rows('Gaps', 'GapID', gap['GapID'], {'Status': 'حل شده'}, expected=fresh)
+    assert first_gap(make_backend(*backend_path, journal=journal))['Status'] == 'حل شده'
+
+
+def test_deleted_row_raises_conflict(backend):
+    gaps = backend.load_sheet('Gaps')
+    gap = gaps.iloc[0]
+    backend.save_sheet(gaps.iloc[1:], 'Gaps')
+    with pytest.raises(VersionConflict):
+        backend.update_rows('Gaps', 'GapID', gap['GapID'], {'Status': 'حل شده'}, expected={'Status': gap['Status']})
+    assert gap['GapID'] not in set(backend.load_sheet('Gaps')['GapID'])
+
+
+@pytest.mark.parametrize('journal', [False, True])
+def test_stale_sheet_version_raises_conflict(backend_path, journal):
+    backend = make_backend(*backend_path, journal=journal)
+    version = backend.sheet_version('Gaps')
+    gaps = backend.load_sheet('Gaps')
+    backend.update_rows('Gaps', 'GapID', gaps['GapID'].iloc[0], {'Status': 'حل شده'})
+    assert backend.sheet_version('Gaps') != version
+
+    with pytest.raises(VersionConflict):
+        backend.save_sheet(gaps.iloc[1:], 'Gaps', expected_version=version)
+    assert len(make_backend(*backend_path, journal=journal).load_sheet('Gaps')) == len(gaps)
@@ -0,0 +1,79 @@
+"""بازنویسی بخش شیت‌ها در فایل xlsx: شیت‌های داده‌شده عوض می‌شوند و بقیه بخش‌های zip دست‌نخورده می‌مانند"""
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_backend
+from talent_schema import empty_sheets
+from talent_storage import WORKBOOK_CACHE, patch_workbook_sheets
+from talent_synth import generate_org, seed_backend
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = str(tmp_path / 'talent.xlsx')
+    backend = make_backend('excel', path)
+    backend.initialize(empty_sheets())
+    seed_backend(backend, generate_org(30, seed=1))
+    return path, backend
+
+
+def parts(path):
+    with zipfile.ZipFile(path) as archive:
+        assert archive.testzip() is None
+        return {info.filename: archive.read(info.filename) for info in archive.infolist()}
+
+
+def read_back(path, sheet_name):
+    """خواندن مستقل از کش و کدخوان خود برنامه (openpyxl)"""
+    return pd.read_excel(path, sheet_name=sheet_name, dtype=str, engine='openpyxl')
+
+
+def test_patched_sheet_round_trips_and_other_parts_are_untouched(workbook):
+    path, backend = workbook
+    before = parts(path)
+    gaps = backend.load_sheet('Gaps', copy=True)
+    gaps.loc[0, 'Status'] = 'حل شده'
+    gaps.loc[1, 'Description'] = 'متن با <نویسه‌های> ویژه & "نقل‌قول"'
+    gaps.loc[2, 'GapName'] = np.nan
+    gaps = pd.concat([gaps, pd.DataFrame([{'GapID': 'GAP-900001', 'GapName': 'می‌خواهم', 'GapSize': 3}])],
+                     ignore_index=True)
+
+    assert patch_workbook_sheets(path, {'Gaps': gaps})
+    after = parts(path)
+    changed = {name for name in before if before[name] != after.get(name)}
+    assert len(changed) == 1 and changed.pop().startswith('xl/worksheets/')
+    assert set(after) == set(before)
+
+    stored = read_back(path, 'Gaps')
+    assert stored['GapID'].tolist() == gaps['GapID'].tolist()
+    assert stored.loc[0, 'Status'] == 'حل شده'
+    assert stored.loc[1, 'Description'] == 'متن با <نویسه‌های> ویژه & "نقل‌قول"'
+    assert pd.isna(stored.loc[2, 'GapName'])
+    assert stored['GapName'].iloc[-1] == 'می‌خواهم' and float(stored['GapSize'].iloc[-1]) == 3
+
+    WORKBOOK_CACHE.invalidate(path)
+    reloaded = make_backend('excel', path).load_sheet('Gaps')
+    assert reloaded['GapID'].tolist() == gaps['GapID'].tolist()
+    assert reloaded['Status'].iloc[0] == 'حل شده'
+
+
+def test_several_sheets_in_one_patch(workbook):
+    path, backend = workbook
+    employees = backend.load_sheet('Employees').iloc[:5]
+    plans = backend.load_sheet('Development_Plans').assign(Progress=100)
+    assert patch_workbook_sheets(path, {'Employees': employees, 'Development_Plans': plans})
+    assert len(read_back(path, 'Employees')) == 5
+    assert set(read_back(path, 'Development_Plans')['Progress'].astype(float)) == {100.0}
+    assert len(read_back(path, 'Gaps')) == len(backend.load_sheet('Gaps'))
+
+
+def test_unknown_sheet_or_missing_file_is_refused(workbook, tmp_path):
+    path, backend = workbook
+    before = parts(path)
+    gaps = backend.load_sheet('Gaps')
+    assert not patch_workbook_sheets(path, {'Gaps': gaps, 'NoSuchSheet': gaps})
+    assert parts(path) == before
+    assert not patch_workbook_sheets(str(tmp_path / 'missing.xlsx'), {'Gaps': gaps})